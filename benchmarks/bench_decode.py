@@ -0,0 +1,374 @@
+"""
+Decode and poll benchmarks running on synthetic pages, no ACC needed.
+
+Usage:
+python benchmarks/bench_decode.py --output result.json
+python benchmarks/bench_decode.py --baseline result.json
+
+With --baseline the results are compared with a previous run and the
+script exits with 1 when a benchmark is slower than the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import struct
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pyaccsharedmemory as pyacc  # noqa: E402
+
+
+# Metrics where a bigger value is better, the others are better lower
+HIGHER_IS_BETTER = {"frames_per_second"}
+
+# Metrics reported but too noisy to fail a comparison
+UNGATED = {"p99_us"}
+
+
+def synthetic_page(layout: pyacc.PageLayout, seed: int) -> bytes:
+    """
+    Generate a valid page: random floats, small ints that are valid for
+    every enum of the pages and short UTF-16 strings.
+    """
+
+    rng = random.Random(seed)
+    values: List[Any] = []
+
+    for field in layout.fields.values():
+        if field.kind == "s":
+            text = f"{layout.name}{rng.randint(0, 99)}"
+            values.append(text.encode("utf-16-le")[:field.count])
+
+        elif field.kind == "i":
+            values.extend(rng.randint(0, 3) for _ in range(field.count))
+
+        else:
+            values.extend(rng.uniform(-100.0, 100.0)
+                          for _ in range(field.count))
+
+    return layout.struct.pack(*values)
+
+
+def page_map(layout: pyacc.PageLayout, seed: int) -> pyacc.accSM:
+
+    page = pyacc.accSM(-1, layout.size)
+    page[:] = synthetic_page(layout, seed)
+    return page
+
+
+def new_step(asm: pyacc.accSharedMemory, step: int) -> None:
+    """
+    Write a new physics step, see accSharedMemory._is_new_frame.
+    """
+
+    physics_id = pyacc.PHYSICS_LAYOUT.fields["packetID"]
+    suspension = pyacc.PHYSICS_LAYOUT.fields["suspensionTravel"]
+    physics_id.packer.pack_into(asm.physicSM, physics_id.offset, step)
+    struct.pack_into("=f", asm.physicSM, suspension.offset, step * 1e-3)
+
+
+def latency(function: Callable[[], Any], iterations: int) -> Dict[str, float]:
+
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):
+        start = clock()
+        function()
+        samples.append(clock() - start)
+
+    samples.sort()
+    return {
+        "mean_us": sum(samples) / len(samples) / 1e3,
+        "p50_us": samples[len(samples) // 2] / 1e3,
+        "p99_us": samples[int(len(samples) * 0.99)] / 1e3,
+    }
+
+
+def bench_decode(iterations: int) -> Dict[str, Dict[str, float]]:
+
+    pages = {
+        "read_physic_map": (pyacc.read_physic_map,
+                            page_map(pyacc.PHYSICS_LAYOUT, 1)),
+        "read_graphics_map": (pyacc.read_graphics_map,
+                              page_map(pyacc.GRAPHICS_LAYOUT, 2)),
+        "read_static_map": (pyacc.read_static_map,
+                            page_map(pyacc.STATIC_LAYOUT, 3)),
+    }
+
+    return {name: latency(lambda: read(page), iterations)
+            for name, (read, page) in pages.items()}
+
+
+def shared_memory(**kwargs) -> pyacc.accSharedMemory:
+
+    return pyacc.accSharedMemory(
+        physic_map=page_map(pyacc.PHYSICS_LAYOUT, 1),
+        graphic_map=page_map(pyacc.GRAPHICS_LAYOUT, 2),
+        static_map=page_map(pyacc.STATIC_LAYOUT, 3), **kwargs)
+
+
+def bench_read(iterations: int) -> Dict[str, Dict[str, float]]:
+    """
+    Throughput of the read methods of accSharedMemory, a new physics
+    step is written before each read.
+    """
+
+    readers = {
+        "read_shared_memory": ({}, "read_shared_memory"),
+        "read_shared_memory_in_place": ({"in_place": True},
+                                        "read_shared_memory"),
+        "read_shared_memory_consistent": ({"consistent": True},
+                                          "read_shared_memory"),
+        "read_shared_memory_lazy": ({}, "read_shared_memory_lazy"),
+        "read_raw_pages": ({}, "read_raw_pages"),
+    }
+
+    results = {}
+    for name, (kwargs, method) in readers.items():
+        asm = shared_memory(**kwargs)
+        read = getattr(asm, method)
+
+        start = time.perf_counter()
+        for step in range(1, iterations + 1):
+            new_step(asm, step)
+            read()
+        elapsed = time.perf_counter() - start
+
+        results[name] = {"frames_per_second": iterations / elapsed}
+
+    # Idle poll, nothing new in the pages
+    asm = shared_memory()
+    new_step(asm, 1)
+    asm.read_shared_memory()
+    results["idle_poll"] = latency(asm.read_shared_memory, iterations)
+
+    return results
+
+
+def bench_memory(frames: int) -> Dict[str, Dict[str, float]]:
+    """
+    Memory blocks and bytes allocated by a frame of read_shared_memory,
+    every frame is kept alive so nothing is freed during the run.
+    """
+
+    asm = shared_memory()
+    kept = []
+
+    gc.disable()
+    tracemalloc.start()
+    try:
+        blocks = sys.getallocatedblocks()
+        allocated, _ = tracemalloc.get_traced_memory()
+
+        for step in range(1, frames + 1):
+            new_step(asm, step)
+            kept.append(asm.read_shared_memory())
+
+        blocks = sys.getallocatedblocks() - blocks
+        allocated = tracemalloc.get_traced_memory()[0] - allocated
+
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+
+    return {"read_shared_memory": {
+        "blocks_per_frame": blocks / frames,
+        "bytes_per_frame": allocated / frames,
+    }}
+
+
+def bench_gc(frames: int) -> Dict[str, Dict[str, float]]:
+    """
+    Garbage collector pauses while reading frames and keeping the last
+    few hundreds, like a consumer buffering a short history.
+    """
+
+    asm = shared_memory()
+    history: List[Any] = []
+    pauses: List[int] = []
+    started = [0]
+
+    def callback(phase: str, info: Dict[str, int]) -> None:
+        if phase == "start":
+            started[0] = time.perf_counter_ns()
+
+        else:
+            pauses.append(time.perf_counter_ns() - started[0])
+
+    gc.collect()
+    gc.callbacks.append(callback)
+    try:
+        for step in range(1, frames + 1):
+            new_step(asm, step)
+            history.append(asm.read_shared_memory())
+            if len(history) > 500:
+                del history[:250]
+
+    finally:
+        gc.callbacks.remove(callback)
+
+    return {"read_shared_memory": {
+        "gc_collections": len(pauses),
+        "gc_pause_total_us": sum(pauses) / 1e3,
+        "gc_pause_max_us": max(pauses, default=0) / 1e3,
+    }}
+
+
+def spread(values: List[float]) -> float:
+    """
+    Run to run spread of a metric, relative to its median.
+    """
+
+    median = statistics.median(values)
+    return (max(values) - min(values)) / median if median else 0.0
+
+
+def run(iterations: int, repeat: int) -> Dict[str, Any]:
+    """
+    Run every benchmark repeat times and keep the median and the spread
+    of each metric, the GC benchmark is only run once.
+    """
+
+    results: Dict[str, Dict[str, float]] = {}
+    spreads: Dict[str, Dict[str, float]] = {}
+    for name, bench, runs in (("decode", bench_decode, repeat),
+                              ("read", bench_read, repeat),
+                              ("memory", bench_memory, repeat),
+                              ("gc", bench_gc, 1)):
+        # Warm up the caches and the interpreter
+        bench(iterations // 10)
+
+        samples = [bench(iterations) for _ in range(runs)]
+        for case, metrics in samples[0].items():
+            values = {metric: [sample[case][metric] for sample in samples]
+                      for metric in metrics}
+            results[f"{name}.{case}"] = {
+                metric: statistics.median(values[metric])
+                for metric in metrics}
+            spreads[f"{name}.{case}"] = {
+                metric: spread(values[metric]) for metric in metrics}
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "repeat": repeat,
+        "results": results,
+        "spread": spreads,
+    }
+
+
+def _gated(result: Dict[str, Any], baseline: Dict[str, Any]
+           ) -> Iterator[Tuple[str, str, float, float]]:
+    """
+    Yield (case, metric, value, baseline value) of the metrics checked
+    by compare. GC metrics and UNGATED ones are skipped, they depend on
+    the machine state more than on the code.
+    """
+
+    for case, metrics in result["results"].items():
+        if case.startswith("gc."):
+            continue
+
+        for metric, value in metrics.items():
+            base = baseline["results"].get(case, {}).get(metric)
+            if base and metric not in UNGATED:
+                yield case, metric, value, base
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float) -> List[str]:
+    """
+    Return the metrics that regressed by more than threshold (a ratio)
+    compared to the baseline.
+    """
+
+    regressions = []
+    for case, metric, value, base in _gated(result, baseline):
+        ratio = value / base
+        if metric in HIGHER_IS_BETTER:
+            ratio = 1 / ratio if ratio else float("inf")
+
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{case} {metric}: {base:.3f} -> {value:.3f}"
+                f" ({(ratio - 1) * 100:+.1f}%)")
+
+    return regressions
+
+
+def noisy(result: Dict[str, Any], baseline: Dict[str, Any],
+          max_spread: float) -> List[str]:
+    """
+    Return the compared metrics whose run to run spread is wider than
+    max_spread in either run, their comparison can't be trusted.
+    """
+
+    warnings = []
+    for case, metric, _, _ in _gated(result, baseline):
+        spreads = [run.get("spread", {}).get(case, {}).get(metric, 0.0)
+                   for run in (baseline, result)]
+
+        if max(spreads) > max_spread:
+            warnings.append(
+                f"{case} {metric}: spread {spreads[0] * 100:.1f}%"
+                f" -> {spreads[1] * 100:.1f}%")
+
+    return warnings
+
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs of each benchmark, the median is kept")
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--baseline", help="results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed slowdown ratio, 0.1 by default")
+    parser.add_argument("--max-spread", type=float, default=0.1,
+                        help="spread ratio above which a metric is"
+                             " reported as noisy, 0.1 by default")
+    args = parser.parse_args()
+
+    result = run(args.iterations, args.repeat)
+    text = json.dumps(result, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        for warning in noisy(result, baseline, args.max_spread):
+            print(f"Noisy: {warning}", file=sys.stderr)
+
+        regressions = compare(result, baseline, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,13 @@ setup(
     author_email="ryanrennoir9@gmail.com",
     url="https://github.com/rrennoir/PyAccSharedMemory",
     description="ACC shared memory reader in python",
-    py_modules=["pyaccsharedmemory"],
+    py_modules=["pyaccsharedmemory", "pyacc_fanout", "pyacc_session",
+                "pyacc_numpy", "pyacc_arrow", "pyacc_loadgen",
+                "pyacc_stream", "pyacc_laps", "pyacc_stats"],
+    extras_require={
+        "numpy": ["numpy"],
+        "arrow": ["numpy", "pyarrow"],
+    },
     package_dir={"": "src"},
     classifiers=[
         "Operating System :: Microsoft",
@@ -0,0 +1,290 @@
+"""
+Export telemetry to Arrow record batches and Parquet files.
+
+Frames are decoded in chunks with pyacc_numpy, nested values are
+flattened into typed columns named after the dataclass attributes, e.g.
+brake_temp_fl or velocity_x, enums become dictionary columns of their
+member names and the StaticsMap of the session is stored as metadata.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import typing
+from dataclasses import asdict, fields
+from enum import Enum
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pyaccsharedmemory import (ENUM_DEFAULTS, GRAPHICS_DECODER,
+                               PHYSICS_DECODER, CarDamage, ContactPoint,
+                               PageDecoder, RawPages, Vector3f, Wheels,
+                               read_static_map)
+from pyacc_numpy import (decode_strings, read_graphics_batch,
+                         read_physics_batch)
+
+STATIC_METADATA_KEY = b"acc_static"
+
+_WHEELS = ("fl", "fr", "rl", "rr")
+_AXES = ("x", "y", "z")
+_DAMAGE = tuple(field.name for field in fields(CarDamage))
+
+
+def _enum_column(enum: type) -> Callable[[np.ndarray], pa.Array]:
+
+    members = list(enum)
+    low = min(member.value for member in members)
+    high = max(member.value for member in members)
+
+    table = np.full(high - low + 1, -1, dtype=np.int32)
+    for index, member in enumerate(members):
+        table[member.value - low] = index
+
+    # Same fallback as read_graphics_map, null for the other enums
+    default = ENUM_DEFAULTS.get(enum)
+    unknown = -1 if default is None else members.index(default)
+
+    dictionary = pa.array([member.name for member in members])
+
+    def column(values: np.ndarray) -> pa.Array:
+
+        values = values.astype(np.int64) - low
+        in_range = (values >= 0) & (values < len(table))
+        indices = np.full(len(values), unknown, dtype=np.int32)
+        indices[in_range] = table[values[in_range]]
+        indices[indices < 0] = unknown
+
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, mask=indices < 0), dictionary)
+
+    return column
+
+
+def _plan(decoder: PageDecoder, renames: Dict[str, str]
+          ) -> List[Tuple[str, str, Callable]]:
+    """
+    Columns of a page as (name, raw field name, function building the
+    Arrow array from the raw NumPy column).
+    """
+
+    hints = typing.get_type_hints(decoder.cls)
+    plan = []
+
+    def add(name: str, field: str, build: Callable) -> None:
+        plan.append((name, field, build))
+
+    for attribute, (field, _) in decoder.attributes.items():
+        hint = hints[attribute]
+        name = renames.get(attribute, attribute)
+
+        if hint is Wheels:
+            for i, wheel in enumerate(_WHEELS):
+                add(f"{name}_{wheel}", field.name,
+                    lambda v, i=i: pa.array(v[:, i]))
+
+        elif hint is Vector3f:
+            for i, axis in enumerate(_AXES):
+                add(f"{name}_{axis}", field.name,
+                    lambda v, i=i: pa.array(v[:, i]))
+
+        elif hint is CarDamage:
+            for i, side in enumerate(_DAMAGE):
+                add(f"{name}_{side}", field.name,
+                    lambda v, i=i: pa.array(v[:, i]))
+
+        elif hint is ContactPoint:
+            for i, wheel in enumerate(_WHEELS):
+                for j, axis in enumerate(_AXES):
+                    add(f"{name}_{wheel}_{axis}", field.name,
+                        lambda v, i=i, j=j: pa.array(v[:, i, j]))
+
+        elif hint == List[Vector3f]:
+            for j, axis in enumerate(_AXES):
+                add(f"{name}_{axis}", field.name,
+                    lambda v, j=j: pa.FixedSizeListArray.from_arrays(
+                        pa.array(np.ascontiguousarray(v[:, :, j]).ravel()),
+                        v.shape[1]))
+
+        elif not field.is_scalar:
+            add(name, field.name, lambda v: pa.FixedSizeListArray.from_arrays(
+                pa.array(np.ascontiguousarray(v).ravel()), v.shape[1]))
+
+        elif field.kind == "s":
+            add(name, field.name,
+                lambda v: pa.array(decode_strings(v), type=pa.string()))
+
+        elif isinstance(hint, type) and issubclass(hint, Enum):
+            add(name, field.name, _enum_column(hint))
+
+        elif hint is bool:
+            add(name, field.name, lambda v: pa.array(v != 0))
+
+        else:
+            add(name, field.name, lambda v: pa.array(v))
+
+    return plan
+
+
+# packed_id is the only attribute in both pages
+_PHYSICS_PLAN = _plan(PHYSICS_DECODER, {"packed_id": "physics_packed_id"})
+_GRAPHICS_PLAN = _plan(GRAPHICS_DECODER, {"packed_id": "graphics_packed_id"})
+
+
+def static_metadata(static: bytes) -> Dict[bytes, bytes]:
+    """
+    StaticsMap of a static page as Arrow schema metadata.
+    """
+
+    statics = {
+        name: value.rstrip("\x00") if isinstance(value, str) else value
+        for name, value in asdict(read_static_map(static)).items()}
+
+    return {STATIC_METADATA_KEY: json.dumps(statics).encode()}
+
+
+def record_batch(physics: Sequence[bytes], graphics: Sequence[bytes],
+                 timestamps: Optional[Sequence[int]] = None,
+                 static: Optional[bytes] = None) -> pa.RecordBatch:
+    """
+    Build a record batch from raw pages, one row per frame.
+
+    Parameters:
+    physics, graphics: raw pages of each frame
+    timestamps: optional time.perf_counter_ns() of each frame
+    static: optional static page stored as schema metadata
+    """
+
+    names = []
+    arrays = []
+
+    if timestamps is not None:
+        names.append("timestamp")
+        arrays.append(pa.array(timestamps, type=pa.int64()))
+
+    for plan, batch in ((_PHYSICS_PLAN, read_physics_batch(physics)),
+                        (_GRAPHICS_PLAN, read_graphics_batch(graphics))):
+        for name, field, build in plan:
+            names.append(name)
+            arrays.append(build(batch[field]))
+
+    metadata = None if static is None else static_metadata(static)
+    return pa.RecordBatch.from_arrays(arrays, names=names, metadata=metadata)
+
+
+class ParquetExporter:
+    """
+    Stream frames to a Parquet file, frames are buffered as raw pages and
+    written every row_group_size frames so memory stays bounded.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 65536,
+                 compression: str = "zstd") -> None:
+
+        self.path = path
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.frames = 0
+
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._static: Optional[bytes] = None
+        self._timestamps: List[int] = []
+        self._physics: List[bytes] = []
+        self._graphics: List[bytes] = []
+
+    def write(self, pages: RawPages, timestamp: Optional[int] = None
+              ) -> None:
+
+        if timestamp is None:
+            timestamp = time.perf_counter_ns()
+
+        if self._static is None:
+            # Only the StaticsMap of the first frame is kept
+            self._static = pages.static
+
+        self._timestamps.append(timestamp)
+        self._physics.append(pages.physics)
+        self._graphics.append(pages.graphics)
+        self.frames += 1
+
+        if len(self._timestamps) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+
+        if not self._timestamps:
+            return
+
+        batch = record_batch(self._physics, self._graphics,
+                             self._timestamps, self._static)
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(
+                self.path, batch.schema, compression=self.compression)
+
+        self._writer.write_batch(batch, row_group_size=self.row_group_size)
+
+        self._timestamps = []
+        self._physics = []
+        self._graphics = []
+
+    def close(self) -> None:
+
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> ParquetExporter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def session_batches(path: str, chunk_size: int = 65536
+                    ) -> Iterator[pa.RecordBatch]:
+    """
+    Read a recorded session or archive as record batches of chunk_size
+    frames, see pyacc_session.
+    """
+
+    from pyacc_session import open_session
+
+    timestamps: List[int] = []
+    physics: List[bytes] = []
+    graphics: List[bytes] = []
+    static = None
+
+    with open_session(path) as reader:
+        for frame in reader:
+            static = frame.static if static is None else static
+            timestamps.append(frame.timestamp)
+            physics.append(frame.physics)
+            graphics.append(frame.graphics)
+
+            if len(timestamps) == chunk_size:
+                yield record_batch(physics, graphics, timestamps, static)
+                timestamps, physics, graphics = [], [], []
+
+    if timestamps:
+        yield record_batch(physics, graphics, timestamps, static)
+
+
+def export_session(path: str, parquet_path: str,
+                   row_group_size: int = 65536,
+                   compression: str = "zstd") -> None:
+    """
+    Convert a recorded session or archive into a Parquet file.
+    """
+
+    from pyacc_session import open_session
+
+    with open_session(path) as reader, ParquetExporter(
+            parquet_path, row_group_size, compression) as exporter:
+        for frame in reader:
+            exporter.write(RawPages(frame.physics, frame.graphics,
+                                    frame.static), frame.timestamp)
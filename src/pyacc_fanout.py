@@ -0,0 +1,249 @@
+"""
+Share the frames read from ACC with other local processes.
+
+A FramePublisher polls the game once for every tool running on the rig
+and writes each new frame into a multiprocessing.shared_memory segment.
+FrameSubscriber instances, in any local process, read the latest frame
+from that segment and only decode the fields they use.
+
+Segment layout, native byte order:
+sequence (uint64, odd while a frame is being written), frame count
+(uint64), physics packet id (int32), graphics packet id (int32),
+timestamp in time.perf_counter_ns (int64), followed by the physics,
+graphics and static pages.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Tuple
+
+from pyaccsharedmemory import (GRAPHICS_PAGE_SIZE, PHYSICS_PAGE_SIZE,
+                               STATIC_PAGE_SIZE, ACC_map, GraphicsView,
+                               PhysicsView, RawPages, SharedMemoryPoller,
+                               SharedMemoryTimeout, StaticsView,
+                               accSharedMemory)
+
+DEFAULT_NAME = "pyaccsharedmemory"
+
+_HEADER = struct.Struct("=QQiiq")
+_SEQUENCE = struct.Struct("=Q")
+
+PHYSICS_OFFSET = _HEADER.size
+GRAPHICS_OFFSET = PHYSICS_OFFSET + PHYSICS_PAGE_SIZE
+STATIC_OFFSET = GRAPHICS_OFFSET + GRAPHICS_PAGE_SIZE
+SEGMENT_SIZE = STATIC_OFFSET + STATIC_PAGE_SIZE
+
+# Segments created by a FramePublisher of this process, or of the parent
+# of a forked process
+_published = set()
+
+
+class FramePublisher:
+    """
+    Read ACC once and publish every new frame in a shared memory segment.
+    """
+
+    def __init__(self, asm: accSharedMemory, name: str = DEFAULT_NAME,
+                 rate: float = 333.0) -> None:
+
+        self.asm = asm
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=True, size=SEGMENT_SIZE)
+        _published.add(self.shm.name)
+        self.frames = 0
+
+        self._poller = SharedMemoryPoller(asm, rate, read=asm.read_raw_pages)
+        self._static: Optional[bytes] = None
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, pages: RawPages) -> None:
+        """
+        Publish a frame, subscribers never see a partially written one.
+        """
+
+        buf = self.shm.buf
+        sequence = _SEQUENCE.unpack_from(buf)[0]
+
+        _SEQUENCE.pack_into(buf, 0, sequence + 1)
+
+        buf[PHYSICS_OFFSET:GRAPHICS_OFFSET] = pages.physics
+        buf[GRAPHICS_OFFSET:STATIC_OFFSET] = pages.graphics
+        if pages.static is not self._static:
+            buf[STATIC_OFFSET:SEGMENT_SIZE] = pages.static
+            self._static = pages.static
+
+        self.frames += 1
+        _HEADER.pack_into(
+            buf, 0, sequence + 2, self.frames,
+            struct.unpack_from("=i", pages.physics)[0],
+            struct.unpack_from("=i", pages.graphics)[0],
+            time.perf_counter_ns())
+
+    def publish(self) -> bool:
+        """
+        Poll ACC once and publish the frame if it's a new one.
+
+        Return:
+        result: True if a frame was published
+        """
+
+        pages = self._poller.read()
+        if pages is None:
+            return False
+
+        self.write(pages)
+        return True
+
+    def run(self, timeout: Optional[float] = None) -> None:
+        """
+        Publish frames forever at the poller rate, raise
+        SharedMemoryTimeout if no frame came for timeout seconds.
+        """
+
+        while True:
+            self.write(self._poller.poll(timeout))
+
+    def close(self) -> None:
+        _published.discard(self.shm.name)
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+
+    if os.name == "posix" and shm.name not in _published:
+        # Before Python 3.13 attaching registers the segment with the
+        # resource tracker of this process, which unlinks it when the
+        # process exits and would destroy the segment of the publisher
+        # (bpo-39959). The tracker of the publisher process, or of its
+        # forked children, must keep it. A spawned child shares that
+        # tracker too but can't know it, the publisher then only gets
+        # a tracker warning when it unlinks the segment.
+        resource_tracker.unregister(f"/{shm.name}", "shared_memory")
+
+    return shm
+
+
+class FrameSubscriber:
+    """
+    Read the frames published by a FramePublisher.
+
+    With copy=True (default) a frame is copied out of the segment once
+    and checked against the sequence counter, with copy=False the views
+    read the segment directly without any copy and check_sequence tells
+    if they were overwritten since.
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME,
+                 max_retries: int = 100) -> None:
+
+        self.shm = _attach(name)
+        self.max_retries = max_retries
+
+        self._static: Optional[bytes] = None
+        self._statics_view: Optional[StaticsView] = None
+
+    @property
+    def sequence(self) -> int:
+        return _SEQUENCE.unpack_from(self.shm.buf)[0]
+
+    def check_sequence(self, sequence: int) -> bool:
+        return self.sequence == sequence
+
+    def _frame(self, data: memoryview, sequence: int, copy: bool
+               ) -> Tuple[int, ACC_map]:
+
+        physics = data[PHYSICS_OFFSET:GRAPHICS_OFFSET]
+        graphics = data[GRAPHICS_OFFSET:STATIC_OFFSET]
+        static = data[STATIC_OFFSET:SEGMENT_SIZE]
+
+        if not copy:
+            return sequence, ACC_map(PhysicsView(physics),
+                                     GraphicsView(graphics),
+                                     StaticsView(static))
+
+        if static != self._static:
+            self._static = bytes(static)
+            self._statics_view = StaticsView(self._static)
+
+        return sequence, ACC_map(PhysicsView(bytes(physics)),
+                                 GraphicsView(bytes(graphics)),
+                                 self._statics_view)
+
+    def latest(self, copy: bool = True) -> Optional[Tuple[int, ACC_map]]:
+        """
+        Return the latest published frame.
+
+        Return:
+        result: (sequence, ACC_map) or None if nothing was published yet
+        or no consistent copy could be made
+        """
+
+        buf = self.shm.buf
+
+        for _ in range(self.max_retries + 1):
+            sequence = _SEQUENCE.unpack_from(buf)[0]
+            if sequence == 0:
+                return None
+
+            if sequence % 2:
+                continue
+
+            if not copy:
+                return self._frame(buf, sequence, copy)
+
+            data = memoryview(bytes(buf[:SEGMENT_SIZE]))
+            if _SEQUENCE.unpack_from(buf)[0] == sequence:
+                return self._frame(data, sequence, copy)
+
+        return None
+
+    def wait_next(self, sequence: int, timeout: Optional[float] = None,
+                  poll_interval: float = 0.0005, copy: bool = True
+                  ) -> Tuple[int, ACC_map]:
+        """
+        Wait for a frame published after sequence.
+
+        Return:
+        result: (sequence, ACC_map)
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            if self.sequence > sequence:
+                frame = self.latest(copy)
+                if frame is not None:
+                    return frame
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise SharedMemoryTimeout("No frame published")
+
+            time.sleep(poll_interval)
+
+    def close(self) -> None:
+        """
+        Unmap the segment. Frames read with copy=False point into it,
+        they must be dropped before or BufferError is raised.
+        """
+
+        self._statics_view = None
+        try:
+            self.shm.close()
+
+        except BufferError:
+            raise BufferError("Frames read with copy=False are still alive,"
+                              " drop them before closing") from None
@@ -0,0 +1,289 @@
+"""
+Split the live frame stream into laps and sectors.
+
+A LapSegmenter is fed every frame, it emits lap, sector and pit events
+and records the chosen channels of the running lap in array.array
+buffers. Only the last keep_laps finished laps stay in memory, with a
+spill directory every finished lap is also written to disk so nothing
+is lost over a 24 hours race.
+
+Lap file layout: a JSON header line with the lap information and the
+name, array typecode and length of each channel, followed by the raw
+arrays in native byte order.
+"""
+
+from __future__ import annotations
+
+import array
+import collections
+import json
+import os
+import re
+import time
+from typing import (Any, Callable, Deque, Dict, List, NamedTuple, Optional,
+                    Sequence, Tuple)
+
+from pyaccsharedmemory import (ACC_map, GraphicsMap, SharedMemoryPoller,
+                               SharedMemoryTimeout, accSharedMemory,
+                               numeric_channels)
+
+DEFAULT_CHANNELS = (
+    "Physics.speed_kmh",
+    "Physics.gas",
+    "Physics.brake",
+    "Physics.steer_angle",
+    "Physics.gear",
+    "Physics.rpm",
+)
+
+LAP_STARTED = "lap_started"
+LAP_COMPLETED = "lap_completed"
+SECTOR_COMPLETED = "sector_completed"
+PIT_IN = "pit_in"
+PIT_OUT = "pit_out"
+
+# Spilled lap files, numbered in the order the laps finished since
+# completed_lap starts again from 0 every session
+_SPILL_NAME = "{segment:05d}_lap_{number:04d}.bin"
+_SPILL_PATTERN = re.compile(r"(\d+)_lap_\d+\.bin")
+
+
+class Lap:
+    """
+    Channels and timing of a lap.
+
+    Each channel is an array.array with one value per frame fed during
+    the lap, the "position" channel holds normalized_car_position and
+    "time" the lap time in ms.
+    """
+
+    def __init__(self, number: int, typecodes: Dict[str, str]) -> None:
+
+        # completed_lap when the lap started
+        self.number = number
+        # Lap time and sector times in ms, from the game
+        self.time: Optional[int] = None
+        self.sectors: List[int] = []
+        # False if the lap was invalid at any frame
+        self.valid = True
+        # True if the car was in the pit during the lap
+        self.pit = False
+        self.channels: Dict[str, array.array] = {
+            name: array.array(code) for name, code in typecodes.items()}
+
+    def __len__(self) -> int:
+        return len(self.channels["time"])
+
+    def __repr__(self) -> str:
+        return (f"Lap(number={self.number}, time={self.time},"
+                f" sectors={self.sectors}, valid={self.valid},"
+                f" frames={len(self)})")
+
+    def save(self, path: str) -> None:
+
+        header = {
+            "number": self.number,
+            "time": self.time,
+            "sectors": self.sectors,
+            "valid": self.valid,
+            "pit": self.pit,
+            "channels": [[name, values.typecode, len(values)]
+                         for name, values in self.channels.items()],
+        }
+
+        with open(path, "wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            for values in self.channels.values():
+                values.tofile(file)
+
+    @classmethod
+    def load(cls, path: str) -> Lap:
+
+        with open(path, "rb") as file:
+            header = json.loads(file.readline())
+            lap = cls(header["number"], {
+                name: code for name, code, _ in header["channels"]})
+            lap.time = header["time"]
+            lap.sectors = header["sectors"]
+            lap.valid = header["valid"]
+            lap.pit = header["pit"]
+
+            for name, _, length in header["channels"]:
+                lap.channels[name].fromfile(file, length)
+
+        return lap
+
+
+class LapEvent(NamedTuple):
+
+    # LAP_STARTED, LAP_COMPLETED, SECTOR_COMPLETED, PIT_IN or PIT_OUT
+    kind: str
+    # completed_lap of the lap the event belongs to
+    lap: int
+    # Index of the completed sector, current sector otherwise
+    sector: int
+    # Lap or sector time in ms for completed events, lap time otherwise
+    time: int
+    # The finished lap for LAP_COMPLETED
+    data: Optional[Lap] = None
+
+
+class LapSegmenter:
+    """
+    Detect lap, sector and pit boundaries in a stream of ACC_map and
+    record the channels of each lap.
+    """
+
+    def __init__(self, channels: Sequence[str] = DEFAULT_CHANNELS,
+                 keep_laps: int = 2, spill_directory: Optional[str] = None,
+                 on_event: Optional[Callable[[LapEvent], Any]] = None
+                 ) -> None:
+        """
+        Parameters:
+        channels: numeric attributes to record, as "<Page>.<attribute>"
+        keep_laps: number of finished laps kept in memory
+        spill_directory: directory where every finished lap is saved,
+        see Lap.load. Files are numbered after the ones already there
+        on_event: called with each event, they are also returned by feed
+        """
+
+        if keep_laps < 0:
+            raise ValueError("keep_laps must be positive")
+
+        self._plan: List[Tuple[str, str, Optional[str], str]] = []
+        self.typecodes = {"time": "i", "position": "f"}
+        for path in channels:
+            for page, attribute, element, code in numeric_channels(path):
+                name = f"{page}.{attribute}"
+                if element is not None:
+                    name += f".{element}"
+
+                self._plan.append((page, attribute, element, name))
+                self.typecodes[name] = code
+
+        self.spill_directory = spill_directory
+        self._segment = 0
+        if spill_directory is not None:
+            os.makedirs(spill_directory, exist_ok=True)
+            for name in os.listdir(spill_directory):
+                match = _SPILL_PATTERN.fullmatch(name)
+                if match is not None:
+                    self._segment = max(self._segment,
+                                        int(match.group(1)) + 1)
+
+        self.on_event = on_event
+        self.laps: Deque[Lap] = collections.deque(maxlen=keep_laps)
+        self.spilled: List[str] = []
+        self.current: Optional[Lap] = None
+
+        self._sector = 0
+        self._in_pit = False
+
+    def _new_lap(self, number: int) -> None:
+        self.current = Lap(number, self.typecodes)
+
+    def _finish_lap(self, graphics: GraphicsMap) -> Lap:
+
+        lap = self.current
+        lap.time = graphics.last_time
+        self.current = None
+
+        if self.laps.maxlen:
+            self.laps.append(lap)
+
+        if self.spill_directory is not None:
+            path = os.path.join(self.spill_directory, _SPILL_NAME.format(
+                segment=self._segment, number=lap.number))
+            self._segment += 1
+            lap.save(path)
+            self.spilled.append(path)
+
+        return lap
+
+    def feed(self, frame: ACC_map) -> List[LapEvent]:
+        """
+        Record a frame and return the events it triggered.
+        """
+
+        graphics = frame.Graphics
+        lap_number = graphics.completed_lap
+        sector = graphics.current_sector_index
+        events = []
+
+        if self.current is not None and lap_number != self.current.number:
+            if lap_number == self.current.number + 1:
+                # The last sector ends with the lap
+                events.append(LapEvent(SECTOR_COMPLETED, self.current.number,
+                                       self._sector,
+                                       graphics.last_sector_time))
+                self.current.sectors.append(graphics.last_sector_time)
+                lap = self._finish_lap(graphics)
+                events.append(LapEvent(LAP_COMPLETED, lap.number, sector,
+                                       lap.time, lap))
+
+            else:
+                # New session or jump in the laps count, drop the lap
+                self.current = None
+
+        elif self.current is not None and sector != self._sector:
+            events.append(LapEvent(SECTOR_COMPLETED, lap_number,
+                                   self._sector, graphics.last_sector_time))
+            self.current.sectors.append(graphics.last_sector_time)
+
+        if self.current is None:
+            self._new_lap(lap_number)
+            events.append(LapEvent(LAP_STARTED, lap_number, sector,
+                                   graphics.current_time))
+
+        self._sector = sector
+
+        if graphics.is_in_pit != self._in_pit:
+            self._in_pit = graphics.is_in_pit
+            events.append(LapEvent(PIT_IN if self._in_pit else PIT_OUT,
+                                   lap_number, sector, graphics.current_time))
+
+        lap = self.current
+        lap.valid = lap.valid and graphics.is_valid_lap
+        lap.pit = lap.pit or self._in_pit
+
+        channels = lap.channels
+        channels["time"].append(graphics.current_time)
+        channels["position"].append(graphics.normalized_car_position)
+        for page, attribute, element, name in self._plan:
+            value = getattr(getattr(frame, page), attribute)
+            if element is not None:
+                value = getattr(value, element)
+            channels[name].append(value)
+
+        if self.on_event is not None:
+            for event in events:
+                self.on_event(event)
+
+        return events
+
+    def run(self, asm: accSharedMemory, duration: Optional[float] = None,
+            rate: float = 333.0, timeout: float = 1.0) -> None:
+        """
+        Feed the frames of an accSharedMemory for duration seconds or
+        forever, the events go to on_event. Pauses without frames don't
+        stop it, timeout only bounds each wait for a frame.
+        """
+
+        poller = SharedMemoryPoller(asm, rate)
+        end = None if duration is None else time.perf_counter() + duration
+
+        while True:
+            wait = timeout
+            if end is not None:
+                remaining = end - time.perf_counter()
+                if remaining <= 0:
+                    return
+
+                wait = min(timeout, remaining)
+
+            try:
+                self.feed(poller.poll(wait))
+
+            except SharedMemoryTimeout:
+                # Game paused or in the menus, the laps go on after
+                continue
@@ -0,0 +1,317 @@
+"""
+Synthetic telemetry for testing readers without the game.
+
+A LoadGenerator drives a car around a circular track with up to 60
+opponents and writes the physics, graphics and static pages into file
+backed mappings at the physics rate of the game, so readers can be soak
+tested under real write contention:
+
+python pyacc_loadgen.py --directory /tmp/acc --rate 333 --opponents 20
+
+and in the reader process:
+
+asm = accSharedMemory(**open_pages("/tmp/acc"))
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import time
+from typing import Dict, Optional
+
+from pyaccsharedmemory import (ACC_FLAG_TYPE, ACC_SESSION_TYPE, ACC_STATUS,
+                               ACC_TRACK_GRIP_STATUS, GRAPHICS_DECODER,
+                               GRAPHICS_PAGE_SIZE, PHYSICS_DECODER,
+                               PHYSICS_PAGE_SIZE, STATIC_DECODER,
+                               STATIC_PAGE_SIZE, Vector3f, Wheels, accSM,
+                               open_page_file, write_graphics_map,
+                               write_physic_map, write_static_map)
+
+MAX_CARS = 60
+
+_PAGE_FILES = (
+    ("physic_map", "physics", PHYSICS_PAGE_SIZE),
+    ("graphic_map", "graphics", GRAPHICS_PAGE_SIZE),
+    ("static_map", "static", STATIC_PAGE_SIZE),
+)
+
+
+def open_pages(directory: str) -> Dict[str, accSM]:
+    """
+    Map the page files of a directory, created if needed.
+
+    Return:
+    result: dict of the pages usable as accSharedMemory arguments
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    return {argument: open_page_file(os.path.join(directory, name), size)
+            for argument, name, size in _PAGE_FILES}
+
+
+def format_time(milliseconds: int) -> str:
+    """
+    Lap time as shown by ACC, e.g. 1:47.352
+    """
+
+    minutes, milliseconds = divmod(max(milliseconds, 0), 60000)
+    return f"{minutes}:{milliseconds // 1000:02d}.{milliseconds % 1000:03d}"
+
+
+class LoadGenerator:
+    """
+    Simulate a race on a circular track and write it in the pages.
+
+    The player car speed follows the track (slow corners, fast
+    straights), the opponents are spread over the lap with their own
+    pace. The graphics page is updated at graphics_rate like in ACC.
+    """
+
+    def __init__(self, pages: Dict[str, accSM], rate: float = 333.0,
+                 opponents: int = 20, graphics_rate: float = 60.0,
+                 track_length: float = 5793.0) -> None:
+        """
+        Parameters:
+        pages: pages to write, see open_pages
+        rate: physics steps per second
+        opponents: number of other cars, up to 59
+        graphics_rate: graphics page updates per second
+        track_length: lap length in meters
+        """
+
+        if rate <= 0 or graphics_rate <= 0:
+            raise ValueError("rate must be strictly positive")
+
+        if not 0 <= opponents < MAX_CARS:
+            raise ValueError(f"opponents must be between 0 and"
+                             f" {MAX_CARS - 1}")
+
+        self.physic_map = pages["physic_map"]
+        self.graphic_map = pages["graphic_map"]
+        self.static_map = pages["static_map"]
+
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.graphics_every = max(1, round(rate / graphics_rate))
+        self.opponents = opponents
+        self.track_length = track_length
+        self.radius = track_length / (2 * math.pi)
+
+        self.steps = 0
+        self.distance = 0.0
+        self.lap_time = 0.0
+        self.last_lap = 0
+        self.best_lap = 0
+        self.fuel = 60.0
+
+        # Lap fraction and pace of every car, the player is car 0
+        self.positions = [i / (opponents + 1) for i in range(opponents + 1)]
+        self.paces = [45.0 + (i * 7 % 11) * 0.3 for i in range(opponents + 1)]
+
+        # Decoded empty pages used as templates, updated every step
+        self.physics = PHYSICS_DECODER.decode(bytes(PHYSICS_PAGE_SIZE))
+        self.graphics = GRAPHICS_DECODER.decode(bytes(GRAPHICS_PAGE_SIZE))
+        self.statics = STATIC_DECODER.decode(bytes(STATIC_PAGE_SIZE))
+
+        self._write_static()
+
+    def _write_static(self) -> None:
+
+        statics = self.statics
+        statics.sm_version = "1.9"
+        statics.ac_version = "1.8"
+        statics.number_of_session = 1
+        statics.num_cars = self.opponents + 1
+        statics.car_model = "porsche_991ii_gt3_r"
+        statics.track = "monza"
+        statics.player_name = "Load"
+        statics.player_surname = "Generator"
+        statics.player_nick = "LGN"
+        statics.sector_count = 3
+        statics.max_rpm = 9250
+        statics.max_fuel = 120.0
+        statics.aid_fuel_rate = 1.0
+        statics.aid_tyre_rate = 1.0
+        statics.dry_tyres_name = "DHF"
+        statics.wet_tyres_name = "WH"
+
+        write_static_map(self.static_map, statics,
+                         {"trackSplineLength": self.track_length})
+
+    def _speed(self, car: int, position: float) -> float:
+        """
+        Speed of a car in m/s along the lap, three corners per lap.
+        """
+
+        return ((50.0 + 20.0 * math.cos(6 * math.pi * position))
+                * self.paces[car] / 50.0)
+
+    def _write_physics(self) -> None:
+
+        t = self.steps * self.dt
+        position = self.positions[0]
+        speed = self._speed(0, position)
+        previous = self._speed(
+            0, position - speed * self.dt / self.track_length)
+        accel = (speed - previous) * self.rate
+        heading = 2 * math.pi * position
+
+        physics = self.physics
+        physics.packed_id = self.steps
+        physics.gas = min(1.0, max(0.0, 0.6 + accel / 10.0))
+        physics.brake = min(1.0, max(0.0, -accel / 15.0))
+        physics.fuel = self.fuel
+        physics.speed_kmh = speed * 3.6
+        physics.gear = min(7, 2 + int(physics.speed_kmh // 45))
+        physics.rpm = int(4000 + (physics.speed_kmh % 45) * 110)
+        physics.steer_angle = 0.1 * math.sin(6 * math.pi * position)
+        physics.heading = heading
+        physics.velocity = Vector3f(-speed * math.sin(heading), 0.0,
+                                    speed * math.cos(heading))
+        physics.local_velocity = Vector3f(0.0, 0.0, speed)
+        physics.g_force = Vector3f(speed * speed / self.radius / 9.81, 1.0,
+                                   accel / 9.81)
+        physics.air_temp = 24.0
+        physics.road_temp = 31.0
+        physics.water_temp = 85.0 + math.sin(t / 60)
+
+        wobble = [math.sin(t * 7.0 + i) for i in range(4)]
+        physics.tyre_core_temp = Wheels(*(80.0 + 3.0 * w for w in wobble))
+        physics.brake_temp = Wheels(*(300.0 + 200.0 * physics.brake + w
+                                      for w in wobble))
+        physics.wheel_pressure = Wheels(*(27.6 + 0.1 * w for w in wobble))
+        physics.suspension_travel = Wheels(*(0.03 + 0.005 * w
+                                             for w in wobble))
+        physics.pad_life = Wheels(29.0, 29.0, 29.0, 29.0)
+        physics.disc_life = Wheels(32.0, 32.0, 32.0, 32.0)
+        physics.ignition_on = True
+        physics.is_engine_running = True
+
+        write_physic_map(self.physic_map, physics, {
+            "tyreWear": (0.1, 0.1, 0.1, 0.1),
+            "wheelLoad": tuple(4000.0 + 100.0 * w for w in wobble),
+            "currentMaxRpm": 9250,
+        })
+
+    def _write_graphics(self) -> None:
+
+        t = self.steps * self.dt
+        cars = self.opponents + 1
+        lap_fraction = self.distance / self.track_length
+        player = self.positions[0]
+
+        graphics = self.graphics
+        graphics.packed_id = self.steps // self.graphics_every
+        graphics.status = ACC_STATUS.ACC_LIVE
+        graphics.session_type = ACC_SESSION_TYPE.ACC_RACE
+        graphics.completed_lap = int(lap_fraction)
+        graphics.current_time = int(self.lap_time * 1000)
+        graphics.last_time = self.last_lap
+        graphics.best_time = self.best_lap
+        graphics.current_time_str = format_time(graphics.current_time)
+        graphics.last_time_str = format_time(self.last_lap)
+        graphics.best_time_str = format_time(self.best_lap)
+        graphics.session_time_left = max(0.0, 3600e3 - t * 1e3)
+        graphics.distance_traveled = self.distance
+        graphics.current_sector_index = min(2, int(player * 3))
+        graphics.number_of_laps = 0
+        graphics.tyre_compound = "dry_compound"
+        graphics.normalized_car_position = player
+        graphics.active_cars = cars
+        graphics.flag = ACC_FLAG_TYPE.ACC_NO_FLAG
+        graphics.track_grip_status = ACC_TRACK_GRIP_STATUS.ACC_OPTIMUM
+        graphics.track_status = "OPTIMUM"
+        graphics.is_valid_lap = True
+        graphics.clock = 14 * 3600.0 + t
+        graphics.used_fuel = 60.0 - self.fuel
+        graphics.player_car_id = 0
+
+        # Race order by lap fraction, the leader is the most advanced car
+        order = sorted(range(cars), key=lambda car: -self.positions[car])
+        graphics.position = order.index(0) + 1
+
+        for car, vector in enumerate(graphics.car_coordinates[:cars]):
+            angle = 2 * math.pi * self.positions[car]
+            vector.x = self.radius * math.cos(angle)
+            vector.z = self.radius * math.sin(angle)
+
+        graphics.car_id = tuple(range(cars)) + (0,) * (MAX_CARS - cars)
+
+        write_graphics_map(self.graphic_map, graphics, {
+            "surfaceGrip": 0.98,
+            "replayTimeMultiplier": 1.0,
+        })
+
+    def step(self) -> None:
+        """
+        Advance the simulation by one physics step and write the pages.
+        """
+
+        self.steps += 1
+
+        previous_lap = int(self.distance // self.track_length)
+
+        for car in range(self.opponents + 1):
+            speed = self._speed(car, self.positions[car])
+            self.positions[car] = (self.positions[car]
+                                   + speed * self.dt / self.track_length) % 1
+
+            if car == 0:
+                self.distance += speed * self.dt
+        self.lap_time += self.dt
+        self.fuel = max(0.0, self.fuel - 0.0005)
+
+        if int(self.distance // self.track_length) > previous_lap:
+            self.last_lap = int(self.lap_time * 1000)
+            if self.best_lap == 0 or self.last_lap < self.best_lap:
+                self.best_lap = self.last_lap
+
+            self.lap_time = 0.0
+
+        self._write_physics()
+        if self.steps % self.graphics_every == 0:
+            self._write_graphics()
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """
+        Write steps at the physics rate, for duration seconds or forever.
+        Late steps are written right away to catch up.
+        """
+
+        start = time.perf_counter()
+        steps = 0
+
+        while duration is None or steps * self.dt < duration:
+            self.step()
+            steps += 1
+
+            delay = start + steps * self.dt - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(
+        description="Write synthetic ACC pages in a directory")
+    parser.add_argument("--directory", default="acc_pages")
+    parser.add_argument("--rate", type=float, default=333.0)
+    parser.add_argument("--opponents", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=None)
+    args = parser.parse_args()
+
+    generator = LoadGenerator(open_pages(args.directory), args.rate,
+                              args.opponents)
+    print(f"[LoadGenerator]: Writing pages in {args.directory}")
+
+    try:
+        generator.run(args.duration)
+
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
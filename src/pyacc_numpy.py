@@ -0,0 +1,185 @@
+"""
+Decode thousands of raw pages at once with NumPy.
+
+Raw physics, graphics or static pages are mapped onto a structured dtype
+mirroring the documented layout, each field being a column without any
+per-frame Python object. Field names are the documented ones, e.g.
+physics["tyreCoreTemperature"] is a (N, 4) float32 array and
+graphics["carCoordinates"] a (N, 60, 3) one.
+
+Enums and UTF-16 strings stay as raw integer and byte columns, use
+decode_enum and decode_strings to convert them.
+"""
+
+from __future__ import annotations
+
+from enum import Enum
+from typing import Dict, Iterable, Optional, Tuple, Type, Union
+
+import numpy as np
+
+from pyaccsharedmemory import (ENUM_DEFAULTS, GRAPHICS_LAYOUT,
+                               PHYSICS_LAYOUT, STATIC_LAYOUT, PageLayout)
+
+Pages = Union[bytes, bytearray, memoryview, Iterable[bytes]]
+
+# Fields stored flat in the layout but exposed as matrices
+_SHAPES = {
+    "tyreContactPoint": (4, 3),
+    "tyreContactNormal": (4, 3),
+    "tyreContactHeading": (4, 3),
+    "carCoordinates": (60, 3),
+}
+
+_KINDS = {"i": "=i4", "f": "=f4"}
+
+
+def layout_dtype(layout: PageLayout) -> np.dtype:
+    """
+    Structured dtype of a page layout, with the same offsets and size.
+    """
+
+    names = []
+    formats = []
+    offsets = []
+
+    for field in layout.fields.values():
+        if field.kind == "s":
+            field_format = np.dtype(f"S{field.count}")
+
+        elif field.count == 1:
+            field_format = np.dtype(_KINDS[field.kind])
+
+        else:
+            shape = _SHAPES.get(field.name, (field.count,))
+            field_format = np.dtype((_KINDS[field.kind], shape))
+
+        names.append(field.name)
+        formats.append(field_format)
+        offsets.append(field.offset)
+
+    return np.dtype({"names": names, "formats": formats,
+                     "offsets": offsets, "itemsize": layout.size})
+
+
+PHYSICS_DTYPE = layout_dtype(PHYSICS_LAYOUT)
+GRAPHICS_DTYPE = layout_dtype(GRAPHICS_LAYOUT)
+STATIC_DTYPE = layout_dtype(STATIC_LAYOUT)
+
+
+def decode_pages(pages: Pages, dtype: np.dtype) -> np.ndarray:
+    """
+    Map N raw pages onto a structured array without copying them when
+    pages is a single contiguous buffer.
+
+    Parameters:
+    pages: concatenated pages or an iterable of pages
+    dtype: PHYSICS_DTYPE, GRAPHICS_DTYPE or STATIC_DTYPE
+
+    Return:
+    result: structured array of shape (N,)
+    """
+
+    if not isinstance(pages, (bytes, bytearray, memoryview)):
+        pages = b"".join(pages)
+
+    if len(pages) % dtype.itemsize:
+        raise ValueError(f"Buffer size isn't a multiple of the"
+                         f" {dtype.itemsize} bytes page size")
+
+    return np.frombuffer(pages, dtype=dtype)
+
+
+def read_physics_batch(pages: Pages) -> np.ndarray:
+    return decode_pages(pages, PHYSICS_DTYPE)
+
+
+def read_graphics_batch(pages: Pages) -> np.ndarray:
+    return decode_pages(pages, GRAPHICS_DTYPE)
+
+
+def read_static_batch(pages: Pages) -> np.ndarray:
+    return decode_pages(pages, STATIC_DTYPE)
+
+
+def to_columns(batch: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Split a structured array into one array per field.
+    """
+
+    return {name: batch[name] for name in batch.dtype.names}
+
+
+def read_session_batch(path: str, max_frames: Optional[int] = None
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode a recorded session or archive, see pyacc_session.
+
+    Return:
+    result: (timestamps as int64, physics batch, graphics batch)
+    """
+
+    from pyacc_session import open_session
+
+    timestamps = []
+    physics = []
+    graphics = []
+
+    with open_session(path) as reader:
+        for frame in reader:
+            if max_frames is not None and len(timestamps) >= max_frames:
+                break
+
+            timestamps.append(frame.timestamp)
+            physics.append(frame.physics)
+            graphics.append(frame.graphics)
+
+    return (np.array(timestamps, dtype=np.int64),
+            read_physics_batch(physics), read_graphics_batch(graphics))
+
+
+def decode_enum(values: np.ndarray, enum: Type[Enum],
+                default: Optional[Enum] = None) -> np.ndarray:
+    """
+    Convert a column of raw enum values with a lookup table.
+
+    Parameters:
+    values: integer array of any shape
+    enum: enum type, e.g. ACC_STATUS
+    default: member used for unknown values, by default the one of
+    ENUM_DEFAULTS like read_graphics_map, None for the other enums
+
+    Return:
+    result: object array of enum members (default for unknown values)
+    """
+
+    if default is None:
+        default = ENUM_DEFAULTS.get(enum)
+
+    known = [member.value for member in enum]
+    low = min(known)
+    table = np.full(max(known) - low + 2, default, dtype=object)
+    for member in enum:
+        table[member.value - low] = member
+
+    index = np.asarray(values, dtype=np.int64) - low
+    # Out of range values point to the trailing default slot
+    index[(index < 0) | (index >= len(table) - 1)] = len(table) - 1
+    return table[index]
+
+
+def decode_strings(values: np.ndarray) -> np.ndarray:
+    """
+    Convert a column of raw UTF-16 strings, trailing null characters are
+    dropped.
+
+    Return:
+    result: unicode array of the same shape
+    """
+
+    values = np.ascontiguousarray(values)
+    length = values.dtype.itemsize // 2
+    units = values.view("<u2").reshape(values.shape + (length,))
+
+    # Code units of the basic multilingual plane map 1:1 to UCS-4
+    return units.astype("<u4").view(f"<U{length}")[..., 0]
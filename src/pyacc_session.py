@@ -0,0 +1,522 @@
+"""
+Record the raw shared memory pages of a session to a binary file or a
+compressed archive and replay it through the accSharedMemory interface.
+
+File layout, native byte order:
+header: magic b"ACCSM", format version (uint8), physics, graphics and
+static page sizes (uint16), wall clock start time in ns (int64) and the
+raw sm_version of the first static page (30 bytes).
+records: kind (1 byte) and time.perf_counter_ns timestamp (int64)
+followed by the pages, b"S" for a static page, written once and again
+each time it changes, b"F" for a physics and a graphics page.
+
+Session archives share the same header with the magic b"ACCSZ", see
+SessionArchiveWriter for the block layout.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+import zlib
+from typing import BinaryIO, Iterator, NamedTuple, Optional, Tuple, Union
+
+from pyaccsharedmemory import (GRAPHICS_PAGE_SIZE, PHYSICS_PAGE_SIZE,
+                               STATIC_LAYOUT, STATIC_PAGE_SIZE, ACC_map,
+                               RawPages, SharedMemoryPoller,
+                               SharedMemoryTimeout, accSharedMemory,
+                               xor_pages)
+
+MAGIC = b"ACCSM"
+ARCHIVE_MAGIC = b"ACCSZ"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("=5sBHHHq30s")
+_RECORD = struct.Struct("=cq")
+
+_BLOCK = struct.Struct("=II")
+_TIMESTAMP = struct.Struct("=q")
+_FRAME_SIZE = _TIMESTAMP.size + PHYSICS_PAGE_SIZE + GRAPHICS_PAGE_SIZE
+
+STATIC_RECORD = b"S"
+FRAME_RECORD = b"F"
+
+_SM_VERSION = STATIC_LAYOUT.fields["smVersion"]
+
+
+def _pack_header(magic: bytes, static: bytes) -> bytes:
+
+    sm_version = static[_SM_VERSION.offset:
+                        _SM_VERSION.offset + _SM_VERSION.size]
+    return _HEADER.pack(
+        magic, FORMAT_VERSION, PHYSICS_PAGE_SIZE, GRAPHICS_PAGE_SIZE,
+        STATIC_PAGE_SIZE, time.time_ns(), sm_version)
+
+
+def _read_header(file: BinaryIO, path: str, magic: bytes) -> Tuple[int, str]:
+    """
+    Check the header of a session file.
+
+    Return:
+    result: (wall clock start time in ns, sm_version)
+    """
+
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size or header[:len(magic)] != magic:
+        raise ValueError(f"{path} is not a session file")
+
+    (_, version, physics_size, graphics_size, static_size,
+     start_time, sm_version) = _HEADER.unpack(header)
+
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported session format version {version}")
+
+    if (physics_size, graphics_size, static_size) != (
+            PHYSICS_PAGE_SIZE, GRAPHICS_PAGE_SIZE, STATIC_PAGE_SIZE):
+        raise ValueError(f"{path} was recorded with a different shared"
+                         " memory layout")
+
+    return start_time, sm_version.decode("utf-16", errors="ignore")
+
+
+class RecordedFrame(NamedTuple):
+
+    # time.perf_counter_ns() when the frame was recorded
+    timestamp: int
+    physics: bytes
+    graphics: bytes
+    static: bytes
+
+
+class SessionRecorder:
+    """
+    Append raw pages to a session file.
+
+    Writes go through a large write buffer, the file is flushed and
+    fsynced every fsync_interval seconds instead of on every frame.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20,
+                 fsync_interval: float = 5.0) -> None:
+
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.frames = 0
+
+        self._file: BinaryIO = open(path, "wb", buffering=buffer_size)
+        self._static: Optional[bytes] = None
+        self._last_sync = time.monotonic()
+
+    def write(self, pages: RawPages, timestamp: Optional[int] = None
+              ) -> None:
+        """
+        Append a frame, the static page is only written when it changed.
+
+        Parameters:
+        pages: raw pages, see accSharedMemory.read_raw_pages
+        timestamp: time.perf_counter_ns() of the frame, now if None
+        """
+
+        if timestamp is None:
+            timestamp = time.perf_counter_ns()
+
+        if self._static is None:
+            self._file.write(_pack_header(MAGIC, pages.static))
+
+        if pages.static != self._static:
+            self._file.write(_RECORD.pack(STATIC_RECORD, timestamp))
+            self._file.write(pages.static)
+            self._static = pages.static
+
+        self._file.write(_RECORD.pack(FRAME_RECORD, timestamp))
+        self._file.write(pages.physics)
+        self._file.write(pages.graphics)
+        self.frames += 1
+
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def record(self, asm: accSharedMemory, duration: Optional[float] = None,
+               rate: float = 333.0, timeout: Optional[float] = None) -> None:
+        """
+        Record every new frame of asm.
+
+        Parameters:
+        duration: seconds to record, forever if None. The recording
+        stops at the end of duration even if no frame comes
+        rate: poll rate in Hz
+        timeout: stop recording when no frame came for timeout seconds
+        """
+
+        poller = SharedMemoryPoller(asm, rate, read=asm.read_raw_pages)
+        end = None if duration is None else time.monotonic() + duration
+
+        while True:
+            wait = timeout
+            if end is not None:
+                # Don't wait for a frame past the end of the recording
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return
+
+                if timeout is None or remaining < timeout:
+                    wait = remaining
+
+            try:
+                self.write(poller.poll(wait))
+
+            except SharedMemoryTimeout:
+                if wait == timeout:
+                    return
+
+    def close(self) -> None:
+
+        if self._file.closed:
+            return
+
+        self.sync()
+        self._file.close()
+
+    def __enter__(self) -> SessionRecorder:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class SessionReader:
+    """
+    Read back a session file written by SessionRecorder.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20) -> None:
+
+        self.path = path
+        self._file: BinaryIO = open(path, "rb", buffering=buffer_size)
+        self.start_time, self.sm_version = _read_header(
+            self._file, path, MAGIC)
+
+    def __iter__(self) -> Iterator[RecordedFrame]:
+
+        self._file.seek(_HEADER.size)
+        read = self._file.read
+        static = b""
+
+        while True:
+            record = read(_RECORD.size)
+            if len(record) < _RECORD.size:
+                return
+
+            kind, timestamp = _RECORD.unpack(record)
+
+            if kind == STATIC_RECORD:
+                static = read(STATIC_PAGE_SIZE)
+                if len(static) < STATIC_PAGE_SIZE:
+                    return
+
+            elif kind == FRAME_RECORD:
+                physics = read(PHYSICS_PAGE_SIZE)
+                graphics = read(GRAPHICS_PAGE_SIZE)
+                if len(graphics) < GRAPHICS_PAGE_SIZE:
+                    # Truncated by a crash during recording
+                    return
+
+                yield RecordedFrame(timestamp, physics, graphics, static)
+
+            else:
+                raise ValueError(f"Corrupted record in {self.path}")
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> SessionReader:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class SessionArchiveWriter:
+    """
+    Write a session as compressed blocks of delta encoded frames.
+
+    Each block starts with the static page and a keyframe, the next
+    frames only store the XOR of their pages with the previous ones.
+    Before compression the frames of a block are transposed byte by
+    byte, so the long runs of zeros left by the unchanged fields of
+    consecutive frames end up next to each other.
+
+    Block layout: compressed size and frame count (uint32), then the
+    zlib compressed static page followed by the transposed frames, each
+    frame being the timestamp delta (int64), the physics and graphics
+    page deltas.
+    """
+
+    def __init__(self, path: str, block_frames: int = 256,
+                 level: int = 6) -> None:
+
+        if block_frames <= 0:
+            raise ValueError("block_frames must be strictly positive")
+
+        self.path = path
+        self.block_frames = block_frames
+        self.level = level
+        self.frames = 0
+
+        self._file: BinaryIO = open(path, "wb")
+        self._static: Optional[bytes] = None
+        self._block = bytearray()
+        self._count = 0
+        self._timestamp = 0
+        self._physics = bytes(PHYSICS_PAGE_SIZE)
+        self._graphics = bytes(GRAPHICS_PAGE_SIZE)
+
+    def write(self, pages: RawPages, timestamp: Optional[int] = None
+              ) -> None:
+        """
+        Append a frame, see SessionRecorder.write.
+        """
+
+        if timestamp is None:
+            timestamp = time.perf_counter_ns()
+
+        if self._static is None:
+            self._file.write(_pack_header(ARCHIVE_MAGIC, pages.static))
+
+        if pages.static != self._static:
+            # The static page is only stored at the start of a block
+            self.flush()
+            self._static = pages.static
+
+        if self._count == 0:
+            self._timestamp = 0
+            self._physics = bytes(PHYSICS_PAGE_SIZE)
+            self._graphics = bytes(GRAPHICS_PAGE_SIZE)
+
+        block = self._block
+        block += _TIMESTAMP.pack(timestamp - self._timestamp)
+        block += xor_pages(pages.physics, self._physics)
+        block += xor_pages(pages.graphics, self._graphics)
+
+        self._timestamp = timestamp
+        self._physics = pages.physics
+        self._graphics = pages.graphics
+        self._count += 1
+        self.frames += 1
+
+        if self._count == self.block_frames:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Compress and write the pending frames as a block.
+        """
+
+        if self._count == 0:
+            return
+
+        block = bytes(self._block)
+        transposed = b"".join(
+            block[i::_FRAME_SIZE] for i in range(_FRAME_SIZE))
+        payload = zlib.compress(self._static + transposed, self.level)
+
+        self._file.write(_BLOCK.pack(len(payload), self._count))
+        self._file.write(payload)
+
+        self._block = bytearray()
+        self._count = 0
+
+    def close(self) -> None:
+
+        if self._file.closed:
+            return
+
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> SessionArchiveWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class SessionArchiveReader:
+    """
+    Read back a session archive written by SessionArchiveWriter.
+    """
+
+    def __init__(self, path: str) -> None:
+
+        self.path = path
+        self._file: BinaryIO = open(path, "rb")
+        self.start_time, self.sm_version = _read_header(
+            self._file, path, ARCHIVE_MAGIC)
+
+    def __iter__(self) -> Iterator[RecordedFrame]:
+
+        self._file.seek(_HEADER.size)
+        read = self._file.read
+
+        while True:
+            header = read(_BLOCK.size)
+            if len(header) < _BLOCK.size:
+                return
+
+            size, count = _BLOCK.unpack(header)
+            payload = read(size)
+            if len(payload) < size:
+                # Truncated by a crash during recording
+                return
+
+            data = zlib.decompress(payload)
+            static = data[:STATIC_PAGE_SIZE]
+            transposed = memoryview(data)[STATIC_PAGE_SIZE:]
+
+            block = bytearray(count * _FRAME_SIZE)
+            for i in range(_FRAME_SIZE):
+                block[i::_FRAME_SIZE] = transposed[i * count:(i + 1) * count]
+
+            timestamp = 0
+            physics = bytes(PHYSICS_PAGE_SIZE)
+            graphics = bytes(GRAPHICS_PAGE_SIZE)
+
+            for start in range(0, len(block), _FRAME_SIZE):
+                end = start + _TIMESTAMP.size
+                timestamp += _TIMESTAMP.unpack_from(block, start)[0]
+                physics = xor_pages(block[end:end + PHYSICS_PAGE_SIZE],
+                                    physics)
+                end += PHYSICS_PAGE_SIZE
+                graphics = xor_pages(block[end:end + GRAPHICS_PAGE_SIZE],
+                                     graphics)
+
+                yield RecordedFrame(timestamp, physics, graphics, static)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> SessionArchiveReader:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def open_session(path: str) -> Union[SessionReader, SessionArchiveReader]:
+    """
+    Open a session file or a session archive.
+    """
+
+    with open(path, "rb") as file:
+        magic = file.read(len(ARCHIVE_MAGIC))
+
+    if magic == ARCHIVE_MAGIC:
+        return SessionArchiveReader(path)
+
+    return SessionReader(path)
+
+
+def compress_session(source: str, destination: str,
+                     block_frames: int = 256, level: int = 6) -> None:
+    """
+    Convert a session file into a session archive.
+    """
+
+    with SessionReader(source) as reader, SessionArchiveWriter(
+            destination, block_frames, level) as writer:
+        for frame in reader:
+            writer.write(RawPages(frame.physics, frame.graphics,
+                                  frame.static), frame.timestamp)
+
+
+class ReplaySharedMemory(accSharedMemory):
+    """
+    Serve a recorded session through the accSharedMemory interface.
+
+    path can be a session file or a session archive, speed is the
+    replay speed relative to the recording, 1.0 for real
+    time, 10.0 for 10 times faster and None to replay as fast as
+    possible: each read then moves to the next recorded frame.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0,
+                 consistent: bool = False, max_retries: int = 3) -> None:
+
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be strictly positive or None")
+
+        super().__init__(consistent, max_retries,
+                         physic_map=bytearray(PHYSICS_PAGE_SIZE),
+                         graphic_map=bytearray(GRAPHICS_PAGE_SIZE),
+                         static_map=bytearray(STATIC_PAGE_SIZE))
+
+        self.speed = speed
+        self.reader = open_session(path)
+        self.replayed = 0
+
+        self._frames = iter(self.reader)
+        self._next: Optional[RecordedFrame] = next(self._frames, None)
+        self._static: Optional[bytes] = None
+        self._first_timestamp = 0
+        self._start: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self._next is None
+
+    def _load(self, frame: RecordedFrame) -> None:
+
+        self.physicSM[:] = frame.physics
+        self.graphicSM[:] = frame.graphics
+        if frame.static is not self._static:
+            self.staticSM[:] = frame.static
+            self._static = frame.static
+
+        self.replayed += 1
+
+    def _advance(self) -> None:
+
+        if self._next is None:
+            return
+
+        if self.speed is None:
+            self._load(self._next)
+            self._next = next(self._frames, None)
+            return
+
+        if self._start is None:
+            self._start = time.perf_counter()
+            self._first_timestamp = self._next.timestamp
+
+        elapsed = (time.perf_counter() - self._start) * self.speed * 1e9
+        due = self._first_timestamp + elapsed
+
+        # Like a live reader, frames older than the latest due one are missed
+        frame = None
+        while self._next is not None and self._next.timestamp <= due:
+            frame = self._next
+            self._next = next(self._frames, None)
+
+        if frame is not None:
+            self._load(frame)
+
+    def _is_new_frame(self) -> bool:
+        self._advance()
+        return super()._is_new_frame()
+
+    def get_shared_memory_data(self, timeout: float = 1.0,
+                               rate: float = 333.0) -> ACC_map:
+
+        if self.finished:
+            raise SharedMemoryTimeout("End of the recorded session")
+
+        return super().get_shared_memory_data(timeout, rate)
+
+    def close(self) -> None:
+        self.reader.close()
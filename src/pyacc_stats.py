@@ -0,0 +1,301 @@
+"""
+Rolling window statistics of telemetry channels.
+
+RollingStats keeps the mean, standard deviation, min and max of a
+vector of values over the last window seconds. Values are stored in a
+ring buffer, the sums are updated when a value enters or leaves the
+window and min and max come from monotonic deques, so an update costs
+O(1) amortized whatever the window size. Windows are based on the
+frame timestamps, dropped frames don't stretch them.
+
+ChannelStats feeds a RollingStats per PhysicsMap or GraphicsMap
+attribute from the frames of accSharedMemory.
+"""
+
+from __future__ import annotations
+
+import array
+import collections
+import math
+import time
+from typing import (Any, Deque, Dict, List, NamedTuple, Optional, Sequence,
+                    Tuple)
+
+from pyaccsharedmemory import ACC_map, channel_type, numeric_channels
+
+
+class WindowStats(NamedTuple):
+    """
+    Statistics of the values in the window, one per element of the
+    vector (a float or a Wheels, Vector3f... for ChannelStats).
+    """
+
+    count: int
+    mean: Any
+    std: Any
+    min: Any
+    max: Any
+    # Newest minus oldest value, e.g. the fuel used over the window
+    change: Any
+
+
+class RollingStats:
+    """
+    Mean, standard deviation, min and max over a time window of a
+    vector of width values.
+    """
+
+    def __init__(self, window: float, width: int = 1,
+                 capacity: int = 1024) -> None:
+        """
+        Parameters:
+        window: window length, in the unit of the update timestamps
+        width: number of values of each update, 4 for Wheels
+        capacity: initial number of updates the ring buffer can hold,
+        it grows when the window holds more
+        """
+
+        if window <= 0:
+            raise ValueError("window must be strictly positive")
+
+        if width <= 0 or capacity <= 0:
+            raise ValueError("width and capacity must be strictly positive")
+
+        self.window = window
+        self.width = width
+
+        self._capacity = capacity
+        self._times = array.array("d", bytes(8 * capacity))
+        self._values = array.array("d", bytes(8 * capacity * width))
+        # Number of updates ever written and removed, the slot of an
+        # update is its number modulo capacity.
+        self._head = 0
+        self._tail = 0
+
+        # Sums of the values relative to the first value, which keeps
+        # the variance accurate when the values are far from zero
+        self._offset: Optional[List[float]] = None
+        self._sums = [0.0] * width
+        self._squares = [0.0] * width
+
+        # (update number, value) with increasing values for min and
+        # decreasing values for max
+        self._min: List[Deque[tuple]] = [
+            collections.deque() for _ in range(width)]
+        self._max: List[Deque[tuple]] = [
+            collections.deque() for _ in range(width)]
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def _grow(self) -> None:
+
+        capacity = self._capacity
+        width = self.width
+        times = array.array("d", bytes(16 * capacity))
+        values = array.array("d", bytes(16 * capacity * width))
+
+        for number in range(self._tail, self._head):
+            old = number % capacity
+            new = number % (2 * capacity)
+            times[new] = self._times[old]
+            values[new * width:(new + 1) * width] = (
+                self._values[old * width:(old + 1) * width])
+
+        self._capacity = 2 * capacity
+        self._times = times
+        self._values = values
+
+    def update(self, timestamp: float, values: Sequence[float]) -> None:
+        """
+        Add a vector of values and drop the ones older than the window.
+        """
+
+        if len(values) != self.width:
+            raise ValueError(f"Expected {self.width} values")
+
+        if self._head - self._tail == self._capacity:
+            self._grow()
+
+        if self._offset is None:
+            self._offset = list(values)
+
+        number = self._head
+        slot = number % self._capacity
+        self._times[slot] = timestamp
+        self._values[slot * self.width:(slot + 1) * self.width] = (
+            array.array("d", values))
+
+        for i, value in enumerate(values):
+            delta = value - self._offset[i]
+            self._sums[i] += delta
+            self._squares[i] += delta * delta
+
+            lowest = self._min[i]
+            while lowest and lowest[-1][1] >= value:
+                lowest.pop()
+            lowest.append((number, value))
+
+            highest = self._max[i]
+            while highest and highest[-1][1] <= value:
+                highest.pop()
+            highest.append((number, value))
+
+        self._head += 1
+        self.expire(timestamp)
+
+    def expire(self, now: float) -> None:
+        """
+        Drop the values older than the window, done by update but can
+        be called when no update comes.
+        """
+
+        limit = now - self.window
+        width = self.width
+
+        while self._tail < self._head:
+            slot = self._tail % self._capacity
+            if self._times[slot] >= limit:
+                break
+
+            for i in range(width):
+                delta = self._values[slot * width + i] - self._offset[i]
+                self._sums[i] -= delta
+                self._squares[i] -= delta * delta
+
+            self._tail += 1
+
+        if self._tail == self._head:
+            # Start again from exact sums
+            self._offset = None
+            self._sums = [0.0] * width
+            self._squares = [0.0] * width
+
+        for deques in (self._min, self._max):
+            for values in deques:
+                while values and values[0][0] < self._tail:
+                    values.popleft()
+
+    def stats(self) -> WindowStats:
+        """
+        Statistics of the window, NaN for every value when it's empty.
+        """
+
+        count = len(self)
+        if count == 0:
+            empty = (math.nan,) * self.width
+            return WindowStats(0, empty, empty, empty, empty, empty)
+
+        mean = []
+        std = []
+        for offset, total, squares in zip(self._offset, self._sums,
+                                          self._squares):
+            average = total / count
+            mean.append(offset + average)
+            std.append(math.sqrt(max(squares / count - average * average,
+                                     0.0)))
+
+        width = self.width
+        oldest = self._tail % self._capacity
+        newest = (self._head - 1) % self._capacity
+        change = tuple(
+            self._values[newest * width + i] - self._values[oldest * width + i]
+            for i in range(width))
+
+        return WindowStats(count, tuple(mean), tuple(std),
+                           tuple(values[0][1] for values in self._min),
+                           tuple(values[0][1] for values in self._max),
+                           change)
+
+
+class ChannelStats:
+    """
+    Rolling statistics of PhysicsMap and GraphicsMap attributes.
+
+    Composite attributes like tyre_core_temp are updated as one vector
+    and their statistics are returned as the same type, e.g. Wheels.
+    """
+
+    def __init__(self, channels: Sequence[str], window: float = 60.0
+                 ) -> None:
+        """
+        Parameters:
+        channels: numeric attributes, as "<Page>.<attribute>"
+        window: window length in seconds
+        """
+
+        self.window = window
+        self.windows: Dict[str, RollingStats] = {}
+        self._plan: List[Tuple[str, str, str, Tuple[str, ...]]] = []
+        self._types: Dict[str, type] = {}
+
+        for path in channels:
+            if path in self.windows:
+                raise ValueError(f"Duplicated channel: {path}")
+
+            path_channels = numeric_channels(path)
+            page, attribute = path_channels[0][:2]
+            # Elements of a composite value, empty for a number
+            elements = tuple(element for _, _, element, _ in path_channels
+                             if element is not None)
+
+            if elements:
+                self._types[path] = channel_type(path)
+
+            self.windows[path] = RollingStats(window, len(path_channels))
+            self._plan.append((path, page, attribute, elements))
+
+    def update(self, frame: ACC_map, timestamp: Optional[float] = None
+               ) -> None:
+        """
+        Add the values of a frame.
+
+        Parameters:
+        frame: ACC_map to read the channels from
+        timestamp: time of the frame in seconds, time.perf_counter()
+        by default
+        """
+
+        if timestamp is None:
+            timestamp = time.perf_counter()
+
+        for path, page, attribute, elements in self._plan:
+            value = getattr(getattr(frame, page), attribute)
+
+            if elements:
+                values = [getattr(value, element) for element in elements]
+
+            else:
+                values = (value,)
+
+            self.windows[path].update(timestamp, values)
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """
+        Drop the old values of every channel, for when no frame comes.
+        """
+
+        if now is None:
+            now = time.perf_counter()
+
+        for window in self.windows.values():
+            window.expire(now)
+
+    def stats(self, path: str) -> WindowStats:
+        """
+        Statistics of a channel, as floats or as the type of the
+        attribute for composite ones.
+        """
+
+        stats = self.windows[path].stats()
+        cls = self._types.get(path)
+
+        if cls is None:
+            return WindowStats(stats.count, *(values[0]
+                                              for values in stats[1:]))
+
+        return WindowStats(stats.count, *(cls(*values)
+                                          for values in stats[1:]))
+
+    def snapshot(self) -> Dict[str, WindowStats]:
+        return {path: self.stats(path) for path in self.windows}
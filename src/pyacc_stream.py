@@ -0,0 +1,368 @@
+"""
+Stream the frames read from ACC to other machines over UDP.
+
+A TelemetryStreamer sends every new frame as a single datagram, a
+TelemetryReceiver rebuilds the ACC_map on the other side and counts the
+lost datagrams.
+
+Frames are sent as a keyframe, the zlib compressed physics and graphics
+pages, every keyframe_interval frames and in between as the zlib
+compressed XOR of their pages with the last keyframe. A lost datagram
+only loses its own frame, or the frames up to the next keyframe when it
+was a keyframe. The static page is sent when it changes and repeated
+every static_interval keyframes for the receivers started late.
+
+Datagram layout, little endian:
+magic b"ACCU", format version (uint8), kind (1 byte, b"K" keyframe,
+b"D" delta, b"S" static page), random stream id drawn by each streamer
+(uint32), sequence (uint32), keyframe sequence of a delta or revision
+of the static page (uint32), time.perf_counter_ns timestamp of the
+sender (int64), physics and graphics packet ids (int32) followed by the
+compressed payload.
+"""
+
+from __future__ import annotations
+
+import random
+import socket
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+from pyaccsharedmemory import (GRAPHICS_PAGE_SIZE, PHYSICS_PAGE_SIZE,
+                               STATIC_PAGE_SIZE, ACC_map, RawPages,
+                               SharedMemoryPoller, SharedMemoryTimeout,
+                               StaticsMap, accSharedMemory,
+                               read_graphics_map, read_physic_map,
+                               read_static_map, xor_pages)
+
+MAGIC = b"ACCU"
+FORMAT_VERSION = 2
+DEFAULT_PORT = 9996
+
+_HEADER = struct.Struct("<4sBcIIIqii")
+_FRAMES_SIZE = PHYSICS_PAGE_SIZE + GRAPHICS_PAGE_SIZE
+
+KEYFRAME = b"K"
+DELTA = b"D"
+STATIC = b"S"
+
+_MAX_DATAGRAM = 65507
+
+# Size of the decompressed payload of each kind
+_PAYLOAD_SIZES = {
+    KEYFRAME: _FRAMES_SIZE,
+    DELTA: _FRAMES_SIZE,
+    STATIC: STATIC_PAGE_SIZE,
+}
+
+
+class TelemetryStreamer:
+    """
+    Read ACC and send every new frame to a TelemetryReceiver.
+    """
+
+    def __init__(self, asm: accSharedMemory,
+                 address: Tuple[str, int] = ("127.0.0.1", DEFAULT_PORT),
+                 rate: float = 333.0, keyframe_interval: int = 333,
+                 static_interval: int = 10, level: int = 1) -> None:
+        """
+        Parameters:
+        asm: accSharedMemory to read
+        address: (host, port) of the receiver, can be a broadcast address
+        rate: poll rate in Hz
+        keyframe_interval: frames between two keyframes
+        static_interval: keyframes between two repeats of the static page
+        level: zlib compression level
+        """
+
+        if keyframe_interval <= 0 or static_interval <= 0:
+            raise ValueError("intervals must be strictly positive")
+
+        self.asm = asm
+        self.address = address
+        self.keyframe_interval = keyframe_interval
+        self.static_interval = static_interval
+        self.level = level
+
+        self.frames = 0
+        self.bytes_sent = 0
+        # Tells the receivers a new stream started, the sequence starts
+        # again from 1
+        self.stream_id = random.getrandbits(32)
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+        self._poller = SharedMemoryPoller(asm, rate, read=asm.read_raw_pages)
+        self._sequence = 0
+        self._keyframe: Optional[bytes] = None
+        self._keyframe_sequence = 0
+        self._keyframes = 0
+        self._static: Optional[bytes] = None
+        self._static_revision = 0
+
+    def _send(self, kind: bytes, reference: int, timestamp: int,
+              physics_id: int, graphics_id: int, payload: bytes) -> None:
+
+        datagram = _HEADER.pack(MAGIC, FORMAT_VERSION, kind, self.stream_id,
+                                self._sequence, reference, timestamp,
+                                physics_id, graphics_id) + payload
+        self.sock.sendto(datagram, self.address)
+        self.bytes_sent += len(datagram)
+
+    def send(self, pages: RawPages, timestamp: Optional[int] = None
+             ) -> None:
+        """
+        Send a frame, and the static page before it when needed.
+        """
+
+        if timestamp is None:
+            timestamp = time.perf_counter_ns()
+
+        physics_id = struct.unpack_from("<i", pages.physics)[0]
+        graphics_id = struct.unpack_from("<i", pages.graphics)[0]
+        frame = pages.physics + pages.graphics
+        is_keyframe = self.frames % self.keyframe_interval == 0
+
+        if pages.static != self._static:
+            self._static = pages.static
+            self._static_revision += 1
+            self._send_static(timestamp, physics_id, graphics_id)
+
+        elif is_keyframe and self._keyframes % self.static_interval == 0:
+            self._send_static(timestamp, physics_id, graphics_id)
+
+        self._sequence += 1
+
+        if is_keyframe:
+            self._keyframe = frame
+            self._keyframe_sequence = self._sequence
+            self._keyframes += 1
+            self._send(KEYFRAME, self._sequence, timestamp, physics_id,
+                       graphics_id, zlib.compress(frame, self.level))
+
+        else:
+            delta = xor_pages(frame, self._keyframe)
+            self._send(DELTA, self._keyframe_sequence, timestamp,
+                       physics_id, graphics_id,
+                       zlib.compress(delta, self.level))
+
+        self.frames += 1
+
+    def _send_static(self, timestamp: int, physics_id: int,
+                     graphics_id: int) -> None:
+
+        self._send(STATIC, self._static_revision, timestamp, physics_id,
+                   graphics_id, zlib.compress(self._static, self.level))
+
+    def publish(self) -> bool:
+        """
+        Poll ACC once and send the frame if it's a new one.
+
+        Return:
+        result: True if a frame was sent
+        """
+
+        pages = self._poller.read()
+        if pages is None:
+            return False
+
+        self.send(pages)
+        return True
+
+    def run(self, timeout: Optional[float] = None) -> None:
+        """
+        Send frames forever at the poller rate, raise SharedMemoryTimeout
+        if no frame came for timeout seconds.
+        """
+
+        while True:
+            self.send(self._poller.poll(timeout))
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+@dataclass
+class StreamStats:
+
+    # Frames rebuilt
+    received: int
+    # Frames never received, from the gaps in the sequence
+    lost: int
+    # Frames received but not rebuilt, their keyframe or the static page
+    # was lost
+    undecodable: int
+    # Datagrams older than the last one, dropped
+    out_of_order: int
+    # Datagrams of another format or version, or corrupted
+    rejected: int
+    # Streams received after the first one, a streamer started again
+    restarts: int
+
+    @property
+    def loss_rate(self) -> float:
+        total = self.received + self.lost + self.undecodable
+        return (self.lost + self.undecodable) / total if total else 0.0
+
+
+class TelemetryReceiver:
+    """
+    Receive the frames sent by a TelemetryStreamer.
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT,
+                 buffer_size: int = 1 << 20) -> None:
+        """
+        Parameters:
+        host, port: address to listen on
+        buffer_size: socket receive buffer size in bytes
+        """
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                             buffer_size)
+        self.sock.bind((host, port))
+
+        self.stats = StreamStats(0, 0, 0, 0, 0, 0)
+
+        self._stream_id: Optional[int] = None
+        self._sequence = 0
+        self._keyframe: Optional[bytes] = None
+        self._keyframe_sequence = 0
+        self._static: Optional[bytes] = None
+        self._statics: Optional[StaticsMap] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.sock.getsockname()
+
+    def _decode(self, datagram: bytes) -> Optional[RawPages]:
+
+        if len(datagram) < _HEADER.size:
+            self.stats.rejected += 1
+            return None
+
+        (magic, version, kind, stream_id, sequence,
+         reference) = _HEADER.unpack_from(datagram)[:6]
+
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.stats.rejected += 1
+            return None
+
+        # Datagrams come from the network, never trust the payload and
+        # don't decompress more than the expected size
+        size = _PAYLOAD_SIZES.get(kind)
+        if size is None:
+            self.stats.rejected += 1
+            return None
+
+        decompressor = zlib.decompressobj()
+        try:
+            payload = decompressor.decompress(datagram[_HEADER.size:],
+                                              size + 1)
+
+        except zlib.error:
+            self.stats.rejected += 1
+            return None
+
+        if len(payload) != size or not decompressor.eof:
+            self.stats.rejected += 1
+            return None
+
+        if stream_id != self._stream_id:
+            # New streamer, nothing of the previous stream applies
+            if self._stream_id is not None:
+                self.stats.restarts += 1
+            self._stream_id = stream_id
+            self._sequence = 0
+            self._keyframe = None
+            self._keyframe_sequence = 0
+            self._static = None
+            self._statics = None
+
+        if kind == STATIC:
+            static = payload
+            if static != self._static:
+                self._static = static
+                self._statics = None
+            return None
+
+        if sequence <= self._sequence:
+            self.stats.out_of_order += 1
+            return None
+
+        if self._sequence:
+            self.stats.lost += sequence - self._sequence - 1
+        self._sequence = sequence
+
+        if kind == KEYFRAME:
+            self._keyframe = payload
+            self._keyframe_sequence = sequence
+            frame = self._keyframe
+
+        elif kind == DELTA and reference == self._keyframe_sequence:
+            frame = xor_pages(payload, self._keyframe)
+
+        else:
+            self.stats.undecodable += 1
+            return None
+
+        if self._static is None:
+            self.stats.undecodable += 1
+            return None
+
+        self.stats.received += 1
+        return RawPages(frame[:PHYSICS_PAGE_SIZE],
+                        frame[PHYSICS_PAGE_SIZE:_FRAMES_SIZE], self._static)
+
+    def receive_pages(self, timeout: Optional[float] = None
+                      ) -> Optional[RawPages]:
+        """
+        Wait for the next frame.
+
+        Parameters:
+        timeout: seconds to wait before raising SharedMemoryTimeout,
+        wait forever if None
+
+        Return:
+        result: RawPages of the frame or None when a datagram was
+        received without a new frame (static page, loss, ...)
+        """
+
+        self.sock.settimeout(timeout)
+        try:
+            datagram = self.sock.recv(_MAX_DATAGRAM)
+
+        except socket.timeout:
+            raise SharedMemoryTimeout("No data received")
+
+        return self._decode(datagram)
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[ACC_map]:
+        """
+        Same as receive_pages but decode the pages.
+        """
+
+        pages = self.receive_pages(timeout)
+        if pages is None:
+            return None
+
+        if self._statics is None:
+            self._statics = read_static_map(pages.static)
+
+        return ACC_map(read_physic_map(pages.physics),
+                       read_graphics_map(pages.graphics), self._statics)
+
+    def __iter__(self) -> Iterator[ACC_map]:
+
+        while True:
+            frame = self.receive()
+            if frame is not None:
+                yield frame
+
+    def close(self) -> None:
+        self.sock.close()
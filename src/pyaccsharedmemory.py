@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-import copy
+import array
+import asyncio
+import bisect
+import functools
+import json
+import math
 import mmap
+import os
 import struct
-from dataclasses import dataclass
+import sys
+import threading
+import time
+from collections import namedtuple
+from dataclasses import asdict, dataclass, fields, is_dataclass
 from enum import Enum
-from typing import Any, List, Optional
+from typing import (Any, AsyncIterator, Callable, Dict, Iterator, List,
+                    NamedTuple, Optional, Sequence, Tuple, get_type_hints)
 
 
 class SharedMemoryTimeout(Exception):
@@ -34,38 +45,20 @@ class ACC_SESSION_TYPE(Enum):
     ACC_HOTLAPSUPERPOLE = 8
 
     def __str__(self) -> str:
+        return _SESSION_TYPE_NAMES.get(self, "Unknow")
 
-        if self == ACC_SESSION_TYPE.ACC_PRACTICE:
-            string = "Practice"
 
-        elif self == ACC_SESSION_TYPE.ACC_QUALIFY:
-            string = "Qualify"
-
-        elif self == ACC_SESSION_TYPE.ACC_RACE:
-            string = "Race"
-
-        elif self == ACC_SESSION_TYPE.ACC_HOTLAP:
-            string = "Hotlap"
-
-        elif self == ACC_SESSION_TYPE.ACC_TIME_ATTACK:
-            string = "Time_Attack"
-
-        elif self == ACC_SESSION_TYPE.ACC_DRIFT:
-            string = "Drift"
-
-        elif self == ACC_SESSION_TYPE.ACC_DRAG:
-            string = "Drag"
-
-        elif self == ACC_SESSION_TYPE.ACC_HOTSTINT:
-            string = "Hotstint"
-
-        elif self == ACC_SESSION_TYPE.ACC_HOTLAPSUPERPOLE:
-            string = "Superpole"
-
-        else:
-            string = "Unknow"
-
-        return string
+_SESSION_TYPE_NAMES = {
+    ACC_SESSION_TYPE.ACC_PRACTICE: "Practice",
+    ACC_SESSION_TYPE.ACC_QUALIFY: "Qualify",
+    ACC_SESSION_TYPE.ACC_RACE: "Race",
+    ACC_SESSION_TYPE.ACC_HOTLAP: "Hotlap",
+    ACC_SESSION_TYPE.ACC_TIME_ATTACK: "Time_Attack",
+    ACC_SESSION_TYPE.ACC_DRIFT: "Drift",
+    ACC_SESSION_TYPE.ACC_DRAG: "Drag",
+    ACC_SESSION_TYPE.ACC_HOTSTINT: "Hotstint",
+    ACC_SESSION_TYPE.ACC_HOTLAPSUPERPOLE: "Superpole",
+}
 
 
 class ACC_FLAG_TYPE(Enum):
@@ -131,29 +124,18 @@ class ACC_TRACK_GRIP_STATUS(Enum):
     ACC_FLOODED = 6
 
     def __str__(self) -> str:
+        return _TRACK_GRIP_NAMES[self]
 
-        if self == ACC_TRACK_GRIP_STATUS.ACC_GREEN:
-            string = "Green"
-
-        elif self == ACC_TRACK_GRIP_STATUS.ACC_FAST:
-            string = "Fast"
-
-        elif self == ACC_TRACK_GRIP_STATUS.ACC_OPTIMUM:
-            string = "Optimum"
-
-        elif self == ACC_TRACK_GRIP_STATUS.ACC_GREASY:
-            string = "Greasy"
-
-        elif self == ACC_TRACK_GRIP_STATUS.ACC_DAMP:
-            string = "Damp"
-
-        elif self == ACC_TRACK_GRIP_STATUS.ACC_WET:
-            string = "Wet"
-
-        elif self == ACC_TRACK_GRIP_STATUS.ACC_FLOODED:
-            string = "Flooded"
 
-        return string
+_TRACK_GRIP_NAMES = {
+    ACC_TRACK_GRIP_STATUS.ACC_GREEN: "Green",
+    ACC_TRACK_GRIP_STATUS.ACC_FAST: "Fast",
+    ACC_TRACK_GRIP_STATUS.ACC_OPTIMUM: "Optimum",
+    ACC_TRACK_GRIP_STATUS.ACC_GREASY: "Greasy",
+    ACC_TRACK_GRIP_STATUS.ACC_DAMP: "Damp",
+    ACC_TRACK_GRIP_STATUS.ACC_WET: "Wet",
+    ACC_TRACK_GRIP_STATUS.ACC_FLOODED: "Flooded",
+}
 
 
 class ACC_RAIN_INTENSITY(Enum):
@@ -166,30 +148,23 @@ class ACC_RAIN_INTENSITY(Enum):
     ACC_THUNDERSTORM = 5
 
     def __str__(self) -> str:
+        return _RAIN_INTENSITY_NAMES[self]
 
-        if self == ACC_RAIN_INTENSITY.ACC_NO_RAIN:
-            string = "No Rain"
 
-        elif self == ACC_RAIN_INTENSITY.ACC_DRIZZLE:
-            string = "Drizzle"
-
-        elif self == ACC_RAIN_INTENSITY.ACC_LIGHT_RAIN:
-            string = "Light Rain"
-
-        elif self == ACC_RAIN_INTENSITY.ACC_MEDIUM_RAIN:
-            string = "Medium Rain"
-
-        elif self == ACC_RAIN_INTENSITY.ACC_HEAVY_RAIN:
-            string = "Heavy rain"
-
-        elif self == ACC_RAIN_INTENSITY.ACC_THUNDERSTORM:
-            string = "Thunderstorm"
-
-        return string
+_RAIN_INTENSITY_NAMES = {
+    ACC_RAIN_INTENSITY.ACC_NO_RAIN: "No Rain",
+    ACC_RAIN_INTENSITY.ACC_DRIZZLE: "Drizzle",
+    ACC_RAIN_INTENSITY.ACC_LIGHT_RAIN: "Light Rain",
+    ACC_RAIN_INTENSITY.ACC_MEDIUM_RAIN: "Medium Rain",
+    ACC_RAIN_INTENSITY.ACC_HEAVY_RAIN: "Heavy rain",
+    ACC_RAIN_INTENSITY.ACC_THUNDERSTORM: "Thunderstorm",
+}
 
 
 @dataclass
 class Vector3f:
+    __slots__ = ("x", "y", "z")
+
     x: float
     y: float
     z: float
@@ -200,6 +175,8 @@ class Vector3f:
 
 @dataclass
 class Wheels:
+    __slots__ = ("front_left", "front_right", "rear_left", "rear_right")
+
     front_left: float
     front_right: float
     rear_left: float
@@ -212,6 +189,8 @@ class Wheels:
 
 @dataclass
 class ContactPoint:
+    __slots__ = ("front_left", "front_right", "rear_left", "rear_right")
+
     front_left: Vector3f
     front_right: Vector3f
     rear_left: Vector3f
@@ -233,6 +212,8 @@ class ContactPoint:
 
 @dataclass
 class CarDamage:
+    __slots__ = ("front", "rear", "left", "right", "center")
+
     front: float
     rear: float
     left: float
@@ -451,6 +432,12 @@ class ACC_map:
     Physics: PhysicsMap
     Graphics: GraphicsMap
     Static: StaticsMap
+    # Physics and graphics pages were copied without any packet id change,
+    # None when the read wasn't done in consistent mode.
+    in_sync: Optional[bool] = None
+    # Physics steps skipped since the previous frame, None when the read
+    # wasn't done with mark_skipped.
+    skipped: Optional[int] = None
 
 
 class accSM(mmap.mmap):
@@ -487,546 +474,2420 @@ class accSM(mmap.mmap):
         return string_bytes.decode("utf-16", errors="ignore")
 
 
-def read_physic_map(physic_map: accSM) -> PhysicsMap:
-    physic_map.seek(0)
-    temp = {
-        "packetID": physic_map.unpack_value("i"),
-
-        "gas": physic_map.unpack_value("f"),
-        "brake": physic_map.unpack_value("f"),
-        "fuel": physic_map.unpack_value("f"),
-        "gear": physic_map.unpack_value("i"),
-        "rpm": physic_map.unpack_value("i"),
-        "steerAngle": physic_map.unpack_value("f"),
-
-        "speedKmh": physic_map.unpack_value("f"),
-        "velocity": physic_map.unpack_array("f", 3),
-        "accG": physic_map.unpack_array("f", 3),
-
-        "wheelSlip": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "wheelLoad": physic_map.unpack_array("f", 4),
-        "wheelsPressure": physic_map.unpack_array("f", 4),
-        "wheelAngularSpeed": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "tyreWear": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "tyreDirtyLevel": physic_map.unpack_array("f", 4),
-        "tyreCoreTemperature": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "camberRAD": physic_map.unpack_array("f", 4),
-        "suspensionTravel": physic_map.unpack_array("f", 4),
-
-        # Field is not used by ACC
-        "drs": physic_map.unpack_value("i"),
-        "tc": physic_map.unpack_value("f"),
-        "headeing": physic_map.unpack_value("f"),
-        "pitch": physic_map.unpack_value("f"),
-        "roll": physic_map.unpack_value("f"),
-        # Field is not used by ACC
-        "cgHeight": physic_map.unpack_value("f"),
-        "carDamage": physic_map.unpack_array("f", 5),
-        # Field is not used by ACC
-        "numberOfTyresOut": physic_map.unpack_value("i"),
-        "pitLimiterOn": physic_map.unpack_value("i"),
-        "abs": physic_map.unpack_value("f"),
-
-        # Field is not used by ACC
-        "kersCharge": physic_map.unpack_value("f"),
-        # Field is not used by ACC
-        "kersInput": physic_map.unpack_value("f"),
-
-        "autoshifterOn": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "rideHeight": physic_map.unpack_array("f", 2),
-        "turboBoost": physic_map.unpack_value("f"),
-        # Not implemented in ACC
-        "ballast": physic_map.unpack_value("f"),
-        # Field is not used by ACC
-        "airDensity": physic_map.unpack_value("f"),
-        "airTemp": physic_map.unpack_value("f"),
-        "roadTemp": physic_map.unpack_value("f"),
-        "localAngularVel": physic_map.unpack_array("f", 3),
-        "FinalFF": physic_map.unpack_value("f"),
-        # Field is not used by ACC
-        "performanceMeter": physic_map.unpack_value("f"),
-
-        # Field is not used by ACC
-        "engineBrake": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "ersRecoveryLevel": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "ersPowerLevel": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "ersHeatCharging": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "ersIsCharging": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "kersCurrentKJ": physic_map.unpack_value("f"),
-
-        # Field is not used by ACC
-        "drsAvailable": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "drsEnabled": physic_map.unpack_value("i"),
-
-        "brakeTemp": physic_map.unpack_array("f", 4),
-        "clutch": physic_map.unpack_value("f"),
-
-        # Field is not used by ACC
-        "tyreTempI": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "tyreTempM": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "tyreTempO": physic_map.unpack_array("f", 4),
-
-        "isAIControlled": physic_map.unpack_value("i"),
-
-        "tyreContactPoint": physic_map.unpack_array2D("f", 4, 3),
-        "tyreContactNormal": physic_map.unpack_array2D("f", 4, 3),
-        "tyreContactHeading": physic_map.unpack_array2D("f", 4, 3),
-
-        "brakeBias": physic_map.unpack_value("f"),
-
-        "localVelocity": physic_map.unpack_array("f", 3),
-
-        # Field is not used by ACC
-        "P2PActivation": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "P2PStatus ": physic_map.unpack_value("i"),
-
-        # Field is not used by ACC
-        "currentMaxRpm": physic_map.unpack_value("i"),
-
-        # Field is not used by ACC
-        "mz": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "fz": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "my": physic_map.unpack_array("f", 4),
-        "slipRatio": physic_map.unpack_array("f", 4),
-        "slipAngle": physic_map.unpack_array("f", 4),
-
-        # Field is not used by ACC
-        "tcinAction": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "absinAction": physic_map.unpack_value("i"),
-        # Field is not used by ACC
-        "suspensionDamage": physic_map.unpack_array("f", 4),
-        # Field is not used by ACC
-        "tyreTemp": physic_map.unpack_array("f", 4),
-        "waterTemp": physic_map.unpack_value("f"),
-
-        "brakePressure": physic_map.unpack_array("f", 4),
-        "frontBrakeCompound": physic_map.unpack_value("i"),
-        "rearBrakeCompound": physic_map.unpack_value("i"),
-        "padLife": physic_map.unpack_array("f", 4),
-        "discLife": physic_map.unpack_array("f", 4),
-
-        "ignitionOn": physic_map.unpack_value("i"),
-        "starterEngineOn": physic_map.unpack_value("i"),
-        "isEngineRunning": physic_map.unpack_value("i"),
-
-        "kerbVibration": physic_map.unpack_value("f"),
-        "slipVibrations": physic_map.unpack_value("f"),
-        "gVibrations": physic_map.unpack_value("f"),
-        "absVibrations": physic_map.unpack_value("f"),
-    }
+class PageField(NamedTuple):
+    """
+    Location of a single documented field inside a shared memory page.
 
-    return PhysicsMap(
-        temp["packetID"],
-        temp["gas"],
-        temp["brake"],
-        temp["fuel"],
-        temp["gear"],
-        temp["rpm"],
-        temp["steerAngle"],
-        temp["speedKmh"],
-        Vector3f(*temp["velocity"]),
-        Vector3f(*temp["accG"]),
-        Wheels(*temp["wheelSlip"]),
-        Wheels(*temp["wheelsPressure"]),
-        Wheels(*temp["wheelAngularSpeed"]),
-        Wheels(*temp["tyreCoreTemperature"]),
-        Wheels(*temp["suspensionTravel"]),
-        temp["tc"],
-        temp["headeing"],
-        temp["pitch"],
-        temp["roll"],
-        CarDamage(*temp["carDamage"]),
-        bool(temp["pitLimiterOn"]),
-        temp["abs"],
-        bool(temp["autoshifterOn"]),
-        temp["turboBoost"],
-        temp["airTemp"],
-        temp["roadTemp"],
-        Vector3f(*temp["localAngularVel"]),
-        temp["FinalFF"],
-        Wheels(*temp["brakeTemp"]),
-        temp["clutch"],
-        bool(temp["isAIControlled"]),
-        ContactPoint.from_list(temp["tyreContactPoint"]),
-        ContactPoint.from_list(temp["tyreContactNormal"]),
-        ContactPoint.from_list(temp["tyreContactHeading"]),
-        temp["brakeBias"],
-        Vector3f(*temp["localVelocity"]),
-        Wheels(*temp["slipRatio"]),
-        Wheels(*temp["slipAngle"]),
-        Wheels(*temp["suspensionDamage"]),
-        temp["waterTemp"],
-        Wheels(*temp["brakePressure"]),
-        temp["frontBrakeCompound"],
-        temp["rearBrakeCompound"],
-        Wheels(*temp["padLife"]),
-        Wheels(*temp["discLife"]),
-        bool(temp["ignitionOn"]),
-        bool(temp["starterEngineOn"]),
-        bool(temp["isEngineRunning"]),
-        temp["kerbVibration"],
-        temp["slipVibrations"],
-        temp["gVibrations"],
-        temp["absVibrations"],
-    )
+    kind is the struct format character ("i", "f" or "s"), count the
+    number of values (or of bytes for strings) and index the position
+    of the first value in the tuple unpacked by the page layout.
+    """
 
+    name: str
+    kind: str
+    count: int
+    offset: int
+    index: int
+    packer: struct.Struct
 
-def read_graphics_map(graphic_map: accSM) -> GraphicsMap:
-    graphic_map.seek(0)
-    temp = {
-        "packetID": graphic_map.unpack_value("i"),
-        "acc_status": ACC_STATUS(graphic_map.unpack_value("i")),
-        "acc_session_type": ACC_SESSION_TYPE(graphic_map.unpack_value("i")),
-        "currentTime": graphic_map.unpack_string(15),
-        "lastTime": graphic_map.unpack_string(15),
-        "bestTime": graphic_map.unpack_string(15),
-        "split": graphic_map.unpack_string(15),
-        "completedLaps": graphic_map.unpack_value("i"),
-        "position": graphic_map.unpack_value("i"),
-        "iCurrentTime": graphic_map.unpack_value("i"),
-        "iLastTime": graphic_map.unpack_value("i"),
-        "iBestTime": graphic_map.unpack_value("i"),
-        "sessionTimeLeft": graphic_map.unpack_value("f"),
-        "distanceTraveled": graphic_map.unpack_value("f"),
-        "isInPit": graphic_map.unpack_value("i"),
-        "currentSectorIndex": graphic_map.unpack_value("i"),
-        "lastSectorTime": graphic_map.unpack_value("i"),
-        "numberOfLaps": graphic_map.unpack_value("i"),
-        "tyreCompound": graphic_map.unpack_string(33, padding=2),
-        # Field is not used by ACC
-        "replayTimeMultiplier": graphic_map.unpack_value("f"),
-        "normalizedCarPosition": graphic_map.unpack_value("f"),
-
-        "activeCars": graphic_map.unpack_value("i"),
-        "carCoordinates": graphic_map.unpack_array2D("f", 60, 3),
-        "carID": graphic_map.unpack_array("i", 60),
-        "playerCarID": graphic_map.unpack_value("i"),
-        "penaltyTime": graphic_map.unpack_value("f"),
-        "flag": ACC_FLAG_TYPE(graphic_map.unpack_value("i")),
-        "penalty": penalty_workarround(graphic_map),
-        "idealLineOn": graphic_map.unpack_value("i"),
-        "isInPitLane": graphic_map.unpack_value("i"),
-        # Return always 0
-        "surfaceGrip": graphic_map.unpack_value("f"),
-        "mandatoryPitDone": graphic_map.unpack_value("i"),
-        "windSpeed": graphic_map.unpack_value("f"),
-        "windDirection": graphic_map.unpack_value("f"),
-        "isSetupMenuVisible": graphic_map.unpack_value("i"),
-        "mainDisplayIndex": graphic_map.unpack_value("i"),
-        "secondaryDisplyIndex": graphic_map.unpack_value("i"),
-        "TC": graphic_map.unpack_value("i"),
-        "TCCUT": graphic_map.unpack_value("i"),
-        "EngineMap": graphic_map.unpack_value("i"),
-        "ABS": graphic_map.unpack_value("i"),
-        "fuelXLap": graphic_map.unpack_value("f"),
-        "rainLights": graphic_map.unpack_value("i"),
-        "flashingLights": graphic_map.unpack_value("i"),
-        "lightStage": graphic_map.unpack_value("i"),
-        "exhaustTemperature": graphic_map.unpack_value("f"),
-        "wiperStage": graphic_map.unpack_value("i"),
-        "driverStintTotalTimeLeft": graphic_map.unpack_value("i"),
-        "driverStintTimeLeft": graphic_map.unpack_value("i"),
-        "rainTyres": graphic_map.unpack_value("i"),
-        "sessionIndex": graphic_map.unpack_value("i"),
-        "usedFuel": graphic_map.unpack_value("f"),
-        "deltaLapTime": graphic_map.unpack_string(15, padding=2),
-        "ideltaLapTime": graphic_map.unpack_value("i"),
-        "estimatedLapTime": graphic_map.unpack_string(15, padding=2),
-        "iestimatedLapTime": graphic_map.unpack_value("i"),
-        "isDeltaPositive": graphic_map.unpack_value("i"),
-        "iSplit": graphic_map.unpack_value("i"),
-        "isValidLap": graphic_map.unpack_value("i"),
-        "fuelEstimatedLaps": graphic_map.unpack_value("f"),
-        "trackStatus": graphic_map.unpack_string(33, padding=2),
-        "missingMandatoryPits": graphic_map.unpack_value("i"),
-        "Clock": graphic_map.unpack_value("f"),
-        "directionLightsLeft": graphic_map.unpack_value("i"),
-        "directionLightsRight": graphic_map.unpack_value("i"),
-        "GlobalYellow": graphic_map.unpack_value("i"),
-        "GlobalYellow1": graphic_map.unpack_value("i"),
-        "GlobalYellow2": graphic_map.unpack_value("i"),
-        "GlobalYellow3": graphic_map.unpack_value("i"),
-        "GlobalWhite": graphic_map.unpack_value("i"),
-        "GlobalGreen": graphic_map.unpack_value("i"),
-        "GlobalChequered": graphic_map.unpack_value("i"),
-        "GlobalRed": graphic_map.unpack_value("i"),
-        "mfdTyreSet": graphic_map.unpack_value("i"),
-        "mfdFuelToAdd": graphic_map.unpack_value("f"),
-        "mfdTyrePressureFL": graphic_map.unpack_value("f"),
-        "mfdTyrePressureFR": graphic_map.unpack_value("f"),
-        "mfdTyrePressureRL": graphic_map.unpack_value("f"),
-        "mfdTyrePressureRR": graphic_map.unpack_value("f"),
-        "trackGripStatus": ACC_TRACK_GRIP_STATUS(
-            graphic_map.unpack_value("i")),
-        "rainIntensity": ACC_RAIN_INTENSITY(
-            graphic_map.unpack_value("i")),
-        "rainIntensityIn10min": ACC_RAIN_INTENSITY(
-            graphic_map.unpack_value("i")),
-        "rainIntensityIn30min": ACC_RAIN_INTENSITY(
-            graphic_map.unpack_value("i")),
-        "currentTyreSet": graphic_map.unpack_value("i"),
-        "strategyTyreSet": graphic_map.unpack_value("i"),
-        "gapAhead": graphic_map.unpack_value("i"),
-        "gapBehind": graphic_map.unpack_value("i")
+    @property
+    def size(self) -> int:
+        return self.packer.size
+
+    @property
+    def is_scalar(self) -> bool:
+        return self.kind == "s" or self.count == 1
+
+    def unpack_from(self, buffer: Any, offset: int = 0) -> Any:
+        values = self.packer.unpack_from(buffer, offset + self.offset)
+        return values[0] if self.is_scalar else values
+
+
+class PageLayout:
+    """
+    Precompiled layout of a shared memory page.
+
+    The whole page is decoded with a single struct.unpack_from call,
+    the size is checked against the documented page size on creation.
+    """
+
+    def __init__(self, name: str, size: int,
+                 entries: Sequence[Tuple[str, str]]) -> None:
+
+        self.name = name
+        self.size = size
+        self.fields: Dict[str, PageField] = {}
+
+        offset = 0
+        index = 0
+        for field_name, field_format in entries:
+            packer = struct.Struct(f"={field_format}")
+            count = int(field_format[:-1] or 1)
+            field = PageField(field_name, field_format[-1], count,
+                              offset, index, packer)
+            self.fields[field_name] = field
+
+            offset += packer.size
+            index += 1 if field.is_scalar else count
+
+        self.struct = struct.Struct(
+            "=" + "".join(field_format for _, field_format in entries))
+
+        if self.struct.size != size:
+            raise ValueError(f"{name} layout is {self.struct.size} bytes"
+                             f" long, expected {size} bytes")
+
+    def unpack_from(self, buffer: Any, offset: int = 0) -> tuple:
+        return self.struct.unpack_from(buffer, offset)
+
+
+PHYSICS_PAGE_SIZE = 800
+GRAPHICS_PAGE_SIZE = 1588
+STATIC_PAGE_SIZE = 784
+
+
+PHYSICS_LAYOUT = PageLayout("Physics", PHYSICS_PAGE_SIZE, (
+    ("packetID", "i"),
+
+    ("gas", "f"),
+    ("brake", "f"),
+    ("fuel", "f"),
+    ("gear", "i"),
+    ("rpm", "i"),
+    ("steerAngle", "f"),
+
+    ("speedKmh", "f"),
+    ("velocity", "3f"),
+    ("accG", "3f"),
+
+    ("wheelSlip", "4f"),
+    # Field is not used by ACC
+    ("wheelLoad", "4f"),
+    ("wheelsPressure", "4f"),
+    ("wheelAngularSpeed", "4f"),
+    # Field is not used by ACC
+    ("tyreWear", "4f"),
+    # Field is not used by ACC
+    ("tyreDirtyLevel", "4f"),
+    ("tyreCoreTemperature", "4f"),
+    # Field is not used by ACC
+    ("camberRAD", "4f"),
+    ("suspensionTravel", "4f"),
+
+    # Field is not used by ACC
+    ("drs", "i"),
+    ("tc", "f"),
+    ("heading", "f"),
+    ("pitch", "f"),
+    ("roll", "f"),
+    # Field is not used by ACC
+    ("cgHeight", "f"),
+    ("carDamage", "5f"),
+    # Field is not used by ACC
+    ("numberOfTyresOut", "i"),
+    ("pitLimiterOn", "i"),
+    ("abs", "f"),
+
+    # Field is not used by ACC
+    ("kersCharge", "f"),
+    # Field is not used by ACC
+    ("kersInput", "f"),
+
+    ("autoshifterOn", "i"),
+    # Field is not used by ACC
+    ("rideHeight", "2f"),
+    ("turboBoost", "f"),
+    # Not implemented in ACC
+    ("ballast", "f"),
+    # Field is not used by ACC
+    ("airDensity", "f"),
+    ("airTemp", "f"),
+    ("roadTemp", "f"),
+    ("localAngularVel", "3f"),
+    ("FinalFF", "f"),
+    # Field is not used by ACC
+    ("performanceMeter", "f"),
+
+    # Field is not used by ACC
+    ("engineBrake", "i"),
+    # Field is not used by ACC
+    ("ersRecoveryLevel", "i"),
+    # Field is not used by ACC
+    ("ersPowerLevel", "i"),
+    # Field is not used by ACC
+    ("ersHeatCharging", "i"),
+    # Field is not used by ACC
+    ("ersIsCharging", "i"),
+    # Field is not used by ACC
+    ("kersCurrentKJ", "f"),
+
+    # Field is not used by ACC
+    ("drsAvailable", "i"),
+    # Field is not used by ACC
+    ("drsEnabled", "i"),
+
+    ("brakeTemp", "4f"),
+    ("clutch", "f"),
+
+    # Field is not used by ACC
+    ("tyreTempI", "4f"),
+    # Field is not used by ACC
+    ("tyreTempM", "4f"),
+    # Field is not used by ACC
+    ("tyreTempO", "4f"),
+
+    ("isAIControlled", "i"),
+
+    ("tyreContactPoint", "12f"),
+    ("tyreContactNormal", "12f"),
+    ("tyreContactHeading", "12f"),
+
+    ("brakeBias", "f"),
+
+    ("localVelocity", "3f"),
+
+    # Field is not used by ACC
+    ("P2PActivation", "i"),
+    # Field is not used by ACC
+    ("P2PStatus", "i"),
+
+    # Field is not used by ACC
+    ("currentMaxRpm", "i"),
+
+    # Field is not used by ACC
+    ("mz", "4f"),
+    # Field is not used by ACC
+    ("fz", "4f"),
+    # Field is not used by ACC
+    ("my", "4f"),
+    ("slipRatio", "4f"),
+    ("slipAngle", "4f"),
+
+    # Field is not used by ACC
+    ("tcinAction", "i"),
+    # Field is not used by ACC
+    ("absinAction", "i"),
+    # Field is not used by ACC
+    ("suspensionDamage", "4f"),
+    # Field is not used by ACC
+    ("tyreTemp", "4f"),
+    ("waterTemp", "f"),
+
+    ("brakePressure", "4f"),
+    ("frontBrakeCompound", "i"),
+    ("rearBrakeCompound", "i"),
+    ("padLife", "4f"),
+    ("discLife", "4f"),
+
+    ("ignitionOn", "i"),
+    ("starterEngineOn", "i"),
+    ("isEngineRunning", "i"),
+
+    ("kerbVibration", "f"),
+    ("slipVibrations", "f"),
+    ("gVibrations", "f"),
+    ("absVibrations", "f"),
+))
+
+
+GRAPHICS_LAYOUT = PageLayout("Graphics", GRAPHICS_PAGE_SIZE, (
+    ("packetID", "i"),
+    ("status", "i"),
+    ("session", "i"),
+    ("currentTime", "30s"),
+    ("lastTime", "30s"),
+    ("bestTime", "30s"),
+    ("split", "30s"),
+    ("completedLaps", "i"),
+    ("position", "i"),
+    ("iCurrentTime", "i"),
+    ("iLastTime", "i"),
+    ("iBestTime", "i"),
+    ("sessionTimeLeft", "f"),
+    ("distanceTraveled", "f"),
+    ("isInPit", "i"),
+    ("currentSectorIndex", "i"),
+    ("lastSectorTime", "i"),
+    ("numberOfLaps", "i"),
+    # 33 wide chars followed by 2 bytes of padding
+    ("tyreCompound", "68s"),
+    # Field is not used by ACC
+    ("replayTimeMultiplier", "f"),
+    ("normalizedCarPosition", "f"),
+
+    ("activeCars", "i"),
+    ("carCoordinates", "180f"),
+    ("carID", "60i"),
+    ("playerCarID", "i"),
+    ("penaltyTime", "f"),
+    ("flag", "i"),
+    ("penalty", "i"),
+    ("idealLineOn", "i"),
+    ("isInPitLane", "i"),
+    # Return always 0
+    ("surfaceGrip", "f"),
+    ("mandatoryPitDone", "i"),
+    ("windSpeed", "f"),
+    ("windDirection", "f"),
+    ("isSetupMenuVisible", "i"),
+    ("mainDisplayIndex", "i"),
+    ("secondaryDisplyIndex", "i"),
+    ("TC", "i"),
+    ("TCCUT", "i"),
+    ("EngineMap", "i"),
+    ("ABS", "i"),
+    ("fuelXLap", "f"),
+    ("rainLights", "i"),
+    ("flashingLights", "i"),
+    ("lightStage", "i"),
+    ("exhaustTemperature", "f"),
+    ("wiperStage", "i"),
+    ("driverStintTotalTimeLeft", "i"),
+    ("driverStintTimeLeft", "i"),
+    ("rainTyres", "i"),
+    ("sessionIndex", "i"),
+    ("usedFuel", "f"),
+    # 15 wide chars followed by 2 bytes of padding
+    ("deltaLapTime", "32s"),
+    ("ideltaLapTime", "i"),
+    ("estimatedLapTime", "32s"),
+    ("iestimatedLapTime", "i"),
+    ("isDeltaPositive", "i"),
+    ("iSplit", "i"),
+    ("isValidLap", "i"),
+    ("fuelEstimatedLaps", "f"),
+    ("trackStatus", "68s"),
+    ("missingMandatoryPits", "i"),
+    ("Clock", "f"),
+    ("directionLightsLeft", "i"),
+    ("directionLightsRight", "i"),
+    ("GlobalYellow", "i"),
+    ("GlobalYellow1", "i"),
+    ("GlobalYellow2", "i"),
+    ("GlobalYellow3", "i"),
+    ("GlobalWhite", "i"),
+    ("GlobalGreen", "i"),
+    ("GlobalChequered", "i"),
+    ("GlobalRed", "i"),
+    ("mfdTyreSet", "i"),
+    ("mfdFuelToAdd", "f"),
+    ("mfdTyrePressure", "4f"),
+    ("trackGripStatus", "i"),
+    ("rainIntensity", "i"),
+    ("rainIntensityIn10min", "i"),
+    ("rainIntensityIn30min", "i"),
+    ("currentTyreSet", "i"),
+    ("strategyTyreSet", "i"),
+    ("gapAhead", "i"),
+    ("gapBehind", "i"),
+))
+
+
+STATIC_LAYOUT = PageLayout("Static", STATIC_PAGE_SIZE, (
+    ("smVersion", "30s"),
+    ("acVersion", "30s"),
+    ("numberOfSessions", "i"),
+    ("numCars", "i"),
+    ("carModel", "66s"),
+    ("track", "66s"),
+    ("playerName", "66s"),
+    ("playerSurname", "66s"),
+    ("playerNick", "68s"),
+    ("sectorCount", "i"),
+    # Not shown in ACC
+    ("maxTorque", "f"),
+    # Not shown in ACC
+    ("maxPower", "f"),
+    ("maxRpm", "i"),
+    ("maxFuel", "f"),
+    # Not shown in ACC
+    ("suspensionMaxTravel", "4f"),
+    # Not shown in ACC
+    ("tyreRadius", "4f"),
+    # Not shown in ACC
+    ("maxTurboBoost", "f"),
+    ("deprecated_1", "f"),
+    ("deprecated_2", "f"),
+    ("penaltiesEnabled", "i"),
+    ("aidFuelRate", "f"),
+    ("aidTireRate", "f"),
+    ("aidMechanicalDamage", "f"),
+    ("AllowTyreBlankets", "f"),
+    ("aidStability", "f"),
+    ("aidAutoClutch", "i"),
+    ("aidAutoBlip", "i"),
+    # Not shown in ACC
+    ("hasDRS", "i"),
+    # Not shown in ACC
+    ("hasERS", "i"),
+    # Not shown in ACC
+    ("hasKERS", "i"),
+    # Not shown in ACC
+    ("kersMaxJ", "f"),
+    # Not shown in ACC
+    ("engineBrakeSettingsCount", "i"),
+    # Not shown in ACC
+    ("ersPowerControllerCount", "i"),
+    # Not shown in ACC
+    ("trackSplineLength", "f"),
+    # Not shown in ACC
+    ("trackConfiguration", "68s"),
+    # Not shown in ACC
+    ("ersMaxJ", "f"),
+    # Not shown in ACC
+    ("isTimedRace", "i"),
+    # Not shown in ACC
+    ("hasExtraLap", "i"),
+    # Not shown in ACC
+    ("carSkin", "68s"),
+    # Not shown in ACC
+    ("reversedGridPositions", "i"),
+    ("PitWindowStart", "i"),
+    ("PitWindowEnd", "i"),
+    ("isOnline", "i"),
+    ("dryTyresName", "66s"),
+    # Only the first 15 wide chars fit in the 784 bytes page
+    ("wetTyresName", "30s"),
+))
+
+
+@functools.lru_cache(maxsize=256)
+def _string(value: bytes) -> str:
+    # Most strings of the pages (tyre compound, track status, names...)
+    # barely change between frames, cache the decoded value
+    return value.decode("utf-16", errors="ignore")
+
+
+def _enum_lookup(enum: type, default: Optional[Enum] = None) -> Callable:
+    """
+    Build a converter from a raw int to a member of the enum.
+
+    Parameters:
+    enum: type, enum class to convert to.
+    default: Optional[Enum], member returned for unknown values, if None
+    unknown values raise ValueError like the enum constructor.
+
+    Return:
+    Callable: the converter.
+    """
+
+    low = min(member.value for member in enum)
+    high = max(member.value for member in enum)
+    table: List[Optional[Enum]] = [None] * (high - low + 1)
+    for member in enum:
+        table[member.value - low] = member
+
+    def lookup(value: int) -> Enum:
+        if low <= value <= high:
+            member = table[value - low]
+            if member is not None:
+                return member
+
+        if default is not None:
+            return default
+
+        return enum(value)
+
+    return lookup
+
+
+# Members the graphics page decodes unknown values to, the other enums
+# raise ValueError. Also used by the numpy and arrow columns.
+ENUM_DEFAULTS: Dict[type, Enum] = {
+    ACC_SESSION_TYPE: ACC_SESSION_TYPE.ACC_UNKNOW,
+    ACC_PENALTY_TYPE: ACC_PENALTY_TYPE.UnknownValue,
+}
+
+_status = _enum_lookup(ACC_STATUS)
+_session_type = _enum_lookup(ACC_SESSION_TYPE,
+                             ENUM_DEFAULTS[ACC_SESSION_TYPE])
+_flag_type = _enum_lookup(ACC_FLAG_TYPE)
+_track_grip_status = _enum_lookup(ACC_TRACK_GRIP_STATUS)
+_rain_intensity = _enum_lookup(ACC_RAIN_INTENSITY)
+_penalty = _enum_lookup(ACC_PENALTY_TYPE, ENUM_DEFAULTS[ACC_PENALTY_TYPE])
+
+
+def _vector3f(value: tuple) -> Vector3f:
+    return Vector3f(*value)
+
+
+def _vector3f_list(value: tuple) -> List[Vector3f]:
+    return [Vector3f(*value[i:i + 3]) for i in range(0, len(value), 3)]
+
+
+def _wheels(value: tuple) -> Wheels:
+    return Wheels(*value)
+
+
+def _car_damage(value: tuple) -> CarDamage:
+    return CarDamage(*value)
+
+
+def _contact_point(value: tuple) -> ContactPoint:
+    return ContactPoint.from_list(
+        (value[0:3], value[3:6], value[6:9], value[9:12]))
+
+
+def _update_vector3f(target: Vector3f, value: tuple) -> None:
+    target.x, target.y, target.z = value
+
+
+def _update_vector3f_list(target: List[Vector3f], value: tuple) -> None:
+    for i, vector in enumerate(target):
+        vector.x, vector.y, vector.z = value[3 * i:3 * i + 3]
+
+
+def _update_wheels(target: Wheels, value: tuple) -> None:
+    (target.front_left, target.front_right,
+     target.rear_left, target.rear_right) = value
+
+
+def _update_car_damage(target: CarDamage, value: tuple) -> None:
+    (target.front, target.rear, target.left, target.right,
+     target.center) = value
+
+
+def _update_contact_point(target: ContactPoint, value: tuple) -> None:
+    _update_vector3f(target.front_left, value[0:3])
+    _update_vector3f(target.front_right, value[3:6])
+    _update_vector3f(target.rear_left, value[6:9])
+    _update_vector3f(target.rear_right, value[9:12])
+
+
+# In place update of the mutable values built by a converter
+_UPDATERS: Dict[Callable, Callable] = {
+    _vector3f: _update_vector3f,
+    _vector3f_list: _update_vector3f_list,
+    _wheels: _update_wheels,
+    _car_damage: _update_car_damage,
+    _contact_point: _update_contact_point,
+}
+
+
+def _encode_string(value: str) -> bytes:
+    return value.encode("utf-16-le")
+
+
+def _encode_enum(value: Enum) -> int:
+    return value.value
+
+
+def _encode_vector3f(value: Vector3f) -> tuple:
+    return (value.x, value.y, value.z)
+
+
+def _encode_vector3f_list(value: List[Vector3f]) -> tuple:
+    return tuple(axis for vector in value
+                 for axis in (vector.x, vector.y, vector.z))
+
+
+def _encode_wheels(value: Wheels) -> tuple:
+    return (value.front_left, value.front_right,
+            value.rear_left, value.rear_right)
+
+
+def _encode_car_damage(value: CarDamage) -> tuple:
+    return (value.front, value.rear, value.left, value.right, value.center)
+
+
+def _encode_contact_point(value: ContactPoint) -> tuple:
+    return (_encode_vector3f(value.front_left)
+            + _encode_vector3f(value.front_right)
+            + _encode_vector3f(value.rear_left)
+            + _encode_vector3f(value.rear_right))
+
+
+# Inverse of each converter, to write the raw value(s) back in a page
+_ENCODERS: Dict[Callable, Callable] = {
+    _string: _encode_string,
+    bool: int,
+    _status: _encode_enum,
+    _session_type: _encode_enum,
+    _flag_type: _encode_enum,
+    _track_grip_status: _encode_enum,
+    _rain_intensity: _encode_enum,
+    _penalty: _encode_enum,
+    _vector3f: _encode_vector3f,
+    _vector3f_list: _encode_vector3f_list,
+    _wheels: _encode_wheels,
+    _car_damage: _encode_car_damage,
+    _contact_point: _encode_contact_point,
+}
+
+
+class PageDecoder:
+    """
+    Build a dataclass from a page layout.
+
+    Each attribute of the dataclass is mapped to a field of the layout
+    and an optional converter applied on the raw value(s).
+    """
+
+    def __init__(self, layout: PageLayout, cls: type,
+                 attributes: Sequence[Tuple[str, str, Optional[Callable]]]
+                 ) -> None:
+
+        self.layout = layout
+        self.cls = cls
+        self.attributes: Dict[str, Tuple[PageField, Optional[Callable]]] = {
+            name: (layout.fields[field], converter)
+            for name, field, converter in attributes}
+
+        expected = [f.name for f in fields(cls)]
+        if list(self.attributes) != expected:
+            raise ValueError(f"{cls.__name__} attributes do not match"
+                             f" the {layout.name} decoder")
+
+        self._plan = []
+        self._update_plan = []
+        self._encode_plan = []
+        for name, (field, converter) in self.attributes.items():
+            stop = None if field.is_scalar else field.index + field.count
+            self._plan.append((field.index, stop, converter))
+            self._update_plan.append((name, field.index, stop, converter,
+                                      _UPDATERS.get(converter)))
+            self._encode_plan.append((name, field.index, stop,
+                                      _ENCODERS.get(converter)))
+
+        # Raw values of an empty page
+        self._empty: List[Any] = []
+        for field in layout.fields.values():
+            empty = {"s": b"", "i": 0}.get(field.kind, 0.0)
+            self._empty.extend([empty] * (1 if field.is_scalar
+                                          else field.count))
+
+    def decode(self, buffer: Any, offset: int = 0) -> Any:
+        values = self.layout.struct.unpack_from(buffer, offset)
+
+        args = []
+        for start, stop, converter in self._plan:
+            value = values[start] if stop is None else values[start:stop]
+            args.append(value if converter is None else converter(value))
+
+        return self.cls(*args)
+
+    def decode_into(self, buffer: Any, target: Any, offset: int = 0) -> Any:
+        """
+        Update a dataclass previously built by decode in place, nested
+        values like Wheels or Vector3f are updated instead of replaced.
+        """
+
+        values = self.layout.struct.unpack_from(buffer, offset)
+
+        for name, start, stop, converter, update in self._update_plan:
+            value = values[start] if stop is None else values[start:stop]
+
+            if update is not None:
+                update(getattr(target, name), value)
+
+            elif converter is None:
+                setattr(target, name, value)
+
+            else:
+                setattr(target, name, converter(value))
+
+        return target
+
+    def decode_attribute(self, buffer: Any, name: str, offset: int = 0) -> Any:
+        field, converter = self.attributes[name]
+        value = field.unpack_from(buffer, offset)
+        return value if converter is None else converter(value)
+
+    def _raw_values(self, value: Any, raw: Optional[Dict[str, Any]]
+                    ) -> List[Any]:
+
+        values = list(self._empty)
+
+        for name, start, stop, encode in self._encode_plan:
+            item = getattr(value, name)
+            if encode is not None:
+                item = encode(item)
+
+            if stop is None:
+                values[start] = item
+
+            elif len(item) == stop - start:
+                values[start:stop] = item
+
+            else:
+                raise ValueError(f"{name} must have {stop - start} values")
+
+        for name, item in (raw or {}).items():
+            field = self.layout.fields.get(name)
+            if field is None:
+                raise ValueError(f"Unknown {self.layout.name} field: {name}")
+
+            if field.is_scalar:
+                values[field.index] = item
+
+            elif len(item) == field.count:
+                values[field.index:field.index + field.count] = item
+
+            else:
+                raise ValueError(f"{name} must have {field.count} values")
+
+        return values
+
+    def encode(self, value: Any, raw: Optional[Dict[str, Any]] = None
+               ) -> bytes:
+        """
+        Inverse of decode, build a page from a dataclass.
+
+        Parameters:
+        value: dataclass to encode
+        raw: values of layout fields by their documented name, for the
+        fields that the dataclass doesn't have, e.g. {"tyreWear": ...}.
+        Fields that are not set are left to zero.
+
+        Return:
+        result: the page
+        """
+
+        return self.layout.struct.pack(*self._raw_values(value, raw))
+
+    def encode_into(self, buffer: Any, value: Any,
+                    raw: Optional[Dict[str, Any]] = None,
+                    offset: int = 0) -> None:
+        """
+        Same as encode but write the page into a writable buffer.
+        """
+
+        self.layout.struct.pack_into(buffer, offset,
+                                     *self._raw_values(value, raw))
+
+
+PHYSICS_DECODER = PageDecoder(PHYSICS_LAYOUT, PhysicsMap, (
+    ("packed_id", "packetID", None),
+    ("gas", "gas", None),
+    ("brake", "brake", None),
+    ("fuel", "fuel", None),
+    ("gear", "gear", None),
+    ("rpm", "rpm", None),
+    ("steer_angle", "steerAngle", None),
+    ("speed_kmh", "speedKmh", None),
+    ("velocity", "velocity", _vector3f),
+    ("g_force", "accG", _vector3f),
+    ("wheel_slip", "wheelSlip", _wheels),
+    ("wheel_pressure", "wheelsPressure", _wheels),
+    ("wheel_angular_s", "wheelAngularSpeed", _wheels),
+    ("tyre_core_temp", "tyreCoreTemperature", _wheels),
+    ("suspension_travel", "suspensionTravel", _wheels),
+    ("tc", "tc", None),
+    ("heading", "heading", None),
+    ("pitch", "pitch", None),
+    ("roll", "roll", None),
+    ("car_damage", "carDamage", _car_damage),
+    ("pit_limiter_on", "pitLimiterOn", bool),
+    ("abs", "abs", None),
+    ("autoshifter_on", "autoshifterOn", bool),
+    ("turbo_boost", "turboBoost", None),
+    ("air_temp", "airTemp", None),
+    ("road_temp", "roadTemp", None),
+    ("local_angular_vel", "localAngularVel", _vector3f),
+    ("final_ff", "FinalFF", None),
+    ("brake_temp", "brakeTemp", _wheels),
+    ("clutch", "clutch", None),
+    ("is_ai_controlled", "isAIControlled", bool),
+    ("tyre_contact_point", "tyreContactPoint", _contact_point),
+    ("tyre_contact_normal", "tyreContactNormal", _contact_point),
+    ("tyre_contact_heading", "tyreContactHeading", _contact_point),
+    ("brake_bias", "brakeBias", None),
+    ("local_velocity", "localVelocity", _vector3f),
+    ("slip_ratio", "slipRatio", _wheels),
+    ("slip_angle", "slipAngle", _wheels),
+    ("suspension_damage", "suspensionDamage", _wheels),
+    ("water_temp", "waterTemp", None),
+    ("brake_pressure", "brakePressure", _wheels),
+    ("front_brake_compound", "frontBrakeCompound", None),
+    ("rear_brake_compound", "rearBrakeCompound", None),
+    ("pad_life", "padLife", _wheels),
+    ("disc_life", "discLife", _wheels),
+    ("ignition_on", "ignitionOn", bool),
+    ("starter_engine_on", "starterEngineOn", bool),
+    ("is_engine_running", "isEngineRunning", bool),
+    ("kerb_vibration", "kerbVibration", None),
+    ("slip_vibration", "slipVibrations", None),
+    ("g_vibration", "gVibrations", None),
+    ("abs_vibration", "absVibrations", None),
+))
+
+
+GRAPHICS_DECODER = PageDecoder(GRAPHICS_LAYOUT, GraphicsMap, (
+    ("packed_id", "packetID", None),
+    ("status", "status", _status),
+    ("session_type", "session", _session_type),
+    ("current_time_str", "currentTime", _string),
+    ("last_time_str", "lastTime", _string),
+    ("best_time_str", "bestTime", _string),
+    ("last_sector_time_str", "lastSectorTime", None),
+    ("completed_lap", "completedLaps", None),
+    ("position", "position", None),
+    ("current_time", "iCurrentTime", None),
+    ("last_time", "iLastTime", None),
+    ("best_time", "iBestTime", None),
+    ("session_time_left", "sessionTimeLeft", None),
+    ("distance_traveled", "distanceTraveled", None),
+    ("is_in_pit", "isInPit", bool),
+    ("current_sector_index", "currentSectorIndex", None),
+    ("last_sector_time", "lastSectorTime", None),
+    ("number_of_laps", "numberOfLaps", None),
+    ("tyre_compound", "tyreCompound", _string),
+    ("normalized_car_position", "normalizedCarPosition", None),
+    ("active_cars", "activeCars", None),
+    ("car_coordinates", "carCoordinates", _vector3f_list),
+    ("car_id", "carID", None),
+    ("player_car_id", "playerCarID", None),
+    ("penalty_time", "penaltyTime", None),
+    ("flag", "flag", _flag_type),
+    ("penalty", "penalty", _penalty),
+    ("ideal_line_on", "idealLineOn", bool),
+    ("is_in_pit_lane", "isInPitLane", bool),
+    ("mandatory_pit_done", "mandatoryPitDone", bool),
+    ("wind_speed", "windSpeed", None),
+    ("wind_direction", "windDirection", None),
+    ("is_setup_menu_visible", "isSetupMenuVisible", bool),
+    ("main_display_index", "mainDisplayIndex", None),
+    ("secondary_display_index", "secondaryDisplyIndex", None),
+    ("tc_level", "TC", None),
+    ("tc_cut_level", "TCCUT", None),
+    ("engine_map", "EngineMap", None),
+    ("abs_level", "ABS", None),
+    ("fuel_per_lap", "fuelXLap", None),
+    ("rain_light", "rainLights", bool),
+    ("flashing_light", "flashingLights", bool),
+    ("light_stage", "lightStage", None),
+    ("exhaust_temp", "exhaustTemperature", None),
+    ("wiper_stage", "wiperStage", None),
+    ("driver_stint_total_time_left", "driverStintTotalTimeLeft", None),
+    ("driver_stint_time_left", "driverStintTimeLeft", None),
+    ("rain_tyres", "rainTyres", None),
+    ("session_index", "sessionIndex", None),
+    ("used_fuel", "usedFuel", None),
+    ("delta_lap_time_str", "deltaLapTime", _string),
+    ("delta_lap_time", "ideltaLapTime", None),
+    ("estimated_lap_time_str", "estimatedLapTime", _string),
+    ("estimated_lap_time", "iestimatedLapTime", None),
+    ("is_delta_positive", "isDeltaPositive", bool),
+    ("is_valid_lap", "isValidLap", bool),
+    ("fuel_estimated_laps", "fuelEstimatedLaps", None),
+    ("track_status", "trackStatus", _string),
+    ("missing_mandatory_pits", "missingMandatoryPits", None),
+    ("clock", "Clock", None),
+    ("direction_light_left", "directionLightsLeft", bool),
+    ("direction_light_right", "directionLightsRight", bool),
+    ("global_yellow", "GlobalYellow", bool),
+    ("global_yellow_s1", "GlobalYellow1", bool),
+    ("global_yellow_s2", "GlobalYellow2", bool),
+    ("global_yellow_s3", "GlobalYellow3", bool),
+    ("global_white", "GlobalWhite", bool),
+    ("global_green", "GlobalGreen", bool),
+    ("global_chequered", "GlobalChequered", bool),
+    ("global_red", "GlobalRed", bool),
+    ("mfd_tyre_set", "mfdTyreSet", None),
+    ("mfd_fuel_to_add", "mfdFuelToAdd", None),
+    ("mfd_tyre_pressure", "mfdTyrePressure", _wheels),
+    ("track_grip_status", "trackGripStatus", _track_grip_status),
+    ("rain_intensity", "rainIntensity", _rain_intensity),
+    ("rain_intensity_in_10min", "rainIntensityIn10min", _rain_intensity),
+    ("rain_intensity_in_30min", "rainIntensityIn30min", _rain_intensity),
+    ("current_tyre_set", "currentTyreSet", None),
+    ("strategy_tyre_set", "strategyTyreSet", None),
+    ("gap_ahead", "gapAhead", None),
+    ("gap_behind", "gapBehind", None),
+))
+
+
+STATIC_DECODER = PageDecoder(STATIC_LAYOUT, StaticsMap, (
+    ("sm_version", "smVersion", _string),
+    ("ac_version", "acVersion", _string),
+    ("number_of_session", "numberOfSessions", None),
+    ("num_cars", "numCars", None),
+    ("car_model", "carModel", _string),
+    ("track", "track", _string),
+    ("player_name", "playerName", _string),
+    ("player_surname", "playerSurname", _string),
+    ("player_nick", "playerNick", _string),
+    ("sector_count", "sectorCount", None),
+    ("max_rpm", "maxRpm", None),
+    ("max_fuel", "maxFuel", None),
+    ("penalty_enabled", "penaltiesEnabled", bool),
+    ("aid_fuel_rate", "aidFuelRate", None),
+    ("aid_tyre_rate", "aidTireRate", None),
+    ("aid_mechanical_damage", "aidMechanicalDamage", None),
+    ("aid_stability", "aidStability", None),
+    ("aid_auto_clutch", "aidAutoClutch", bool),
+    ("pit_window_start", "PitWindowStart", None),
+    ("pit_window_end", "PitWindowEnd", None),
+    ("is_online", "isOnline", bool),
+    ("dry_tyres_name", "dryTyresName", _string),
+    ("wet_tyres_name", "wetTyresName", _string),
+))
+
+
+class PageView:
+    """
+    Lazy view over a copy of a shared memory page.
+
+    Attributes have the same names as the matching dataclass, each one is
+    decoded from its fixed offset on first access and then cached.
+    """
+
+    _decoder: PageDecoder
+
+    def __init__(self, buffer: Any) -> None:
+        self._buffer = buffer
+
+    def __getattr__(self, name: str) -> Any:
+
+        if name not in self._decoder.attributes:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        value = self._decoder.decode_attribute(self._buffer, name)
+        self.__dict__[name] = value
+        return value
+
+    def __dir__(self) -> List[str]:
+        return list(super().__dir__()) + list(self._decoder.attributes)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(packed_id={self.packed_id})"
+
+    def to_dataclass(self) -> Any:
+        """
+        Decode the whole page into the matching dataclass.
+        """
+
+        return self._decoder.decode(self._buffer)
+
+
+class PhysicsView(PageView):
+    _decoder = PHYSICS_DECODER
+
+
+class GraphicsView(PageView):
+    _decoder = GRAPHICS_DECODER
+
+
+class StaticsView(PageView):
+    _decoder = STATIC_DECODER
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(sm_version={self.sm_version!r})"
+
+
+# Dataclass of the pages with numeric channels, see numeric_channels
+_CHANNEL_PAGES = {"Physics": PhysicsMap, "Graphics": GraphicsMap}
+
+# Array typecode of each numeric attribute type
+_TYPECODES = {float: "f", int: "i", bool: "b"}
+
+
+def channel_type(path: str) -> type:
+    """
+    Return the type of an attribute of PhysicsMap or GraphicsMap given
+    as "<Page>.<attribute>", e.g. Wheels for "Physics.tyre_core_temp".
+    Raise ValueError if the attribute doesn't exist.
+    """
+
+    page, _, attribute = path.partition(".")
+    cls = _CHANNEL_PAGES.get(page)
+    if cls is None or attribute not in {f.name for f in fields(cls)}:
+        raise ValueError(f"Unknown channel: {path}")
+
+    return get_type_hints(cls)[attribute]
+
+
+def numeric_channels(path: str
+                     ) -> List[Tuple[str, str, Optional[str], str]]:
+    """
+    Return (page, attribute, element, typecode) of the channels of a
+    path, a composite value like Wheels gives one channel per element.
+    Raise ValueError if the path isn't a numeric attribute of PhysicsMap
+    or GraphicsMap.
+    """
+
+    hint = channel_type(path)
+    page, _, attribute = path.partition(".")
+
+    if hint in _TYPECODES:
+        return [(page, attribute, None, _TYPECODES[hint])]
+
+    if is_dataclass(hint) and all(
+            get_type_hints(hint)[f.name] is float for f in fields(hint)):
+        return [(page, attribute, f.name, "f") for f in fields(hint)]
+
+    raise ValueError(f"{path} is not a numeric channel")
+
+
+class FieldProjection:
+    """
+    Reader for a subset of the fields of the pages.
+
+    Fields are given by path like "Physics.speed_kmh", each page is
+    decoded with a single struct.unpack_from where the fields that are
+    not requested are skipped as padding. Build a projection once and
+    reuse it, see accSharedMemory.read_projection.
+    """
+
+    _DECODERS: Dict[str, PageDecoder] = {
+        "Physics": PHYSICS_DECODER,
+        "Graphics": GRAPHICS_DECODER,
+        "Static": STATIC_DECODER,
     }
 
-    return GraphicsMap(
-        packed_id=temp["packetID"],
-        status=temp["acc_status"],
-        session_type=temp["acc_session_type"],
-        current_time_str=temp["currentTime"],
-        last_time_str=temp["lastTime"],
-        best_time_str=temp["bestTime"],
-        last_sector_time_str=temp["lastSectorTime"],
-        completed_lap=temp["completedLaps"],
-        position=temp["position"],
-        current_time=temp["iCurrentTime"],
-        last_time=temp["iLastTime"],
-        best_time=temp["iBestTime"],
-        session_time_left=temp["sessionTimeLeft"],
-        distance_traveled=temp["distanceTraveled"],
-        is_in_pit=bool(temp["isInPit"]),
-        current_sector_index=temp["currentSectorIndex"],
-        last_sector_time=temp["lastSectorTime"],
-        number_of_laps=temp["numberOfLaps"],
-        tyre_compound=temp["tyreCompound"],
-        normalized_car_position=temp["normalizedCarPosition"],
-        active_cars=temp["activeCars"],
-        car_coordinates=[Vector3f(*car) for car in temp["carCoordinates"]],
-        car_id=temp["carID"],
-        player_car_id=temp["playerCarID"],
-        penalty_time=temp["penaltyTime"],
-        flag=temp["flag"],
-        penalty=temp["penalty"],
-        ideal_line_on=bool(temp["idealLineOn"]),
-        is_in_pit_lane=bool(temp["isInPitLane"]),
-        mandatory_pit_done=bool(temp["mandatoryPitDone"]),
-        wind_speed=temp["windSpeed"],
-        wind_direction=temp["windDirection"],
-        is_setup_menu_visible=bool(temp["isSetupMenuVisible"]),
-        main_display_index=temp["mainDisplayIndex"],
-        secondary_display_index=temp["secondaryDisplyIndex"],
-        tc_level=temp["TC"],
-        tc_cut_level=temp["TCCUT"],
-        engine_map=temp["EngineMap"],
-        abs_level=temp["ABS"],
-        fuel_per_lap=temp["fuelXLap"],
-        rain_light=bool(temp["rainLights"]),
-        flashing_light=bool(temp["flashingLights"]),
-        light_stage=temp["lightStage"],
-        exhaust_temp=temp["exhaustTemperature"],
-        wiper_stage=temp["wiperStage"],
-        driver_stint_total_time_left=temp["driverStintTotalTimeLeft"],
-        driver_stint_time_left=temp["driverStintTimeLeft"],
-        rain_tyres=temp["rainTyres"],
-        session_index=temp["sessionIndex"],
-        used_fuel=temp["usedFuel"],
-        delta_lap_time_str=temp["deltaLapTime"],
-        delta_lap_time=temp["ideltaLapTime"],
-        estimated_lap_time_str=temp["estimatedLapTime"],
-        estimated_lap_time=temp["iestimatedLapTime"],
-        is_delta_positive=bool(temp["isDeltaPositive"]),
-        is_valid_lap=bool(temp["isValidLap"]),
-        fuel_estimated_laps=temp["fuelEstimatedLaps"],
-        track_status=temp["trackStatus"],
-        missing_mandatory_pits=temp["missingMandatoryPits"],
-        clock=temp["Clock"],
-        direction_light_left=bool(temp["directionLightsLeft"]),
-        direction_light_right=bool(temp["directionLightsRight"]),
-        global_yellow=bool(temp["GlobalYellow"]),
-        global_yellow_s1=bool(temp["GlobalYellow1"]),
-        global_yellow_s2=bool(temp["GlobalYellow2"]),
-        global_yellow_s3=bool(temp["GlobalYellow3"]),
-        global_white=bool(temp["GlobalWhite"]),
-        global_green=bool(temp["GlobalGreen"]),
-        global_chequered=bool(temp["GlobalChequered"]),
-        global_red=bool(temp["GlobalRed"]),
-        mfd_tyre_set=temp["mfdTyreSet"],
-        mfd_fuel_to_add=temp["mfdFuelToAdd"],
-        mfd_tyre_pressure=Wheels(
-            temp["mfdTyrePressureFL"],
-            temp["mfdTyrePressureFR"],
-            temp["mfdTyrePressureRL"],
-            temp["mfdTyrePressureRR"]),
-        track_grip_status=temp["trackGripStatus"],
-        rain_intensity=temp["rainIntensity"],
-        rain_intensity_in_10min=temp["rainIntensityIn10min"],
-        rain_intensity_in_30min=temp["rainIntensityIn30min"],
-        current_tyre_set=temp["currentTyreSet"],
-        strategy_tyre_set=temp["strategyTyreSet"],
-        gap_ahead=temp["gapAhead"],
-        gap_behind=temp["gapBehind"],
-    )
+    def __init__(self, paths: Sequence[str],
+                 name: str = "Projection") -> None:
+        """
+        Parameters:
+        paths: fields to decode, as "<Page>.<attribute>"
+        name: name of the record type
+
+        The record has the attribute names as fields, attributes with
+        the same name in two pages are prefixed with the page name,
+        e.g. physics_packed_id and graphics_packed_id.
+        """
+
+        if not paths:
+            raise ValueError("A projection needs at least one field")
+
+        if len(set(paths)) != len(paths):
+            raise ValueError("Fields of a projection must be unique")
+
+        requested = []
+        for path in paths:
+            page, _, attribute = path.partition(".")
+            decoder = self._DECODERS.get(page)
+            if decoder is None or attribute not in decoder.attributes:
+                raise ValueError(f"Unknown field: {path}")
+
+            field, converter = decoder.attributes[attribute]
+            requested.append((page, attribute, field, converter))
+
+        self.paths = tuple(paths)
+
+        # Index of the first value of each raw field in the tuple
+        # unpacked from its page
+        indexes: Dict[Tuple[str, str], int] = {}
+        self._packers: List[Tuple[int, struct.Struct]] = []
+
+        for slot, page in enumerate(self._DECODERS):
+            page_fields = {field.name: field for p, _, field, _ in requested
+                           if p == page}
+            if not page_fields:
+                continue
+
+            page_format = "="
+            offset = 0
+            index = 0
+            for field in sorted(page_fields.values(),
+                                key=lambda field: field.offset):
+                if field.offset > offset:
+                    page_format += f"{field.offset - offset}x"
+
+                page_format += field.packer.format.lstrip("=")
+                indexes[(page, field.name)] = index
+
+                offset = field.offset + field.size
+                index += 1 if field.is_scalar else field.count
+
+            self._packers.append((slot, struct.Struct(page_format)))
+
+        slots = list(self._DECODERS)
+        self._plan = []
+        for page, _, field, converter in requested:
+            start = indexes[(page, field.name)]
+            stop = None if field.is_scalar else start + field.count
+            self._plan.append((slots.index(page), start, stop, converter))
+
+        attributes = [attribute for _, attribute, _, _ in requested]
+        names = [attribute if attributes.count(attribute) == 1
+                 else f"{page.lower()}_{attribute}"
+                 for page, attribute, _, _ in requested]
+        self.record = namedtuple(name, names)
+
+    @property
+    def pages(self) -> List[str]:
+        """
+        Pages read by the projection.
+        """
+
+        slots = list(self._DECODERS)
+        return [slots[slot] for slot, _ in self._packers]
+
+    def decode(self, physics: Any = None, graphics: Any = None,
+               static: Any = None) -> tuple:
+        """
+        Decode the projection from the pages, only the pages used by
+        the projection are needed.
+
+        Return:
+        result: record of the requested fields in the requested order
+        """
+
+        buffers = (physics, graphics, static)
+        values: List[tuple] = [(), (), ()]
+        for slot, packer in self._packers:
+            values[slot] = packer.unpack_from(buffers[slot])
+
+        args = []
+        for slot, start, stop, converter in self._plan:
+            value = (values[slot][start] if stop is None
+                     else values[slot][start:stop])
+            args.append(value if converter is None else converter(value))
+
+        return self.record(*args)
+
+
+_PHYSICS_ID = PHYSICS_LAYOUT.fields["packetID"]
+_GRAPHICS_ID = GRAPHICS_LAYOUT.fields["packetID"]
+_SUSPENSION_TRAVEL = PHYSICS_LAYOUT.fields["suspensionTravel"]
+_COMPLETED_LAPS = GRAPHICS_LAYOUT.fields["completedLaps"]
+_SESSION_INDEX = GRAPHICS_LAYOUT.fields["sessionIndex"]
+
+
+def copy_page(page: Any, packet_id: PageField,
+              max_retries: int = 3) -> Tuple[bytes, bool]:
+    """
+    Copy a page with a single slice, seqlock style: the packet id is
+    checked before and after the copy and the copy is retried when it
+    changed in the meantime.
+
+    Parameters:
+    page: mapping or buffer of the page
+    packet_id: packet id field of the page layout
+    max_retries: number of extra copies allowed
+
+    Return:
+    result: (copy of the page, True if the copy isn't torn)
+    """
+
+    for _ in range(max_retries + 1):
+        before = packet_id.unpack_from(page)
+        data = page[:]
+
+        if packet_id.unpack_from(page) == before == packet_id.unpack_from(
+                data):
+            return data, True
+
+    return data, False
+
+
+def copy_consistent_pages(physic_map: Any, graphic_map: Any,
+                          max_retries: int = 3) -> Tuple[bytes, bytes, bool]:
+    """
+    Copy the physics and graphics pages and check that no new physics
+    step was written while the graphics page was copied.
+
+    Return:
+    result: (physics page, graphics page, True if both pages are tear-free
+    and belong to the same physics step)
+    """
+
+    for _ in range(max_retries + 1):
+        physics, physics_ok = copy_page(physic_map, _PHYSICS_ID, max_retries)
+        graphics, graphics_ok = copy_page(graphic_map, _GRAPHICS_ID,
+                                          max_retries)
+
+        latest_id = _PHYSICS_ID.unpack_from(physic_map)
+        in_sync = latest_id == _PHYSICS_ID.unpack_from(physics)
+        if physics_ok and graphics_ok and in_sync:
+            return physics, graphics, True
+
+    return physics, graphics, False
+
+
+def read_physic_map(physic_map: accSM) -> PhysicsMap:
+    return PHYSICS_DECODER.decode(physic_map)
+
+
+def read_graphics_map(graphic_map: accSM) -> GraphicsMap:
+    return GRAPHICS_DECODER.decode(graphic_map)
 
 
 def read_static_map(static_map: accSM) -> StaticsMap:
-    static_map.seek(0)
-
-    temp = {
-        "smVersion": static_map.unpack_string(15),
-        "acVersion": static_map.unpack_string(15),
-        "numberOfSessions": static_map.unpack_value("i"),
-        "numCars": static_map.unpack_value("i"),
-        "carModel": static_map.unpack_string(33),
-        "track": static_map.unpack_string(33),
-        "playerName": static_map.unpack_string(33),
-        "playerSurname": static_map.unpack_string(33),
-        "playerNick": static_map.unpack_string(33, 2),
-        "sectorCount": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "maxTorque": static_map.unpack_value("f"),
-        # Not shown in ACC
-        "maxPower": static_map.unpack_value("f"),
-        "maxRpm": static_map.unpack_value("i"),
-        "maxFuel": static_map.unpack_value("f"),
-        # Not shown in ACC
-        "suspensionMaxTravel": static_map.unpack_array("f", 4),
-        # Not shown in ACC
-        "tyreRadius": static_map.unpack_array("f", 4),
-        # Not shown in ACC
-        "maxTurboBoost": static_map.unpack_value("f"),
-        "deprecated_1": static_map.unpack_value("f"),
-        "deprecated_2": static_map.unpack_value("f"),
-        "penaltiesEnabled": static_map.unpack_value("i"),
-        "aidFuelRate": static_map.unpack_value("f"),
-        "aidTireRate": static_map.unpack_value("f"),
-        "aidMechanicalDamage": static_map.unpack_value("f"),
-        "AllowTyreBlankets": static_map.unpack_value("f"),
-        "aidStability": static_map.unpack_value("f"),
-        "aidAutoClutch": static_map.unpack_value("i"),
-        "aidAutoBlip": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "hasDRS": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "hasERS": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "hasKERS": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "kersMaxJ": static_map.unpack_value("f"),
-        # Not shown in ACC
-        "engineBrakeSettingsCount": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "ersPowerControllerCount": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "trackSplineLength": static_map.unpack_value("f"),
-        # Not shown in ACC
-        "trackConfiguration": static_map.unpack_string(33, 2),
-        # Not shown in ACC
-        "ersMaxJ": static_map.unpack_value("f"),
-        # Not shown in ACC
-        "isTimedRace": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "hasExtraLap": static_map.unpack_value("i"),
-        # Not shown in ACC
-        "carSkin": static_map.unpack_string(33, 2),
-        # Not shown in ACC
-        "reversedGridPositions": static_map.unpack_value("i"),
-        "PitWindowStart": static_map.unpack_value("i"),
-        "PitWindowEnd": static_map.unpack_value("i"),
-        "isOnline": static_map.unpack_value("i"),
-        "dryTyresName": static_map.unpack_string(33),
-        "wetTyresName": static_map.unpack_string(33)
-    }
+    return STATIC_DECODER.decode(static_map)
+
+
+def write_physic_map(physic_map: Any, physics: PhysicsMap,
+                     raw: Optional[Dict[str, Any]] = None) -> None:
+    PHYSICS_DECODER.encode_into(physic_map, physics, raw)
+
 
-    return StaticsMap(
-        temp["smVersion"],
-        temp["acVersion"],
-        temp["numberOfSessions"],
-        temp["numCars"],
-        temp["carModel"],
-        temp["track"],
-        temp["playerName"],
-        temp["playerSurname"],
-        temp["playerNick"],
-        temp["sectorCount"],
-        temp["maxRpm"],
-        temp["maxFuel"],
-        bool(temp["penaltiesEnabled"]),
-        temp["aidFuelRate"],
-        temp["aidTireRate"],
-        temp["aidMechanicalDamage"],
-        temp["aidStability"],
-        bool(temp["aidAutoClutch"]),
-        temp["PitWindowStart"],
-        temp["PitWindowEnd"],
-        bool(temp["isOnline"]),
-        temp["dryTyresName"],
-        temp["wetTyresName"]
-    )
+def write_graphics_map(graphic_map: Any, graphics: GraphicsMap,
+                       raw: Optional[Dict[str, Any]] = None) -> None:
+    GRAPHICS_DECODER.encode_into(graphic_map, graphics, raw)
+
+
+def write_static_map(static_map: Any, statics: StaticsMap,
+                     raw: Optional[Dict[str, Any]] = None) -> None:
+    STATIC_DECODER.encode_into(static_map, statics, raw)
 
 
 def penalty_workarround(graphic_map: accSM) -> ACC_PENALTY_TYPE:
+    return _penalty(graphic_map.unpack_value("i"))
 
-    try:
-        return ACC_PENALTY_TYPE(graphic_map.unpack_value("i"))
 
-    except(ValueError):
-        return ACC_PENALTY_TYPE.UnknownValue
+def xor_pages(a: bytes, b: bytes) -> bytes:
+    """
+    XOR of two pages of the same size, used to delta encode a page
+    against a previous one: xor_pages(xor_pages(a, b), b) == a.
+    """
 
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")
+            ).to_bytes(len(a), "little")
 
-class accSharedMemory():
 
-    def __init__(self) -> None:
+def open_page_file(path: str, size: int) -> accSM:
+    """
+    Map a file as a shared memory page, the file is created or extended
+    to size bytes if needed. Used to stand in for the ACC pages where
+    the game can't run.
+    """
 
-        self.physicSM = accSM(-1, 800, tagname="Local\\acpmf_physics",
-                              access=mmap.ACCESS_WRITE)
-        self.graphicSM = accSM(-1, 1588, tagname="Local\\acpmf_graphics",
-                               access=mmap.ACCESS_WRITE)
-        self.staticSM = accSM(-1, 784, tagname="Local\\acpmf_static",
-                              access=mmap.ACCESS_WRITE)
+    with open(path, "a+b") as file:
+        if os.fstat(file.fileno()).st_size < size:
+            file.truncate(size)
 
-        self.physics_old = None
-        self.last_physicsID = 0
+        return accSM(file.fileno(), size, access=mmap.ACCESS_WRITE)
 
-    def read_shared_memory(self) -> Optional[ACC_map]:
 
-        physics = read_physic_map(self.physicSM)
-        graphics = read_graphics_map(self.graphicSM)
-        statics = read_static_map(self.staticSM)
+@dataclass
+class FrameDrops:
+    """
+    Packets received and skipped (gaps in the packet ids) per page.
+    """
 
-        if (physics.packed_id == self.last_physicsID
-                or (self.physics_old is not None
-                    and PhysicsMap.is_equal(self.physics_old, physics))):
-            return None
+    physics_frames: int = 0
+    physics_dropped: int = 0
+    graphics_frames: int = 0
+    graphics_dropped: int = 0
 
-        else:
-            self.physics_old = copy.deepcopy(physics)
-            return ACC_map(physics, graphics, statics)
+    @property
+    def physics_drop_rate(self) -> float:
+        total = self.physics_frames + self.physics_dropped
+        return self.physics_dropped / total if total else 0.0
 
-    def get_shared_memory_data(self) -> ACC_map:
+    @property
+    def graphics_drop_rate(self) -> float:
+        total = self.graphics_frames + self.graphics_dropped
+        return self.graphics_dropped / total if total else 0.0
 
-        # try 1000 time to get the data, else raise exception
-        for i in range(1000):
 
-            data = self.read_shared_memory()
-            if data is not None:
-                return data
+class RawPages(NamedTuple):
 
-        else:
-            raise SharedMemoryTimeout("No data available to read")
+    physics: bytes
+    graphics: bytes
+    static: bytes
+    # See ACC_map.in_sync
+    in_sync: Optional[bool] = None
 
-    def close(self) -> None:
-        print("[ASM_Reader]: Closing memory maps.")
-        self.physicSM.close()
-        self.graphicSM.close()
-        self.staticSM.close()
+
+@dataclass
+class StageStats:
+
+    count: int
+    # Seconds
+    total: float
+    mean: float
+    max: float
+    # Number of measures lower or equal to each bound in seconds, like
+    # Prometheus buckets
+    buckets: Dict[str, int]
+
+
+@dataclass
+class MetricsSnapshot:
+
+    polls: int
+    # Polls that returned None, no new frame
+    empty_polls: int
+    frames: int
+    # Seconds between the first poll and the first frame
+    time_to_first_frame: Optional[float]
+    stages: Dict[str, StageStats]
+
+
+class LatencyHistogram:
+    """
+    Fixed buckets histogram of durations in nanoseconds.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    # Upper bounds in nanoseconds, from 1µs to 10ms
+    BOUNDS = (1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000,
+              250_000, 500_000, 1_000_000, 2_500_000, 5_000_000,
+              10_000_000)
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, duration: int) -> None:
+        self.counts[bisect.bisect_left(self.BOUNDS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def stats(self) -> StageStats:
+
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.BOUNDS + (None,), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound is None else f"{bound / 1e9:g}"] = (
+                cumulative)
+
+        return StageStats(self.count, self.total / 1e9,
+                          self.total / self.count / 1e9 if self.count else 0.0,
+                          self.max / 1e9, buckets)
+
+
+class ReadMetrics:
+    """
+    Counters and latency histograms of the accSharedMemory read methods.
+
+    Stages measured: change_detection (looking for a new frame), copy
+    (page copies of the consistent mode, raw and lazy reads),
+    physics_decode, graphics_decode and static (checking the static page
+    for changes). Polls and frames are counted by every read method.
+
+    Pass it to accSharedMemory or set asm.metrics, when metrics is None
+    nothing is measured and the read path is unchanged.
+    """
+
+    STAGES = ("change_detection", "copy", "physics_decode",
+              "graphics_decode", "static")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+
+        self.polls = 0
+        self.empty_polls = 0
+        self.frames = 0
+        self.stages = {stage: LatencyHistogram() for stage in self.STAGES}
+
+        self._first_poll: Optional[int] = None
+        self._first_frame: Optional[int] = None
+
+    def record_poll(self, new_frame: bool, start: int, end: int) -> None:
+        """
+        Record a change detection, start and end in perf_counter_ns.
+        """
+
+        self.polls += 1
+        self.stages["change_detection"].record(end - start)
+
+        if self._first_poll is None:
+            self._first_poll = start
+
+        if not new_frame:
+            self.empty_polls += 1
+
+    def record_frame(self, end: int) -> None:
+
+        self.frames += 1
+        if self._first_frame is None:
+            self._first_frame = end
+
+    @property
+    def time_to_first_frame(self) -> Optional[float]:
+
+        if self._first_frame is None or self._first_poll is None:
+            return None
+
+        return (self._first_frame - self._first_poll) / 1e9
+
+    def snapshot(self) -> MetricsSnapshot:
+
+        return MetricsSnapshot(
+            self.polls, self.empty_polls, self.frames,
+            self.time_to_first_frame,
+            {name: histogram.stats()
+             for name, histogram in self.stages.items()})
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self.snapshot()))
+
+    def to_prometheus(self, prefix: str = "pyacc") -> str:
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+
+        snapshot = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_polls_total counter",
+            f'{prefix}_polls_total{{result="frame"}} {snapshot.frames}',
+            f'{prefix}_polls_total{{result="none"}} {snapshot.empty_polls}',
+        ]
+
+        if snapshot.time_to_first_frame is not None:
+            lines += [
+                f"# TYPE {prefix}_time_to_first_frame_seconds gauge",
+                f"{prefix}_time_to_first_frame_seconds"
+                f" {snapshot.time_to_first_frame:g}",
+            ]
+
+        name = f"{prefix}_stage_seconds"
+        lines.append(f"# TYPE {name} histogram")
+        for stage, stats in snapshot.stages.items():
+            for bound, count in stats.buckets.items():
+                lines.append(
+                    f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats.total:g}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats.count}')
+
+        return "\n".join(lines) + "\n"
+
+
+class accSharedMemory():
+
+    def __init__(self, consistent: bool = False, max_retries: int = 3,
+                 in_place: bool = False,
+                 physic_map: Optional[accSM] = None,
+                 graphic_map: Optional[accSM] = None,
+                 static_map: Optional[accSM] = None,
+                 metrics: Optional[ReadMetrics] = None,
+                 mark_skipped: bool = False) -> None:
+        """
+        Parameters:
+        consistent: copy the physics and graphics pages with
+        copy_consistent_pages before decoding them instead of decoding
+        them from the live mappings, see ACC_map.in_sync.
+        max_retries: retries allowed to get a tear-free copy
+        in_place: read_shared_memory always returns the same ACC_map and
+        updates it in place instead of building a new one per frame.
+        The returned frame is then only valid until the next read, use
+        copy.deepcopy to keep it.
+        physic_map, graphic_map, static_map: pages to read instead of the
+        ACC shared memory, see open_page_file.
+        metrics: ReadMetrics measuring the read methods, None to disable
+        the measures.
+        mark_skipped: set ACC_map.skipped, the number of physics steps
+        skipped since the previous frame, see also drops and lap_drops.
+        """
+
+        if physic_map is None:
+            physic_map = accSM(-1, PHYSICS_PAGE_SIZE,
+                               tagname="Local\\acpmf_physics",
+                               access=mmap.ACCESS_WRITE)
+
+        if graphic_map is None:
+            graphic_map = accSM(-1, GRAPHICS_PAGE_SIZE,
+                                tagname="Local\\acpmf_graphics",
+                                access=mmap.ACCESS_WRITE)
+
+        if static_map is None:
+            static_map = accSM(-1, STATIC_PAGE_SIZE,
+                               tagname="Local\\acpmf_static",
+                               access=mmap.ACCESS_WRITE)
+
+        self.physicSM = physic_map
+        self.graphicSM = graphic_map
+        self.staticSM = static_map
+
+        self.consistent = consistent
+        self.max_retries = max_retries
+        self.in_place = in_place
+        self._frame: Optional[ACC_map] = None
+        self.metrics = metrics
+        self.mark_skipped = mark_skipped
+
+        # Packet id gaps since the creation and per (session index,
+        # completed laps count)
+        self.drops = FrameDrops()
+        self.lap_drops: Dict[Tuple[int, int], FrameDrops] = {}
+        self.skipped = 0
+        # Physics steps skipped since the last frame
+        self._pending_skipped = 0
+
+        self.last_physicsID = 0
+        self.last_graphicsID = 0
+        self._last_suspension_travel: Optional[tuple] = None
+
+        self._static_page: Optional[bytes] = None
+        self._statics: Optional[StaticsMap] = None
+        self._statics_view: Optional[StaticsView] = None
+
+        self._feed: Optional[AsyncFrameFeed] = None
+
+    def _update_static(self) -> None:
+        """
+        The static page doesn't change during a session, only decode
+        it again when its raw bytes are different from the cached ones.
+        """
+
+        metrics = self.metrics
+        start = 0 if metrics is None else time.perf_counter_ns()
+
+        page = self.staticSM[:]
+        if page != self._static_page:
+            self._static_page = page
+            self._statics = None
+            self._statics_view = None
+
+        if metrics is not None:
+            metrics.stages["static"].record(time.perf_counter_ns() - start)
+
+    def read_static(self) -> StaticsMap:
+        """
+        Return the cached StaticsMap, decoded again only when the
+        static page changed since the last read.
+        """
+
+        self._update_static()
+        if self._statics is None:
+            self._statics = read_static_map(self._static_page)
+
+        return self._statics
+
+    def refresh_static(self) -> StaticsMap:
+        """
+        Drop the cached static page and decode it again.
+        """
+
+        self._static_page = None
+        return self.read_static()
+
+    def _lap_drops(self) -> FrameDrops:
+
+        lap = (_SESSION_INDEX.unpack_from(self.graphicSM),
+               _COMPLETED_LAPS.unpack_from(self.graphicSM))
+        drops = self.lap_drops.get(lap)
+        if drops is None:
+            drops = self.lap_drops[lap] = FrameDrops()
+
+        return drops
+
+    def _count_physics_dropped(self, skipped: int) -> None:
+
+        self._pending_skipped += skipped
+        for drops in (self.drops, self._lap_drops()):
+            drops.physics_dropped += skipped
+
+    def _count_physics(self) -> None:
+
+        self.skipped = self._pending_skipped
+        self._pending_skipped = 0
+        for drops in (self.drops, self._lap_drops()):
+            drops.physics_frames += 1
+
+    def _count_graphics(self, graphics_id: int) -> None:
+        """
+        Count a new graphics packet, the packets between it and the
+        previous one were missed.
+        """
+
+        skipped = graphics_id - self.last_graphicsID - 1
+        if self.last_graphicsID == 0 or skipped < 0:
+            # First packet or new session
+            skipped = 0
+
+        self.last_graphicsID = graphics_id
+        for drops in (self.drops, self._lap_drops()):
+            drops.graphics_frames += 1
+            drops.graphics_dropped += skipped
+
+    def reset_drops(self) -> None:
+
+        self.drops = FrameDrops()
+        self.lap_drops = {}
+
+    def _frame_read(self) -> None:
+
+        if self.metrics is not None:
+            self.metrics.record_frame(time.perf_counter_ns())
+
+    def _is_new_frame(self) -> bool:
+        """
+        Only read the packet ids and the suspension travel to know if
+        there is a new frame, see PhysicsMap.is_equal for the latter.
+        """
+
+        metrics = self.metrics
+        start = 0 if metrics is None else time.perf_counter_ns()
+
+        physics_id = _PHYSICS_ID.unpack_from(self.physicSM)
+        graphics_id = _GRAPHICS_ID.unpack_from(self.graphicSM)
+
+        if graphics_id != self.last_graphicsID:
+            self._count_graphics(graphics_id)
+
+        new_frame = False
+        if physics_id != self.last_physicsID:
+            skipped = physics_id - self.last_physicsID - 1
+            if self.last_physicsID == 0 or skipped < 0:
+                # First packet or new session
+                skipped = 0
+
+            self.last_physicsID = physics_id
+            # Counted even if the packet is stale, the steps before it
+            # were missed
+            self._count_physics_dropped(skipped)
+
+            suspension_travel = _SUSPENSION_TRAVEL.unpack_from(self.physicSM)
+            if suspension_travel != self._last_suspension_travel:
+                self._last_suspension_travel = suspension_travel
+                self._count_physics()
+                new_frame = True
+
+        if metrics is not None:
+            metrics.record_poll(new_frame, start, time.perf_counter_ns())
+
+        return new_frame
+
+    def _copy_pages(self) -> Tuple[bytes, bytes, Optional[bool]]:
+
+        metrics = self.metrics
+        start = 0 if metrics is None else time.perf_counter_ns()
+
+        if not self.consistent:
+            pages = self.physicSM[:], self.graphicSM[:], None
+            if metrics is not None:
+                metrics.stages["copy"].record(time.perf_counter_ns() - start)
+            return pages
+
+        physics, graphics, in_sync = copy_consistent_pages(
+            self.physicSM, self.graphicSM, self.max_retries)
+
+        if metrics is not None:
+            metrics.stages["copy"].record(time.perf_counter_ns() - start)
+
+        # The copy can be more recent than the packet checked before, the
+        # checked packet and the ones in between are skipped
+        physics_id = _PHYSICS_ID.unpack_from(physics)
+        if physics_id > self.last_physicsID:
+            later = physics_id - self.last_physicsID
+            self.skipped += later
+            for drops in (self.drops, self._lap_drops()):
+                drops.physics_dropped += later
+
+        graphics_id = _GRAPHICS_ID.unpack_from(graphics)
+        if graphics_id != self.last_graphicsID:
+            self._count_graphics(graphics_id)
+
+        self.last_physicsID = physics_id
+        self._last_suspension_travel = _SUSPENSION_TRAVEL.unpack_from(
+            physics)
+
+        return physics, graphics, in_sync
+
+    def _decode_physics(self, physics: Any) -> PhysicsMap:
+
+        metrics = self.metrics
+        start = 0 if metrics is None else time.perf_counter_ns()
+
+        if self.in_place and self._frame is not None:
+            physics_map = PHYSICS_DECODER.decode_into(physics,
+                                                      self._frame.Physics)
+
+        else:
+            physics_map = read_physic_map(physics)
+
+        if metrics is not None:
+            metrics.stages["physics_decode"].record(
+                time.perf_counter_ns() - start)
+
+        return physics_map
+
+    def _decode_graphics(self, graphics: Any) -> GraphicsMap:
+
+        metrics = self.metrics
+        start = 0 if metrics is None else time.perf_counter_ns()
+
+        if self.in_place and self._frame is not None:
+            graphics_map = GRAPHICS_DECODER.decode_into(graphics,
+                                                        self._frame.Graphics)
+
+        else:
+            graphics_map = read_graphics_map(graphics)
+
+        if metrics is not None:
+            metrics.stages["graphics_decode"].record(
+                time.perf_counter_ns() - start)
+
+        return graphics_map
+
+    def _make_frame(self, physics: PhysicsMap, graphics: GraphicsMap,
+                    statics: StaticsMap, in_sync: Optional[bool]
+                    ) -> ACC_map:
+
+        skipped = self.skipped if self.mark_skipped else None
+
+        if not self.in_place:
+            return ACC_map(physics, graphics, statics, in_sync, skipped)
+
+        if self._frame is None:
+            self._frame = ACC_map(physics, graphics, statics, in_sync,
+                                  skipped)
+
+        else:
+            self._frame.Static = statics
+            self._frame.in_sync = in_sync
+            self._frame.skipped = skipped
+
+        return self._frame
+
+    def read_shared_memory(self) -> Optional[ACC_map]:
+
+        if not self._is_new_frame():
+            return None
+
+        physics, graphics, in_sync = self.physicSM, self.graphicSM, None
+        if self.consistent:
+            physics, graphics, in_sync = self._copy_pages()
+
+        frame = self._make_frame(self._decode_physics(physics),
+                                 self._decode_graphics(graphics),
+                                 self.read_static(), in_sync)
+        self._frame_read()
+        return frame
+
+    def read_raw_pages(self) -> Optional[RawPages]:
+        """
+        Same as read_shared_memory but return copies of the raw pages.
+        """
+
+        if not self._is_new_frame():
+            return None
+
+        physics, graphics, in_sync = self._copy_pages()
+        self._update_static()
+
+        self._frame_read()
+        return RawPages(physics, graphics, self._static_page, in_sync)
+
+    def read_projection(self, projection: FieldProjection
+                        ) -> Optional[tuple]:
+        """
+        Same as read_shared_memory but only decode the fields of the
+        projection, straight from the shared memory.
+        """
+
+        if not self._is_new_frame():
+            return None
+
+        physics, graphics = self.physicSM, self.graphicSM
+        if self.consistent:
+            physics, graphics, _ = self._copy_pages()
+
+        values = projection.decode(physics, graphics, self.staticSM)
+        self._frame_read()
+        return values
+
+    def read_shared_memory_lazy(self) -> Optional[ACC_map]:
+        """
+        Same as read_shared_memory but return lazy page views.
+
+        Each page is copied once and fields are only decoded when
+        accessed, which is cheaper when only a few channels are used.
+        """
+
+        if not self._is_new_frame():
+            return None
+
+        physics, graphics, in_sync = self._copy_pages()
+
+        self._update_static()
+        if self._statics_view is None:
+            self._statics_view = StaticsView(self._static_page)
+
+        self._frame_read()
+        return ACC_map(PhysicsView(physics), GraphicsView(graphics),
+                       self._statics_view, in_sync,
+                       self.skipped if self.mark_skipped else None)
+
+    def get_shared_memory_data(self, timeout: float = 1.0,
+                               rate: float = 333.0) -> ACC_map:
+        """
+        Wait for a new frame, polling at the given rate.
+
+        Parameters:
+        timeout: seconds to wait before raising SharedMemoryTimeout
+        rate: poll rate in Hz
+
+        Return:
+        result: ACC_map
+        """
+
+        return SharedMemoryPoller(self, rate).poll(timeout)
+
+    def frames(self, rate: float = 333.0,
+               timeout: Optional[float] = None) -> AsyncIterator[ACC_map]:
+        """
+        Asynchronous iterator over new frames.
+
+        Every iterator of the same accSharedMemory shares a single poll
+        task, a frame is decoded once whatever the number of consumers.
+
+        Parameters:
+        rate: poll rate in Hz, the fastest requested rate is used
+        timeout: seconds to wait for a frame before raising
+        SharedMemoryTimeout, wait forever if None
+        """
+
+        if self._feed is None:
+            self._feed = AsyncFrameFeed(self, rate)
+
+        else:
+            self._feed.interval = min(self._feed.interval, 1.0 / rate)
+
+        return self._feed.frames(timeout)
+
+    def close(self) -> None:
+        print("[ASM_Reader]: Closing memory maps.")
+        self.physicSM.close()
+        self.graphicSM.close()
+        self.staticSM.close()
+
+
+@dataclass
+class PollerStats:
+
+    polls: int
+    frames: int
+    # Frames per second since the first frame
+    rate: float
+    # Mean and standard deviation of the time between frames in seconds
+    interval: float
+    jitter: float
+
+
+# Usual oversleep of time.sleep, the high resolution timer of Windows
+# still wakes up to 1ms late
+_SLEEP_RESOLUTION = 0.001 if sys.platform == "win32" else 0.0002
+
+
+class SharedMemoryPoller:
+    """
+    Poll an accSharedMemory at a target rate without pinning a core.
+
+    Between polls the poller sleeps until shortly before the next tick
+    and only spins for the last spin_time seconds, sleeping alone is
+    too coarse on Windows to hit a 3ms physics step.
+    """
+
+    def __init__(self, asm: accSharedMemory, rate: float = 333.0,
+                 spin_time: Optional[float] = None,
+                 read: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Parameters:
+        asm: accSharedMemory to poll
+        rate: poll rate in Hz
+        spin_time: seconds spent spinning before each tick, by default
+        a tenth of the poll interval capped at the sleep resolution of
+        the platform
+        read: read method to poll, asm.read_shared_memory by default
+        """
+
+        if rate <= 0:
+            raise ValueError("rate must be strictly positive")
+
+        self.asm = asm
+        self._read_frame = asm.read_shared_memory if read is None else read
+        self.interval = 1.0 / rate
+        if spin_time is None:
+            spin_time = min(self.interval / 10, _SLEEP_RESOLUTION)
+        self.spin_time = spin_time
+
+        self._next_tick = time.perf_counter()
+        self._polls = 0
+        self._frames = 0
+        self._first_frame = 0.0
+        self._last_frame = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def _wait_next_tick(self, deadline: float) -> None:
+
+        now = time.perf_counter()
+        self._next_tick += self.interval
+        if self._next_tick < now:
+            # Late, don't try to catch up the missed ticks
+            self._next_tick = now + self.interval
+
+        target = min(self._next_tick, deadline)
+        remaining = target - now
+        if remaining > self.spin_time:
+            time.sleep(remaining - self.spin_time)
+
+        while time.perf_counter() < target:
+            pass
+
+    def _record_frame(self) -> None:
+
+        now = time.perf_counter()
+        self._frames += 1
+
+        if self._frames == 1:
+            self._first_frame = now
+
+        else:
+            # Welford's online mean and variance of the frame interval
+            interval = now - self._last_frame
+            count = self._frames - 1
+            delta = interval - self._mean
+            self._mean += delta / count
+            self._m2 += delta * (interval - self._mean)
+
+        self._last_frame = now
+
+    def read(self) -> Optional[ACC_map]:
+        """
+        Single non blocking poll of the read method
+        """
+
+        self._polls += 1
+        data = self._read_frame()
+        if data is not None:
+            self._record_frame()
+
+        return data
+
+    def poll(self, timeout: Optional[float] = None) -> ACC_map:
+        """
+        Wait for the next new frame.
+
+        Parameters:
+        timeout: seconds to wait before raising SharedMemoryTimeout,
+        wait forever if None
+
+        Return:
+        result: ACC_map
+        """
+
+        deadline = math.inf
+        if timeout is not None:
+            deadline = time.perf_counter() + timeout
+
+        while True:
+            data = self.read()
+            if data is not None:
+                return data
+
+            if time.perf_counter() >= deadline:
+                raise SharedMemoryTimeout("No data available to read")
+
+            self._wait_next_tick(deadline)
+
+    def __iter__(self) -> Iterator[ACC_map]:
+        while True:
+            yield self.poll()
+
+    def stats(self) -> PollerStats:
+
+        intervals = self._frames - 1
+        elapsed = self._last_frame - self._first_frame
+
+        return PollerStats(
+            polls=self._polls,
+            frames=self._frames,
+            rate=intervals / elapsed if elapsed > 0 else 0.0,
+            interval=self._mean,
+            jitter=math.sqrt(self._m2 / intervals) if intervals > 0 else 0.0,
+        )
+
+
+class AsyncFrameFeed:
+    """
+    Poll an accSharedMemory from a single asyncio task and share the
+    latest frame with every waiting coroutine.
+
+    The poll task is started by the first consumer and cancelled when
+    the last one leaves. If a read raises, the poll task stops and the
+    exception is raised to every consumer until the last one leaves.
+    """
+
+    def __init__(self, asm: accSharedMemory, rate: float = 333.0) -> None:
+
+        if rate <= 0:
+            raise ValueError("rate must be strictly positive")
+
+        self.asm = asm
+        self.interval = 1.0 / rate
+        self.latest: Optional[ACC_map] = None
+        self.sequence = 0
+        # Exception raised by the last read, the poll task stopped
+        self.error: Optional[Exception] = None
+
+        self._condition: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._consumers = 0
+
+    async def _run(self) -> None:
+
+        while True:
+            try:
+                data = self.asm.read_shared_memory()
+
+            except Exception as error:
+                self.error = error
+                async with self._condition:
+                    self._condition.notify_all()
+                return
+
+            if data is not None:
+                self.latest = data
+                self.sequence += 1
+                async with self._condition:
+                    self._condition.notify_all()
+
+            await asyncio.sleep(self.interval)
+
+    def _start(self) -> None:
+
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        if self.error is None and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+
+    def _stop(self) -> None:
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        self.error = None
+
+    async def next_frame(self, sequence: int = -1,
+                         timeout: Optional[float] = None
+                         ) -> Tuple[int, ACC_map]:
+        """
+        Wait for a frame more recent than sequence.
+
+        Parameters:
+        sequence: sequence of the last frame seen, -1 to get the latest
+        frame right away if there is one
+        timeout: seconds to wait before raising SharedMemoryTimeout
+
+        Return:
+        result: (sequence of the frame, ACC_map)
+
+        Raise the exception of the read that stopped the poll task.
+        """
+
+        self._start()
+        if self.error is not None:
+            raise self.error
+
+        if sequence == -1 and self.latest is not None:
+            return self.sequence, self.latest
+
+        async with self._condition:
+            try:
+                await asyncio.wait_for(self._condition.wait_for(
+                    lambda: self.sequence > sequence
+                    or self.error is not None), timeout)
+
+            except asyncio.TimeoutError:
+                raise SharedMemoryTimeout(
+                    "No data available to read") from None
+
+        if self.error is not None:
+            raise self.error
+
+        return self.sequence, self.latest
+
+    async def frames(self, timeout: Optional[float] = None
+                     ) -> AsyncIterator[ACC_map]:
+
+        self._consumers += 1
+        sequence = self.sequence
+
+        try:
+            while True:
+                sequence, data = await self.next_frame(sequence, timeout)
+                yield data
+
+        finally:
+            self._consumers -= 1
+            if self._consumers == 0:
+                self._stop()
+
+
+class CapturedFrame(NamedTuple):
+    """
+    Raw pages of a captured frame, decode them with read_physic_map and
+    read_graphics_map or lazily with physics_view and graphics_view.
+    """
+
+    physics_id: int
+    graphics_id: int
+    # time.perf_counter_ns() when the frame was captured
+    timestamp: int
+    physics: bytes
+    graphics: bytes
+
+    def physics_view(self) -> PhysicsView:
+        return PhysicsView(self.physics)
+
+    def graphics_view(self) -> GraphicsView:
+        return GraphicsView(self.graphics)
+
+
+class PageCapture:
+    """
+    Copy every new physics step into a preallocated ring buffer from a
+    background thread.
+
+    The thread only copies raw pages into fixed bytearray slots, the
+    decoding is left to the consumer which drains frames in batches.
+    When the consumer falls behind by more than capacity frames the
+    oldest ones are overwritten and counted in overruns.
+    """
+
+    def __init__(self, asm: accSharedMemory, capacity: int = 4096,
+                 poll_interval: float = 0.0005, max_retries: int = 3
+                 ) -> None:
+
+        if capacity <= 0:
+            raise ValueError("capacity must be strictly positive")
+
+        self.asm = asm
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.overruns = 0
+
+        self._physics = bytearray(capacity * PHYSICS_PAGE_SIZE)
+        self._graphics = bytearray(capacity * GRAPHICS_PAGE_SIZE)
+        self._physics_ids = array.array("i", bytes(4 * capacity))
+        self._graphics_ids = array.array("i", bytes(4 * capacity))
+        self._timestamps = array.array("q", bytes(8 * capacity))
+
+        # Total number of frames written and read, the slot of a frame
+        # is its number modulo capacity.
+        self._written = 0
+        self._read = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._running = threading.Event()
+
+    def _capture(self) -> None:
+
+        physics_src = memoryview(self.asm.physicSM)
+        graphics_src = memoryview(self.asm.graphicSM)
+        physics_view = memoryview(self._physics)
+        graphics_view = memoryview(self._graphics)
+
+        physics_slots = [
+            physics_view[i * PHYSICS_PAGE_SIZE:(i + 1) * PHYSICS_PAGE_SIZE]
+            for i in range(self.capacity)]
+        graphics_slots = [
+            graphics_view[i * GRAPHICS_PAGE_SIZE:(i + 1) * GRAPHICS_PAGE_SIZE]
+            for i in range(self.capacity)]
+
+        last_id = None
+
+        try:
+            while self._running.is_set():
+                physics_id = _PHYSICS_ID.unpack_from(physics_src)
+                if physics_id == last_id:
+                    time.sleep(self.poll_interval)
+                    continue
+
+                slot = self._written % self.capacity
+                physics_slot = physics_slots[slot]
+                graphics_slot = graphics_slots[slot]
+
+                for _ in range(self.max_retries + 1):
+                    physics_slot[:] = physics_src
+                    graphics_slot[:] = graphics_src
+                    physics_id = _PHYSICS_ID.unpack_from(physics_slot)
+                    if physics_id == _PHYSICS_ID.unpack_from(physics_src):
+                        break
+
+                self._physics_ids[slot] = physics_id
+                self._graphics_ids[slot] = _GRAPHICS_ID.unpack_from(
+                    graphics_slot)
+                self._timestamps[slot] = time.perf_counter_ns()
+                self._written += 1
+                last_id = physics_id
+
+        finally:
+            for view in physics_slots + graphics_slots:
+                view.release()
+
+            physics_view.release()
+            graphics_view.release()
+            physics_src.release()
+            graphics_src.release()
+
+    def start(self) -> None:
+
+        if self._thread is not None:
+            return
+
+        self._running.set()
+        self._thread = threading.Thread(
+            target=self._capture, name="PageCapture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+
+        if self._thread is None:
+            return
+
+        self._running.clear()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> PageCapture:
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def __len__(self) -> int:
+        return min(self._written - self._read, self.capacity)
+
+    def drain(self, max_frames: Optional[int] = None) -> List[CapturedFrame]:
+        """
+        Remove and return the captured frames, oldest first.
+
+        Parameters:
+        max_frames: maximum number of frames to return, all if None
+
+        Return:
+        result: list of CapturedFrame
+        """
+
+        written = self._written
+        if written - self._read > self.capacity:
+            self.overruns += written - self._read - self.capacity
+            self._read = written - self.capacity
+
+        end = written
+        if max_frames is not None:
+            end = min(end, self._read + max_frames)
+
+        frames = []
+        for number in range(self._read, end):
+            slot = number % self.capacity
+            physics = PHYSICS_PAGE_SIZE * slot
+            graphics = GRAPHICS_PAGE_SIZE * slot
+
+            frame = CapturedFrame(
+                self._physics_ids[slot],
+                self._graphics_ids[slot],
+                self._timestamps[slot],
+                bytes(self._physics[physics:physics + PHYSICS_PAGE_SIZE]),
+                bytes(self._graphics[graphics:graphics + GRAPHICS_PAGE_SIZE]),
+            )
+
+            # The slot was overwritten by the capture thread while copied
+            if self._written - number >= self.capacity:
+                self.overruns += 1
+                continue
+
+            frames.append(frame)
+
+        self._read = end
+        return frames
+
+
+_WHEEL_NAMES = ("front_left", "front_right", "rear_left", "rear_right")
+_AXIS_NAMES = ("x", "y", "z")
+
+# Path of each value inside the objects built by a converter
+_ELEMENT_NAMES: Dict[Callable, Tuple[str, ...]] = {
+    _vector3f: tuple(f".{axis}" for axis in _AXIS_NAMES),
+    _vector3f_list: tuple(f"[{i}].{axis}" for i in range(60)
+                          for axis in _AXIS_NAMES),
+    _wheels: tuple(f".{wheel}" for wheel in _WHEEL_NAMES),
+    _car_damage: (".front", ".rear", ".left", ".right", ".center"),
+    _contact_point: tuple(f".{wheel}.{axis}" for wheel in _WHEEL_NAMES
+                          for axis in _AXIS_NAMES),
+}
+
+
+class _ChangeUnit(NamedTuple):
+
+    path: str
+    start: int
+    stop: int
+    packer: struct.Struct
+    converter: Optional[Callable]
+    tolerance: float
+
+
+class _PageDiff:
+    """
+    Compare two copies of a page value by value using their byte range.
+
+    The page is split in blocks and only the values of the blocks that
+    differ are compared and decoded.
+    """
+
+    BLOCK_SIZE = 64
+
+    def __init__(self, decoder: PageDecoder, tolerances: Dict[str, float],
+                 matched: set) -> None:
+
+        self.units: List[_ChangeUnit] = []
+        # The most specific key wins
+        keys = sorted(tolerances, key=len)
+
+        for name, (field, converter) in decoder.attributes.items():
+            path = f"{decoder.layout.name}.{name}"
+
+            if field.is_scalar:
+                values = [(path, field.offset, field.packer, converter)]
+
+            else:
+                packer = struct.Struct(f"={field.kind}")
+                names = _ELEMENT_NAMES.get(
+                    converter, [f"[{i}]" for i in range(field.count)])
+                values = [(path + names[i], field.offset + i * packer.size,
+                           packer, None) for i in range(field.count)]
+
+            for value_path, start, packer, value_converter in values:
+                tolerance = 0.0
+                for key in keys:
+                    if value_path == key or value_path.startswith(
+                            (f"{key}.", f"{key}[")):
+                        if field.kind == "s":
+                            raise ValueError(f"{key} is a string and can't"
+                                             " have a tolerance")
+
+                        tolerance = tolerances[key]
+                        matched.add(key)
+
+                self.units.append(_ChangeUnit(
+                    value_path, start, start + packer.size, packer,
+                    value_converter, tolerance))
+
+        size = decoder.layout.size
+        self.blocks: List[Tuple[int, int, List[_ChangeUnit]]] = []
+        for start in range(0, size, self.BLOCK_SIZE):
+            stop = min(start + self.BLOCK_SIZE, size)
+            units = [unit for unit in self.units
+                     if unit.start < stop and unit.stop > start]
+            self.blocks.append((start, stop, units))
+
+        # Last reported value of the values with a tolerance
+        self._reported: Dict[str, Any] = {}
+
+    def _report(self, unit: _ChangeUnit, page: bytes,
+                changes: Dict[str, Any]) -> None:
+
+        value = unit.packer.unpack_from(page, unit.start)[0]
+
+        if unit.tolerance:
+            reported = self._reported.get(unit.path)
+            if (reported is not None
+                    and abs(value - reported) <= unit.tolerance):
+                return
+
+            self._reported[unit.path] = value
+
+        changes[unit.path] = (value if unit.converter is None
+                              else unit.converter(value))
+
+    def diff(self, old: Optional[bytes], new: bytes,
+             changes: Dict[str, Any]) -> None:
+
+        if old is None:
+            for unit in self.units:
+                self._report(unit, new, changes)
+
+        elif old != new:
+            for start, stop, units in self.blocks:
+                if old[start:stop] == new[start:stop]:
+                    continue
+
+                for unit in units:
+                    if (old[unit.start:unit.stop]
+                            != new[unit.start:unit.stop]):
+                        self._report(unit, new, changes)
+
+
+class ChangeTracker:
+    """
+    Report the values that changed since the previous frame.
+
+    Pages are compared raw, byte range by byte range, so the values that
+    didn't change are never decoded. Changes are reported by path like
+    "Graphics.flag" or "Physics.tyre_core_temp.front_left", composite
+    values (Wheels, Vector3f, ...) are split in their single values.
+    """
+
+    def __init__(self, asm: accSharedMemory,
+                 tolerances: Optional[Dict[str, float]] = None) -> None:
+        """
+        Parameters:
+        asm: accSharedMemory to read the pages from
+        tolerances: smallest change reported for a path, a path applies
+        to every value under it, e.g. {"Physics.tyre_core_temp": 0.1}
+        """
+
+        tolerances = {} if tolerances is None else tolerances
+        matched = set()
+
+        self.asm = asm
+        self._diffs = (
+            _PageDiff(PHYSICS_DECODER, tolerances, matched),
+            _PageDiff(GRAPHICS_DECODER, tolerances, matched),
+            _PageDiff(STATIC_DECODER, tolerances, matched),
+        )
+
+        unknown = set(tolerances) - matched
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        self._pages: Tuple[Optional[bytes], ...] = (None, None, None)
+
+    @property
+    def paths(self) -> List[str]:
+        return [unit.path for diff in self._diffs for unit in diff.units]
+
+    def diff(self, pages: RawPages) -> Dict[str, Any]:
+        """
+        Compare the pages with the ones of the previous call, everything
+        is reported the first time.
+
+        Return:
+        result: new value of each changed path, in page order
+        """
+
+        current = (pages.physics, pages.graphics, pages.static)
+        changes: Dict[str, Any] = {}
+
+        for diff, old, new in zip(self._diffs, self._pages, current):
+            diff.diff(old, new, changes)
+
+        self._pages = current
+        return changes
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """
+        Changes of the next frame or None if there is no new frame,
+        can be polled with SharedMemoryPoller(asm, read=tracker.read).
+        """
+
+        pages = self.asm.read_raw_pages()
+        if pages is None:
+            return None
+
+        return self.diff(pages)
+
+    def reset(self) -> None:
+        """
+        Forget the previous frame, everything is reported again.
+        """
+
+        self._pages = (None, None, None)
+        for diff in self._diffs:
+            diff._reported.clear()
 
 
 def simple_test() -> None:
@@ -0,0 +1,39 @@
+import os
+import sys
+from typing import Dict
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pyacc_loadgen import LoadGenerator  # noqa: E402
+from pyaccsharedmemory import (GRAPHICS_PAGE_SIZE,  # noqa: E402
+                               PHYSICS_PAGE_SIZE, STATIC_PAGE_SIZE,
+                               accSharedMemory, accSM)
+
+
+@pytest.fixture
+def pages() -> Dict[str, accSM]:
+    """
+    Anonymous maps standing in for the ACC pages, usable as
+    accSharedMemory arguments.
+    """
+
+    return {
+        "physic_map": accSM(-1, PHYSICS_PAGE_SIZE),
+        "graphic_map": accSM(-1, GRAPHICS_PAGE_SIZE),
+        "static_map": accSM(-1, STATIC_PAGE_SIZE),
+    }
+
+
+@pytest.fixture
+def asm(pages) -> accSharedMemory:
+
+    asm = accSharedMemory(**pages)
+    yield asm
+    asm.close()
+
+
+@pytest.fixture
+def generator(pages) -> LoadGenerator:
+    return LoadGenerator(pages, opponents=5)
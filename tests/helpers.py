@@ -0,0 +1,49 @@
+import base64
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+from pyaccsharedmemory import PHYSICS_LAYOUT, PageLayout
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def load_frames() -> List[Tuple[Dict[str, bytes], Dict[str, str]]]:
+    """
+    Random pages and their decoding by the read functions of the 1.0.0
+    release, which read the pages field by field.
+    """
+
+    with open(os.path.join(DATA, "baseline_frames.json")) as file:
+        frames = json.load(file)["frames"]
+
+    return [({page: base64.b64decode(frame[page])
+              for page in ("physics", "graphics", "static")},
+             frame["expected"]) for frame in frames]
+
+
+def write_field(page: Any, layout: PageLayout, name: str, value: Any
+                ) -> None:
+    """
+    Write a raw value, or a tuple of them, at the offset of a field.
+    """
+
+    field = layout.fields[name]
+    if field.is_scalar:
+        field.packer.pack_into(page, field.offset, value)
+
+    else:
+        field.packer.pack_into(page, field.offset, *value)
+
+
+def write_step(page: Any, packet_id: int, suspension: Any = None) -> None:
+    """
+    Write a new physics step. The readers compare the suspension travel
+    to tell a new step from a stale packet, it moves with every step.
+    """
+
+    if suspension is None:
+        suspension = (packet_id * 1e-3,) * 4
+
+    write_field(page, PHYSICS_LAYOUT, "packetID", packet_id)
+    write_field(page, PHYSICS_LAYOUT, "suspensionTravel", suspension)
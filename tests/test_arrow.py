@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from helpers import load_frames, write_field, write_step
+from pyacc_arrow import (STATIC_METADATA_KEY, ParquetExporter, export_session,
+                         record_batch)
+from pyacc_session import SessionRecorder
+from pyaccsharedmemory import (GRAPHICS_LAYOUT, STATIC_LAYOUT,
+                               read_graphics_map, read_physic_map)
+
+FRAMES = [pages for pages, _ in load_frames()]
+
+
+def utf16(text, length):
+    return text.encode("utf-16-le").ljust(2 * length, b"\x00")
+
+
+def write_steps(asm, steps):
+
+    write_field(asm.staticSM, STATIC_LAYOUT, "track", utf16("monza", 33))
+    write_field(asm.staticSM, STATIC_LAYOUT, "numCars", 20)
+
+    for step in range(1, steps + 1):
+        write_step(asm.physicSM, step)
+        write_field(asm.graphicSM, GRAPHICS_LAYOUT, "packetID", step)
+        yield asm.read_raw_pages()
+
+
+def test_record_batch():
+
+    batch = record_batch([pages["physics"] for pages in FRAMES],
+                         [pages["graphics"] for pages in FRAMES],
+                         timestamps=[1, 2, 3])
+    columns = batch.to_pydict()
+
+    assert batch.num_rows == len(FRAMES)
+    assert columns["timestamp"] == [1, 2, 3]
+    assert batch.schema.metadata is None
+
+    for i, pages in enumerate(FRAMES):
+        physics = read_physic_map(pages["physics"])
+        graphics = read_graphics_map(pages["graphics"])
+
+        assert columns["physics_packed_id"][i] == physics.packed_id
+        assert columns["graphics_packed_id"][i] == graphics.packed_id
+        assert np.array_equal(columns["tyre_core_temp_rl"][i],
+                              physics.tyre_core_temp.rear_left,
+                              equal_nan=True)
+        assert np.array_equal(columns["velocity_z"][i], physics.velocity.z,
+                              equal_nan=True)
+        assert np.array_equal(
+            columns["car_coordinates_y"][i],
+            [car.y for car in graphics.car_coordinates], equal_nan=True)
+        assert columns["status"][i] == graphics.status.name
+        assert columns["penalty"][i] == graphics.penalty.name
+        assert columns["is_in_pit"][i] is graphics.is_in_pit
+
+
+def test_record_batch_unknown_enums(asm):
+
+    pages = next(write_steps(asm, 1))
+    graphics = bytearray(pages.graphics)
+    write_field(graphics, GRAPHICS_LAYOUT, "penalty", 99)
+    write_field(graphics, GRAPHICS_LAYOUT, "session", 42)
+    write_field(graphics, GRAPHICS_LAYOUT, "flag", 99)
+
+    batch = record_batch([pages.physics], [bytes(graphics)])
+    # Same values as read_graphics_map, null for the enums without one
+    assert batch.column("penalty").to_pylist() == ["UnknownValue"]
+    assert batch.column("session_type").to_pylist() == ["ACC_UNKNOW"]
+    assert batch.column("flag").to_pylist() == [None]
+
+
+def test_parquet_row_groups(tmp_path, asm):
+
+    path = str(tmp_path / "session.parquet")
+    with ParquetExporter(path, row_group_size=4) as exporter:
+        for step, pages in enumerate(write_steps(asm, 10)):
+            exporter.write(pages, step)
+
+    file = pq.ParquetFile(path)
+    assert file.metadata.num_rows == 10
+    assert file.num_row_groups == 3
+    assert [file.metadata.row_group(i).num_rows for i in range(3)] == [
+        4, 4, 2]
+
+    statics = json.loads(file.schema_arrow.metadata[STATIC_METADATA_KEY])
+    assert statics["track"] == "monza"
+    assert statics["num_cars"] == 20
+
+    table = file.read()
+    assert table.column("timestamp").to_pylist() == list(range(10))
+    assert table.column("physics_packed_id").to_pylist() == list(
+        range(1, 11))
+
+
+def test_export_session(tmp_path, asm):
+
+    path = str(tmp_path / "session.bin")
+    with SessionRecorder(path) as recorder:
+        for step, pages in enumerate(write_steps(asm, 10)):
+            recorder.write(pages, step)
+
+    parquet_path = str(tmp_path / "session.parquet")
+    export_session(path, parquet_path, row_group_size=8)
+
+    table = pq.read_table(parquet_path)
+    assert table.column("graphics_packed_id").to_pylist() == list(
+        range(1, 11))
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from helpers import write_field, write_step
+from pyaccsharedmemory import GRAPHICS_LAYOUT, SharedMemoryTimeout
+
+
+def test_async_frames(asm):
+
+    async def consume():
+        frames = []
+        async for frame in asm.frames(rate=1000, timeout=1.0):
+            frames.append(frame)
+            if len(frames) == 3:
+                return frames
+
+            write_step(asm.physicSM, len(frames) + 1)
+
+    write_step(asm.physicSM, 1)
+    frames = asyncio.run(consume())
+    assert [frame.Physics.packed_id for frame in frames] == [1, 2, 3]
+    assert asm._feed._task is None
+
+
+def test_async_consumers_share_frames(asm):
+
+    async def consume(count):
+        frames = []
+        async for frame in asm.frames(rate=1000, timeout=1.0):
+            frames.append(frame)
+            if len(frames) == count:
+                return frames
+
+    async def main():
+        consumers = asyncio.gather(consume(3), consume(3))
+        for packet_id in range(1, 4):
+            await asyncio.sleep(0.01)
+            write_step(asm.physicSM, packet_id)
+
+        return await consumers
+
+    first, second = asyncio.run(main())
+    assert [frame.Physics.packed_id for frame in first] == [1, 2, 3]
+    # Decoded once for every consumer
+    assert all(a is b for a, b in zip(first, second))
+
+
+def test_async_frames_timeout(asm):
+
+    async def consume():
+        async for _ in asm.frames(rate=1000, timeout=0.05):
+            pass
+
+    with pytest.raises(SharedMemoryTimeout):
+        asyncio.run(consume())
+
+
+def test_async_frames_raise_read_errors(asm):
+
+    write_step(asm.physicSM, 1)
+    # Not an ACC_STATUS value, the decode raises
+    write_field(asm.graphicSM, GRAPHICS_LAYOUT, "status", 9)
+
+    async def consume():
+        async for frame in asm.frames(rate=1000):
+            return frame
+
+    async def main():
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(consume(), 2.0)
+
+        # The feed polls again for the next consumer
+        write_field(asm.graphicSM, GRAPHICS_LAYOUT, "status", 2)
+        write_step(asm.physicSM, 2)
+        return await asyncio.wait_for(consume(), 2.0)
+
+    assert asyncio.run(main()).Physics.packed_id == 2
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..",
+                                "benchmarks"))
+
+import bench_decode  # noqa: E402
+
+
+def results(**cases):
+    return {"results": cases}
+
+
+def test_run():
+
+    result = bench_decode.run(iterations=20, repeat=2)
+
+    assert result["repeat"] == 2
+    assert result["results"]["decode.read_physic_map"]["mean_us"] > 0
+    assert result["results"]["read.read_shared_memory"][
+        "frames_per_second"] > 0
+    assert "memory.read_shared_memory" in result["results"]
+    assert result["spread"]["decode.read_physic_map"]["mean_us"] >= 0
+
+
+def test_spread():
+
+    assert bench_decode.spread([1.0, 2.0, 4.0]) == pytest.approx(1.5)
+    assert bench_decode.spread([0.0, 0.0]) == 0.0
+
+
+@pytest.mark.parametrize("value, regressed", [(1.05, False), (1.2, True),
+                                              (0.5, False)])
+def test_compare(value, regressed):
+
+    baseline = results(**{"decode.read_physic_map": {"mean_us": 1.0}})
+    result = results(**{"decode.read_physic_map": {"mean_us": value}})
+
+    assert bool(bench_decode.compare(result, baseline, 0.1)) is regressed
+
+
+def test_compare_ignores_spread():
+
+    case = "decode.read_physic_map"
+    baseline = results(**{case: {"mean_us": 1.0}})
+    result = results(**{case: {"mean_us": 1.2}})
+    result["spread"] = {case: {"mean_us": 0.3}}
+
+    # A noisy run doesn't widen the tolerance, it's reported on its own
+    assert bench_decode.compare(result, baseline, 0.1)
+    assert bench_decode.noisy(result, baseline, 0.1) == [
+        f"{case} mean_us: spread 0.0% -> 30.0%"]
+    assert bench_decode.noisy(result, baseline, 0.5) == []
+
+
+def test_noisy_skips_ungated_metrics():
+
+    case = "read.read_shared_memory"
+    baseline = results(**{case: {"p99_us": 1.0, "mean_us": 1.0}})
+    baseline["spread"] = {case: {"p99_us": 0.9, "mean_us": 0.05}}
+
+    assert bench_decode.noisy(baseline, baseline, 0.1) == []
+
+
+def test_compare_skips_ungated_metrics():
+
+    case = "read.read_shared_memory"
+    baseline = results(**{case: {"p99_us": 1.0}})
+    result = results(**{case: {"p99_us": 5.0}})
+
+    assert bench_decode.compare(result, baseline, 0.1) == []
+
+
+def test_compare_higher_is_better():
+
+    case = "read.read_shared_memory_lazy"
+    baseline = results(**{case: {"frames_per_second": 1000.0}})
+
+    slower = results(**{case: {"frames_per_second": 800.0}})
+    assert bench_decode.compare(slower, baseline, 0.1)
+
+    faster = results(**{case: {"frames_per_second": 1500.0}})
+    assert not bench_decode.compare(faster, baseline, 0.1)
+
+
+def test_compare_skips_gc_and_new_cases():
+
+    baseline = results(**{"gc.read_shared_memory": {"gc_pause_max_us": 1.0}})
+    result = results(**{"gc.read_shared_memory": {"gc_pause_max_us": 10.0},
+                        "decode.read_physic_map": {"mean_us": 1.0}})
+
+    assert bench_decode.compare(result, baseline, 0.1) == []
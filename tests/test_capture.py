@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from helpers import write_step
+from pyaccsharedmemory import PageCapture
+
+
+def wait_written(capture, written):
+
+    deadline = time.monotonic() + 2.0
+    while capture._written < written:
+        assert time.monotonic() < deadline, "Frame not captured"
+        time.sleep(0.0005)
+
+
+def capture_steps(capture, asm, steps):
+
+    # The page found when the capture starts is the first frame
+    wait_written(capture, 1)
+    assert capture.drain()[0].physics_id == 0
+
+    expected = []
+    for packet_id in range(1, steps + 1):
+        write_step(asm.physicSM, packet_id)
+        expected.append((asm.physicSM[:], asm.graphicSM[:]))
+        wait_written(capture, capture._written + 1)
+
+    return expected
+
+
+def test_capture(asm):
+
+    with PageCapture(asm, capacity=16, poll_interval=0.0001) as capture:
+        expected = capture_steps(capture, asm, 10)
+        assert len(capture) == 10
+
+        frames = capture.drain(4) + capture.drain()
+
+    assert [(frame.physics, frame.graphics)
+            for frame in frames] == expected
+    assert [frame.physics_id for frame in frames] == list(range(1, 11))
+    assert capture.overruns == 0
+    assert capture.drain() == []
+
+
+def test_capture_overruns(asm):
+
+    with PageCapture(asm, capacity=4, poll_interval=0.0001) as capture:
+        expected = capture_steps(capture, asm, 10)
+        assert len(capture) == 4
+
+        frames = capture.drain()
+
+    # The oldest slot of a full ring can be overwritten while copied,
+    # it's counted as an overrun too
+    assert [(frame.physics, frame.graphics)
+            for frame in frames] == expected[-3:]
+    assert capture.overruns == 7
+
+
+def test_capture_checks_capacity(asm):
+
+    with pytest.raises(ValueError):
+        PageCapture(asm, capacity=0)
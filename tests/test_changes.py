@@ -0,0 +1,84 @@
+import pytest
+
+from helpers import write_field, write_step
+from pyaccsharedmemory import (GRAPHICS_LAYOUT, PHYSICS_LAYOUT,
+                               ACC_FLAG_TYPE, ChangeTracker,
+                               SharedMemoryPoller)
+
+TEMPERATURES = "Physics.tyre_core_temp"
+SUSPENSION = [f"Physics.suspension_travel.{wheel}" for wheel in (
+    "front_left", "front_right", "rear_left", "rear_right")]
+
+
+def write_temperatures(asm, front_left, others=80.0):
+    write_field(asm.physicSM, PHYSICS_LAYOUT, "tyreCoreTemperature",
+                (front_left, others, others, others))
+
+
+def test_changes(asm):
+
+    tracker = ChangeTracker(asm)
+    assert tracker.read() is None
+
+    write_step(asm.physicSM, 1)
+    assert list(tracker.read()) == tracker.paths
+
+    write_step(asm.physicSM, 2)
+    write_field(asm.graphicSM, GRAPHICS_LAYOUT, "flag", 3)
+    write_field(asm.physicSM, PHYSICS_LAYOUT, "carDamage",
+                (0.0, 0.0, 0.5, 0.0, 0.0))
+
+    changes = tracker.read()
+    assert list(changes) == (["Physics.packed_id"] + SUSPENSION
+                             + ["Physics.car_damage.left", "Graphics.flag"])
+    assert changes["Physics.packed_id"] == 2
+    assert changes["Physics.car_damage.left"] == 0.5
+    assert changes["Graphics.flag"] is ACC_FLAG_TYPE(3)
+
+    tracker.reset()
+    write_step(asm.physicSM, 3)
+    assert list(tracker.read()) == tracker.paths
+
+
+def test_tolerances(asm):
+
+    tracker = ChangeTracker(asm, {TEMPERATURES: 0.5,
+                                  f"{TEMPERATURES}.rear_right": 0.0})
+    write_temperatures(asm, 80.0)
+    write_step(asm.physicSM, 1)
+    assert tracker.read()[f"{TEMPERATURES}.front_left"] == 80.0
+
+    # Changes are measured from the last reported value
+    reported = []
+    for step, front_left in enumerate((80.25, 80.5, 80.75, 81.0), 2):
+        write_temperatures(asm, front_left)
+        write_step(asm.physicSM, step)
+        reported.append(tracker.read().get(f"{TEMPERATURES}.front_left"))
+
+    assert reported == [None, None, 80.75, None]
+
+    # The most specific tolerance applies
+    write_field(asm.physicSM, PHYSICS_LAYOUT, "tyreCoreTemperature",
+                (81.0, 80.0, 80.0, 80.1))
+    write_step(asm.physicSM, 6)
+    changes = tracker.read()
+    assert f"{TEMPERATURES}.rear_right" in changes
+    assert f"{TEMPERATURES}.front_left" not in changes
+
+
+def test_tolerances_checked(asm):
+
+    with pytest.raises(ValueError):
+        ChangeTracker(asm, {"Physics.unknown": 1.0})
+
+    with pytest.raises(ValueError):
+        ChangeTracker(asm, {"Static.track": 1.0})
+
+
+def test_poll_changes(asm):
+
+    tracker = ChangeTracker(asm)
+    poller = SharedMemoryPoller(asm, read=tracker.read)
+
+    write_step(asm.physicSM, 1)
+    assert poller.poll(timeout=1.0)["Physics.packed_id"] == 1
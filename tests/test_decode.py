@@ -0,0 +1,201 @@
+from dataclasses import fields
+
+import pytest
+
+from helpers import load_frames
+from pyaccsharedmemory import (GRAPHICS_DECODER, GRAPHICS_LAYOUT,
+                               PHYSICS_DECODER, PHYSICS_LAYOUT,
+                               STATIC_DECODER, STATIC_LAYOUT, FieldProjection,
+                               GraphicsView, PageLayout, PhysicsView,
+                               StaticsView, Wheels, channel_type,
+                               numeric_channels, read_graphics_map,
+                               read_physic_map, read_static_map,
+                               write_graphics_map, write_physic_map,
+                               write_static_map)
+
+PAGES = (
+    ("physics", read_physic_map, PhysicsView),
+    ("graphics", read_graphics_map, GraphicsView),
+    ("static", read_static_map, StaticsView),
+)
+
+DECODERS = (
+    ("physics", PHYSICS_DECODER),
+    ("graphics", GRAPHICS_DECODER),
+    ("static", STATIC_DECODER),
+)
+
+ENCODERS = (
+    ("physics", PHYSICS_DECODER, PHYSICS_LAYOUT, write_physic_map),
+    ("graphics", GRAPHICS_DECODER, GRAPHICS_LAYOUT, write_graphics_map),
+    ("static", STATIC_DECODER, STATIC_LAYOUT, write_static_map),
+)
+
+FRAMES = load_frames()
+
+
+def unexposed_fields(decoder, layout, page):
+    """
+    Raw values of the layout fields the dataclass doesn't have.
+    """
+
+    used = {field.name for field, _ in decoder.attributes.values()}
+    return {name: field.unpack_from(page)
+            for name, field in layout.fields.items() if name not in used}
+
+
+@pytest.mark.parametrize("pages, expected", FRAMES)
+@pytest.mark.parametrize("name, read, view", PAGES)
+def test_decode_matches_baseline(pages, expected, name, read, view):
+
+    assert repr(read(pages[name])) == expected[name]
+    assert repr(read(bytearray(pages[name]))) == expected[name]
+
+
+@pytest.mark.parametrize("pages, expected", FRAMES)
+@pytest.mark.parametrize("name, read, view", PAGES)
+def test_view_matches_decode(pages, expected, name, read, view):
+
+    page_view = view(pages[name])
+    value = read(pages[name])
+
+    assert repr(page_view.to_dataclass()) == expected[name]
+    for attribute in fields(value):
+        assert repr(getattr(page_view, attribute.name)) == repr(
+            getattr(value, attribute.name))
+
+    with pytest.raises(AttributeError):
+        page_view.unknown
+
+
+def test_layout_checks_size():
+
+    layout = PageLayout("Test", 12, (("packetID", "i"), ("values", "2f")))
+    assert layout.fields["values"].offset == 4
+    assert layout.fields["values"].index == 1
+
+    with pytest.raises(ValueError):
+        PageLayout("Test", 16, (("packetID", "i"), ("values", "2f")))
+
+
+@pytest.mark.parametrize("name, decoder", DECODERS)
+def test_decode_into(name, decoder):
+
+    (first, _), (second, expected) = FRAMES[:2]
+    value = decoder.decode(first[name])
+    nested = {attribute.name: getattr(value, attribute.name)
+              for attribute in fields(value)
+              if hasattr(getattr(value, attribute.name), "__slots__")}
+
+    assert decoder.decode_into(second[name], value) is value
+    assert repr(value) == expected[name]
+
+    # Nested values are updated, not rebuilt
+    for attribute, nested_value in nested.items():
+        assert getattr(value, attribute) is nested_value
+
+
+def test_slotted_values():
+
+    wheels = Wheels(1.0, 2.0, 3.0, 4.0)
+    assert not hasattr(wheels, "__dict__")
+    assert wheels == Wheels(1.0, 2.0, 3.0, 4.0)
+
+
+@pytest.mark.parametrize("pages, expected", FRAMES)
+def test_projection_matches_decode(pages, expected):
+
+    paths = ["Physics.speed_kmh", "Physics.tyre_core_temp",
+             "Physics.packed_id", "Graphics.packed_id", "Graphics.status",
+             "Graphics.car_coordinates", "Static.track"]
+    projection = FieldProjection(paths)
+    record = projection.decode(pages["physics"], pages["graphics"],
+                               pages["static"])
+
+    physics = read_physic_map(pages["physics"])
+    graphics = read_graphics_map(pages["graphics"])
+    statics = read_static_map(pages["static"])
+
+    assert projection.pages == ["Physics", "Graphics", "Static"]
+    assert repr(record.speed_kmh) == repr(physics.speed_kmh)
+    assert repr(record.tyre_core_temp) == repr(physics.tyre_core_temp)
+    assert record.physics_packed_id == physics.packed_id
+    assert record.graphics_packed_id == graphics.packed_id
+    assert record.status == graphics.status
+    assert repr(record.car_coordinates) == repr(graphics.car_coordinates)
+    assert record.track == statics.track
+
+
+def test_projection_only_needs_its_pages():
+
+    pages = FRAMES[0][0]
+    projection = FieldProjection(["Graphics.flag", "Graphics.is_in_pit"])
+
+    assert projection.pages == ["Graphics"]
+    record = projection.decode(graphics=pages["graphics"])
+    assert record.is_in_pit == read_graphics_map(pages["graphics"]).is_in_pit
+
+
+@pytest.mark.parametrize("paths", [[], ["Physics.unknown"], ["speed_kmh"],
+                                   ["Physics.gas", "Physics.gas"]])
+def test_projection_rejects_invalid_fields(paths):
+
+    with pytest.raises(ValueError):
+        FieldProjection(paths)
+
+
+@pytest.mark.parametrize("pages, expected", FRAMES)
+@pytest.mark.parametrize("name, decoder, layout, write", ENCODERS)
+def test_encode_round_trip(pages, expected, name, decoder, layout, write):
+    """
+    Random ints of the bool fields don't survive the round trip, the
+    decoded values do.
+    """
+
+    page = pages[name]
+    raw = unexposed_fields(decoder, layout, page)
+    encoded = decoder.encode(decoder.decode(page), raw)
+
+    assert repr(decoder.decode(encoded)) == expected[name]
+
+    buffer = bytearray(len(page))
+    write(buffer, decoder.decode(page), raw)
+    assert buffer == encoded
+
+
+def test_encode_round_trip_generated(pages, generator):
+
+    for _ in range(50):
+        generator.step()
+
+    for page_name, (_, decoder, layout, _) in zip(pages, ENCODERS):
+        page = bytes(pages[page_name])
+        raw = unexposed_fields(decoder, layout, page)
+        assert decoder.encode(decoder.decode(page), raw) == page
+
+    physics = read_physic_map(pages["physic_map"])
+    assert physics.packed_id == generator.physics.packed_id
+    assert physics.speed_kmh == pytest.approx(generator.physics.speed_kmh)
+    assert read_static_map(pages["static_map"]).track.rstrip("\x00") == (
+        "monza")
+
+
+def test_encode_checks_lengths():
+
+    physics = read_physic_map(FRAMES[0][0]["physics"])
+    with pytest.raises(ValueError):
+        PHYSICS_DECODER.encode(physics, {"tyreWear": (0.1, 0.1)})
+
+
+def test_numeric_channels():
+
+    assert channel_type("Physics.tyre_core_temp") is Wheels
+    assert numeric_channels("Physics.gear") == [
+        ("Physics", "gear", None, "i")]
+    assert [element for _, _, element, _ in numeric_channels(
+        "Physics.tyre_core_temp")] == [
+        "front_left", "front_right", "rear_left", "rear_right"]
+
+    for path in ("Static.track", "Physics.nope", "Graphics.tyre_compound"):
+        with pytest.raises(ValueError):
+            numeric_channels(path)
@@ -0,0 +1,73 @@
+import pytest
+
+from helpers import write_field
+from pyaccsharedmemory import (GRAPHICS_LAYOUT, GRAPHICS_PAGE_SIZE,
+                               STATIC_LAYOUT, STATIC_PAGE_SIZE,
+                               ACC_PENALTY_TYPE, ACC_RAIN_INTENSITY,
+                               ACC_SESSION_TYPE, ACC_STATUS,
+                               ACC_TRACK_GRIP_STATUS, read_graphics_map,
+                               read_static_map)
+
+# str() of the members in the 1.0.0 release
+STRINGS = {
+    ACC_SESSION_TYPE: {
+        "ACC_UNKNOW": "Unknow", "ACC_PRACTICE": "Practice",
+        "ACC_QUALIFY": "Qualify", "ACC_RACE": "Race", "ACC_HOTLAP": "Hotlap",
+        "ACC_TIME_ATTACK": "Time_Attack", "ACC_DRIFT": "Drift",
+        "ACC_DRAG": "Drag", "ACC_HOTSTINT": "Hotstint",
+        "ACC_HOTLAPSUPERPOLE": "Superpole"},
+    ACC_TRACK_GRIP_STATUS: {
+        "ACC_GREEN": "Green", "ACC_FAST": "Fast", "ACC_OPTIMUM": "Optimum",
+        "ACC_GREASY": "Greasy", "ACC_DAMP": "Damp", "ACC_WET": "Wet",
+        "ACC_FLOODED": "Flooded"},
+    ACC_RAIN_INTENSITY: {
+        "ACC_NO_RAIN": "No Rain", "ACC_DRIZZLE": "Drizzle",
+        "ACC_LIGHT_RAIN": "Light Rain", "ACC_MEDIUM_RAIN": "Medium Rain",
+        "ACC_HEAVY_RAIN": "Heavy rain", "ACC_THUNDERSTORM": "Thunderstorm"},
+}
+
+
+@pytest.mark.parametrize("enum, strings", STRINGS.items())
+def test_enum_strings(enum, strings):
+    assert {member.name: str(member) for member in enum} == strings
+
+
+@pytest.mark.parametrize("field, attribute, enum", [
+    ("status", "status", ACC_STATUS),
+    ("session", "session_type", ACC_SESSION_TYPE),
+    ("trackGripStatus", "track_grip_status", ACC_TRACK_GRIP_STATUS),
+    ("rainIntensity", "rain_intensity", ACC_RAIN_INTENSITY),
+    ("penalty", "penalty", ACC_PENALTY_TYPE),
+])
+def test_enum_lookup(field, attribute, enum):
+
+    page = bytearray(GRAPHICS_PAGE_SIZE)
+    for member in enum:
+        write_field(page, GRAPHICS_LAYOUT, field, member.value)
+        assert getattr(read_graphics_map(page), attribute) is member
+
+
+def test_unknown_enum_values():
+
+    page = bytearray(GRAPHICS_PAGE_SIZE)
+    write_field(page, GRAPHICS_LAYOUT, "penalty", 99)
+    assert read_graphics_map(page).penalty is ACC_PENALTY_TYPE.UnknownValue
+
+    write_field(page, GRAPHICS_LAYOUT, "session", 42)
+    assert read_graphics_map(page).session_type is (
+        ACC_SESSION_TYPE.ACC_UNKNOW)
+
+    write_field(page, GRAPHICS_LAYOUT, "status", 9)
+    with pytest.raises(ValueError):
+        read_graphics_map(page)
+
+
+def test_cached_strings():
+
+    page = bytearray(STATIC_PAGE_SIZE)
+    track = "spa".encode("utf-16-le").ljust(66, b"\x00")
+    write_field(page, STATIC_LAYOUT, "track", track)
+
+    first = read_static_map(page)
+    assert first.track.rstrip("\x00") == "spa"
+    assert read_static_map(page).track is first.track
@@ -0,0 +1,120 @@
+import multiprocessing
+import uuid
+
+import pytest
+
+from helpers import write_field, write_step
+from pyacc_fanout import FramePublisher, FrameSubscriber
+from pyaccsharedmemory import (GRAPHICS_PAGE_SIZE, PHYSICS_LAYOUT,
+                               PHYSICS_PAGE_SIZE, STATIC_LAYOUT,
+                               STATIC_PAGE_SIZE, accSharedMemory,
+                               open_page_file)
+
+
+def unique_name():
+    return f"pyacc_{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def publisher(asm):
+
+    publisher = FramePublisher(asm, name=unique_name())
+    yield publisher
+    publisher.close()
+
+
+def test_fanout(asm, publisher):
+
+    subscriber = FrameSubscriber(publisher.name)
+    try:
+        assert subscriber.latest() is None
+        assert not publisher.publish()
+
+        write_step(asm.physicSM, 1)
+        write_field(asm.physicSM, PHYSICS_LAYOUT, "speedKmh", 150.0)
+        write_field(asm.staticSM, STATIC_LAYOUT, "numCars", 20)
+        assert publisher.publish()
+        sequence, frame = subscriber.latest()
+
+        assert frame.Physics.packed_id == 1
+        assert frame.Physics.speed_kmh == 150.0
+        assert frame.Static.num_cars == 20
+
+        write_step(asm.physicSM, 2)
+        publisher.publish()
+        next_sequence, frame = subscriber.wait_next(sequence, timeout=1.0)
+
+        assert next_sequence > sequence
+        assert frame.Physics.packed_id == 2
+
+    finally:
+        subscriber.close()
+
+
+def test_close_with_views(asm, publisher):
+
+    subscriber = FrameSubscriber(publisher.name)
+    write_step(asm.physicSM, 1)
+    publisher.publish()
+
+    frame = subscriber.latest(copy=False)
+    with pytest.raises(BufferError, match="copy=False"):
+        subscriber.close()
+
+    del frame
+    subscriber.close()
+
+
+def read_frame(name, results):
+
+    subscriber = FrameSubscriber(name)
+    try:
+        _, frame = subscriber.wait_next(0, timeout=5.0)
+        results.put((frame.Physics.packed_id, frame.Physics.speed_kmh,
+                     frame.Static.num_cars))
+
+    finally:
+        subscriber.close()
+
+
+def test_fanout_across_processes(tmp_path):
+
+    pages = {
+        "physic_map": open_page_file(str(tmp_path / "physics"),
+                                     PHYSICS_PAGE_SIZE),
+        "graphic_map": open_page_file(str(tmp_path / "graphics"),
+                                      GRAPHICS_PAGE_SIZE),
+        "static_map": open_page_file(str(tmp_path / "static"),
+                                     STATIC_PAGE_SIZE),
+    }
+    asm = accSharedMemory(**pages)
+    publisher = FramePublisher(asm, name=unique_name())
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=read_frame,
+                              args=(publisher.name, results))
+
+    try:
+        process.start()
+
+        write_step(asm.physicSM, 1)
+        write_field(asm.physicSM, PHYSICS_LAYOUT, "speedKmh", 150.0)
+        write_field(asm.staticSM, STATIC_LAYOUT, "numCars", 20)
+        assert publisher.publish()
+
+        assert results.get(timeout=10.0) == (1, 150.0, 20)
+        process.join(10.0)
+        assert process.exitcode == 0
+
+        # The subscriber process didn't take the segment with it
+        subscriber = FrameSubscriber(publisher.name)
+        assert subscriber.latest()[1].Physics.packed_id == 1
+        subscriber.close()
+
+    finally:
+        if process.is_alive():
+            process.kill()
+
+        publisher.close()
+        asm.close()
@@ -0,0 +1,190 @@
+import dataclasses
+import os
+import threading
+import time
+
+import pytest
+
+from helpers import write_step
+from pyacc_laps import (LAP_COMPLETED, LAP_STARTED, PIT_IN, PIT_OUT,
+                        SECTOR_COMPLETED, Lap, LapSegmenter)
+from pyaccsharedmemory import (GRAPHICS_DECODER, GRAPHICS_PAGE_SIZE,
+                               PHYSICS_DECODER, PHYSICS_PAGE_SIZE,
+                               STATIC_DECODER, STATIC_PAGE_SIZE, ACC_map)
+
+PHYSICS = PHYSICS_DECODER.decode(bytes(PHYSICS_PAGE_SIZE))
+GRAPHICS = GRAPHICS_DECODER.decode(bytes(GRAPHICS_PAGE_SIZE))
+STATICS = STATIC_DECODER.decode(bytes(STATIC_PAGE_SIZE))
+
+
+def frame(lap, sector, time, speed=100.0, **graphics):
+    """
+    Frame of the player car at a lap time, last_time and
+    last_sector_time are passed in graphics.
+    """
+
+    graphics.setdefault("is_valid_lap", True)
+    return ACC_map(
+        dataclasses.replace(PHYSICS, speed_kmh=speed),
+        dataclasses.replace(GRAPHICS, completed_lap=lap,
+                            current_sector_index=sector, current_time=time,
+                            normalized_car_position=time / 3000, **graphics),
+        STATICS)
+
+
+def drive(segmenter, lap, times=(0, 1000, 2000), last_time=0,
+          **graphics):
+    """
+    Feed a 3 sectors lap, one frame per sector, and the first frame of
+    the next lap. Sector i lasts 1000 + i ms.
+
+    Return:
+    result: the events of all the frames
+    """
+
+    events = []
+    for sector, time in enumerate(times):
+        events += segmenter.feed(frame(lap, sector, time,
+                                       last_sector_time=1000 + sector - 1,
+                                       last_time=last_time, **graphics))
+
+    events += segmenter.feed(frame(lap + 1, 0, 0, last_sector_time=1002,
+                                   last_time=3003, **graphics))
+    return events
+
+
+def test_lap_events():
+
+    segmenter = LapSegmenter()
+    events = drive(segmenter, 0)
+
+    assert [(e.kind, e.lap, e.sector) for e in events] == [
+        (LAP_STARTED, 0, 0),
+        (SECTOR_COMPLETED, 0, 0),
+        (SECTOR_COMPLETED, 0, 1),
+        (SECTOR_COMPLETED, 0, 2),
+        (LAP_COMPLETED, 0, 0),
+        (LAP_STARTED, 1, 0),
+    ]
+
+    lap = events[4].data
+    assert lap.time == events[4].time == 3003
+    assert lap.sectors == [1000, 1001, 1002]
+    assert (lap.valid, lap.pit) == (True, False)
+    assert len(lap) == 3
+    assert list(lap.channels["time"]) == [0, 1000, 2000]
+    assert list(lap.channels["Physics.speed_kmh"]) == [100.0] * 3
+    assert list(segmenter.laps) == [lap]
+    assert segmenter.current.number == 1
+
+
+def test_pit_and_invalid_lap():
+
+    received = []
+    segmenter = LapSegmenter(on_event=received.append)
+
+    segmenter.feed(frame(0, 0, 0))
+    events = segmenter.feed(frame(0, 0, 500, is_in_pit=True,
+                                  is_valid_lap=False))
+    events += segmenter.feed(frame(0, 0, 900))
+
+    assert [e.kind for e in events] == [PIT_IN, PIT_OUT]
+    assert [e.kind for e in received] == [LAP_STARTED, PIT_IN, PIT_OUT]
+    assert segmenter.current.pit
+    assert not segmenter.current.valid
+
+
+def test_laps_count_jump_drops_lap():
+
+    segmenter = LapSegmenter()
+    segmenter.feed(frame(3, 1, 1500))
+    events = segmenter.feed(frame(0, 0, 0))
+
+    assert [(e.kind, e.lap) for e in events] == [(LAP_STARTED, 0)]
+    assert len(segmenter.laps) == 0
+
+
+def test_composite_channels():
+
+    segmenter = LapSegmenter(["Physics.tyre_core_temp"], keep_laps=0)
+    segmenter.feed(frame(0, 0, 0))
+
+    assert set(segmenter.current.channels) == {
+        "time", "position", "Physics.tyre_core_temp.front_left",
+        "Physics.tyre_core_temp.front_right",
+        "Physics.tyre_core_temp.rear_left",
+        "Physics.tyre_core_temp.rear_right"}
+
+    drive(segmenter, 0)
+    assert len(segmenter.laps) == 0
+
+
+@pytest.mark.parametrize("channels, keep_laps", [
+    (["Physics.nope"], 2),
+    (["Brake.speed_kmh"], 2),
+    (["Graphics.tyre_compound"], 2),
+    (["Physics.speed_kmh"], -1),
+])
+def test_segmenter_checks_arguments(channels, keep_laps):
+
+    with pytest.raises(ValueError):
+        LapSegmenter(channels, keep_laps=keep_laps)
+
+
+def test_spill_laps(tmp_path):
+
+    segmenter = LapSegmenter(keep_laps=1, spill_directory=str(tmp_path))
+    for lap in range(3):
+        drive(segmenter, lap)
+
+    assert [lap.number for lap in segmenter.laps] == [2]
+    assert len(segmenter.spilled) == 3
+
+    laps = [Lap.load(path) for path in segmenter.spilled]
+    assert [lap.number for lap in laps] == [0, 1, 2]
+
+    lap = laps[2]
+    assert repr(lap) == repr(segmenter.laps[0])
+    assert lap.channels == segmenter.laps[0].channels
+    assert lap.channels["Physics.gear"].typecode == "i"
+
+
+def test_spill_numbering(tmp_path):
+
+    directory = str(tmp_path)
+    (tmp_path / "00007_lap_0003.bin").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+
+    segmenter = LapSegmenter(spill_directory=directory)
+    drive(segmenter, 0)
+    # New session, completed_lap starts again from 0
+    segmenter.feed(frame(5, 0, 0))
+    drive(segmenter, 0)
+
+    assert [os.path.basename(path) for path in segmenter.spilled] == [
+        "00008_lap_0000.bin", "00009_lap_0000.bin"]
+
+    segmenter = LapSegmenter(spill_directory=directory)
+    drive(segmenter, 0)
+    assert os.path.basename(segmenter.spilled[0]) == "00010_lap_0000.bin"
+
+
+def test_run_survives_pauses(asm):
+
+    def write_steps():
+        # Longer than the timeout without any frame, like a paused game
+        time.sleep(0.15)
+        for step in range(1, 6):
+            write_step(asm.physicSM, step)
+            time.sleep(0.01)
+
+    writer = threading.Thread(target=write_steps)
+    segmenter = LapSegmenter()
+
+    writer.start()
+    start = time.perf_counter()
+    segmenter.run(asm, duration=0.4, rate=1000, timeout=0.05)
+    writer.join()
+
+    assert 0.4 <= time.perf_counter() - start < 1.0
+    assert len(segmenter.current) == 5
@@ -0,0 +1,41 @@
+import pytest
+
+from pyacc_loadgen import LoadGenerator, format_time, open_pages
+from pyaccsharedmemory import accSharedMemory
+
+
+def test_generated_frames(tmp_path):
+
+    pages = open_pages(str(tmp_path / "acc"))
+    generator = LoadGenerator(pages, rate=1000, opponents=3)
+    asm = accSharedMemory(**open_pages(str(tmp_path / "acc")))
+
+    try:
+        generator.run(duration=0.05)
+        sm = asm.read_shared_memory()
+
+        assert sm is not None
+        assert sm.Physics.packed_id == generator.steps
+        assert sm.Graphics.active_cars == 4
+        assert sm.Static.track.rstrip("\x00") == "monza"
+    finally:
+        asm.close()
+        for page in pages.values():
+            page.close()
+
+
+def test_format_time():
+
+    assert format_time(107352) == "1:47.352"
+    assert format_time(-5) == "0:00.000"
+
+
+@pytest.mark.parametrize("kwargs", (
+    {"rate": 0},
+    {"graphics_rate": -1},
+    {"opponents": 60},
+))
+def test_generator_checks_arguments(pages, kwargs):
+
+    with pytest.raises(ValueError):
+        LoadGenerator(pages, **kwargs)
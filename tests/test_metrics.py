@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from helpers import write_step
+from pyaccsharedmemory import (FieldProjection, LatencyHistogram, ReadMetrics,
+                               accSharedMemory)
+
+
+@pytest.fixture
+def measured(pages):
+
+    asm = accSharedMemory(**pages, metrics=ReadMetrics())
+    yield asm
+    asm.close()
+
+
+def read_steps(asm, pages, steps=3):
+
+    for step in range(1, steps + 1):
+        write_step(pages["physic_map"], step)
+        assert asm.read_shared_memory() is not None
+        assert asm.read_shared_memory() is None
+
+
+def test_read_metrics(measured, pages):
+
+    read_steps(measured, pages)
+    snapshot = measured.metrics.snapshot()
+
+    assert (snapshot.polls, snapshot.empty_polls, snapshot.frames) == (
+        6, 3, 3)
+    assert snapshot.time_to_first_frame >= 0
+    assert snapshot.stages["change_detection"].count == 6
+    assert snapshot.stages["physics_decode"].count == 3
+    assert snapshot.stages["graphics_decode"].count == 3
+
+    measured.metrics.reset()
+    snapshot = measured.metrics.snapshot()
+    assert (snapshot.polls, snapshot.frames) == (0, 0)
+    assert snapshot.time_to_first_frame is None
+
+
+def test_histogram_buckets():
+
+    histogram = LatencyHistogram()
+    for duration in (500, 1_000, 3_000, 20_000_000):
+        histogram.record(duration)
+
+    stats = histogram.stats()
+    assert stats.count == 4
+    assert stats.max == pytest.approx(0.02)
+    assert stats.mean == pytest.approx(20_004_500 / 4 / 1e9)
+    assert stats.buckets["1e-06"] == 2
+    assert stats.buckets["2.5e-06"] == 2
+    assert stats.buckets["5e-06"] == 3
+    assert stats.buckets["0.01"] == 3
+    assert stats.buckets["+Inf"] == 4
+
+
+def test_to_json(measured, pages):
+
+    read_steps(measured, pages)
+    dump = json.loads(measured.metrics.to_json())
+
+    assert (dump["polls"], dump["empty_polls"], dump["frames"]) == (6, 3, 3)
+    assert set(dump["stages"]) == set(ReadMetrics.STAGES)
+    assert dump["stages"]["change_detection"]["buckets"]["+Inf"] == 6
+
+
+def test_to_prometheus(measured, pages):
+
+    assert "time_to_first_frame" not in measured.metrics.to_prometheus()
+
+    read_steps(measured, pages)
+    lines = measured.metrics.to_prometheus(prefix="acc").splitlines()
+
+    assert 'acc_polls_total{result="frame"} 3' in lines
+    assert 'acc_polls_total{result="none"} 3' in lines
+    assert "# TYPE acc_time_to_first_frame_seconds gauge" in lines
+    assert "# TYPE acc_stage_seconds histogram" in lines
+    assert ('acc_stage_seconds_bucket{stage="change_detection",le="+Inf"}'
+            ' 6') in lines
+    assert 'acc_stage_seconds_count{stage="physics_decode"} 3' in lines
+
+    for line in lines:
+        assert line.startswith(("# TYPE acc_", "acc_"))
+
+
+@pytest.mark.parametrize("method, args", [
+    ("read_shared_memory", ()),
+    ("read_raw_pages", ()),
+    ("read_shared_memory_lazy", ()),
+    ("read_projection", (FieldProjection(["Physics.speed_kmh"]),)),
+])
+def test_metrics_on_every_read_path(measured, pages, method, args):
+
+    read = getattr(measured, method)
+    for step in range(1, 11):
+        write_step(pages["physic_map"], step)
+        assert read(*args) is not None
+        assert read(*args) is None
+
+    snapshot = measured.metrics.snapshot()
+    assert (snapshot.polls, snapshot.empty_polls, snapshot.frames) == (
+        20, 10, 10)
+    assert snapshot.stages["change_detection"].count == 20
+    assert snapshot.time_to_first_frame is not None
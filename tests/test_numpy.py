@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from helpers import load_frames, write_field, write_step
+from pyacc_numpy import (GRAPHICS_DTYPE, PHYSICS_DTYPE, STATIC_DTYPE,
+                         decode_enum, decode_strings, read_graphics_batch,
+                         read_physics_batch, read_session_batch,
+                         read_static_batch, to_columns)
+from pyacc_session import SessionRecorder
+from pyaccsharedmemory import (GRAPHICS_LAYOUT, GRAPHICS_PAGE_SIZE,
+                               PHYSICS_LAYOUT, PHYSICS_PAGE_SIZE,
+                               STATIC_LAYOUT, STATIC_PAGE_SIZE,
+                               ACC_PENALTY_TYPE, ACC_SESSION_TYPE, ACC_STATUS,
+                               read_graphics_map, read_physic_map,
+                               read_static_map)
+
+FRAMES = [pages for pages, _ in load_frames()]
+
+
+def utf16(text, length):
+    return text.encode("utf-16-le").ljust(2 * length, b"\x00")
+
+
+@pytest.mark.parametrize("dtype, layout, size", [
+    (PHYSICS_DTYPE, PHYSICS_LAYOUT, PHYSICS_PAGE_SIZE),
+    (GRAPHICS_DTYPE, GRAPHICS_LAYOUT, GRAPHICS_PAGE_SIZE),
+    (STATIC_DTYPE, STATIC_LAYOUT, STATIC_PAGE_SIZE),
+])
+def test_dtypes_match_layouts(dtype, layout, size):
+
+    assert dtype.itemsize == size
+    assert list(dtype.names) == list(layout.fields)
+    for name, field in layout.fields.items():
+        assert dtype.fields[name][1] == field.offset
+
+
+def test_batch_shapes():
+
+    physics = read_physics_batch([pages["physics"] for pages in FRAMES])
+    graphics = read_graphics_batch(
+        b"".join(pages["graphics"] for pages in FRAMES))
+
+    assert physics.shape == (len(FRAMES),)
+    assert physics["speedKmh"].shape == (len(FRAMES),)
+    assert physics["tyreCoreTemperature"].shape == (len(FRAMES), 4)
+    assert physics["tyreContactPoint"].shape == (len(FRAMES), 4, 3)
+    assert graphics["carCoordinates"].shape == (len(FRAMES), 60, 3)
+
+    with pytest.raises(ValueError):
+        read_physics_batch(FRAMES[0]["physics"][:-1])
+
+
+def test_batch_matches_decode():
+
+    physics = to_columns(read_physics_batch(
+        [pages["physics"] for pages in FRAMES]))
+    graphics = to_columns(read_graphics_batch(
+        [pages["graphics"] for pages in FRAMES]))
+
+    for i, pages in enumerate(FRAMES):
+        expected = read_physic_map(pages["physics"])
+        assert physics["packetID"][i] == expected.packed_id
+        assert np.array_equal(physics["speedKmh"][i], expected.speed_kmh,
+                              equal_nan=True)
+        assert np.array_equal(
+            physics["tyreCoreTemperature"][i],
+            [expected.tyre_core_temp.front_left,
+             expected.tyre_core_temp.front_right,
+             expected.tyre_core_temp.rear_left,
+             expected.tyre_core_temp.rear_right], equal_nan=True)
+
+        expected = read_graphics_map(pages["graphics"])
+        assert np.array_equal(
+            graphics["carCoordinates"][i],
+            [(car.x, car.y, car.z) for car in expected.car_coordinates],
+            equal_nan=True)
+
+    statuses = decode_enum(graphics["status"], ACC_STATUS)
+    penalties = decode_enum(graphics["penalty"], ACC_PENALTY_TYPE)
+    for i, pages in enumerate(FRAMES):
+        expected = read_graphics_map(pages["graphics"])
+        assert statuses[i] is expected.status
+        assert penalties[i] is expected.penalty
+
+
+def test_decode_enum():
+
+    values = np.array([[0, 2], [3, 99]])
+    assert decode_enum(values, ACC_STATUS).tolist() == [
+        [ACC_STATUS.ACC_OFF, ACC_STATUS.ACC_LIVE],
+        [ACC_STATUS.ACC_PAUSE, None]]
+
+    assert decode_enum(np.array([-5]), ACC_STATUS,
+                       ACC_STATUS.ACC_OFF)[0] is ACC_STATUS.ACC_OFF
+    assert decode_enum(np.array([99]), ACC_PENALTY_TYPE)[0] is (
+        ACC_PENALTY_TYPE.UnknownValue)
+    assert decode_enum(np.array([42]), ACC_SESSION_TYPE)[0] is (
+        ACC_SESSION_TYPE.ACC_UNKNOW)
+
+
+def test_decode_strings():
+
+    static = bytearray(STATIC_PAGE_SIZE)
+    write_field(static, STATIC_LAYOUT, "track", utf16("monza", 33))
+    write_field(static, STATIC_LAYOUT, "carModel", utf16("bmw_m4_gt3", 33))
+
+    batch = read_static_batch([bytes(static)] * 2)
+    assert decode_strings(batch["track"]).tolist() == ["monza", "monza"]
+    assert decode_strings(batch["carModel"])[0] == (
+        read_static_map(static).car_model.rstrip("\x00"))
+
+
+def test_read_session_batch(tmp_path, asm):
+
+    path = str(tmp_path / "session.bin")
+    with SessionRecorder(path) as recorder:
+        for step in range(1, 11):
+            write_step(asm.physicSM, step)
+            write_field(asm.graphicSM, GRAPHICS_LAYOUT, "packetID", step)
+            recorder.write(asm.read_raw_pages(), step)
+
+    timestamps, physics, graphics = read_session_batch(path, max_frames=8)
+    assert timestamps.tolist() == list(range(1, 9))
+    assert physics["packetID"].tolist() == list(range(1, 9))
+    assert graphics["packetID"].tolist() == list(range(1, 9))
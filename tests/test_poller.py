@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+import pyaccsharedmemory
+from helpers import write_step
+from pyaccsharedmemory import SharedMemoryPoller, SharedMemoryTimeout
+
+
+def test_poller_rate(asm):
+
+    poller = SharedMemoryPoller(asm, rate=200.0)
+    start = time.perf_counter()
+
+    with pytest.raises(SharedMemoryTimeout):
+        poller.poll(timeout=0.2)
+
+    elapsed = time.perf_counter() - start
+    assert 0.2 <= elapsed < 0.5
+    # One poll per tick, not a busy loop
+    assert 10 <= poller.stats().polls <= 42
+
+
+def test_poller_spins_before_each_tick(asm, monkeypatch):
+
+    sleeps = []
+    sleep = time.sleep
+
+    def record_sleep(seconds):
+        sleeps.append(seconds)
+        sleep(seconds)
+
+    monkeypatch.setattr(time, "sleep", record_sleep)
+    poller = SharedMemoryPoller(asm, rate=100.0, spin_time=0.002)
+
+    with pytest.raises(SharedMemoryTimeout):
+        poller.poll(timeout=0.1)
+
+    assert sleeps
+    assert all(seconds <= 0.01 - 0.002 for seconds in sleeps)
+
+
+@pytest.mark.parametrize("rate, spin_time",
+                         [(333.0, 0.0002), (10_000.0, 0.00001)])
+def test_poller_default_spin_time(asm, monkeypatch, rate, spin_time):
+
+    monkeypatch.setattr(pyaccsharedmemory, "_SLEEP_RESOLUTION", 0.0002)
+    poller = SharedMemoryPoller(asm, rate=rate)
+    assert poller.spin_time == pytest.approx(spin_time)
+
+
+def test_poller_stats(asm):
+
+    poller = SharedMemoryPoller(asm, rate=1000.0)
+
+    for packet_id in range(1, 11):
+        write_step(asm.physicSM, packet_id)
+        assert poller.poll(timeout=1.0).Physics.packed_id == packet_id
+        time.sleep(0.005)
+
+    stats = poller.stats()
+    assert stats.polls == 10
+    assert stats.frames == 10
+    assert 0.005 <= stats.interval < 0.05
+    assert stats.rate == pytest.approx(1.0 / stats.interval, rel=0.01)
+    assert stats.jitter >= 0.0
+
+
+def test_get_shared_memory_data_timeout(asm):
+
+    with pytest.raises(SharedMemoryTimeout):
+        asm.get_shared_memory_data(timeout=0.05)
+
+    write_step(asm.physicSM, 1)
+    assert asm.get_shared_memory_data(timeout=0.05).Physics.packed_id == 1
+
+
+def test_poller_checks_rate(asm):
+
+    with pytest.raises(ValueError):
+        SharedMemoryPoller(asm, rate=0.0)
@@ -0,0 +1,245 @@
+import copy
+
+import pytest
+
+from helpers import write_field, write_step
+from pyaccsharedmemory import (GRAPHICS_LAYOUT, GRAPHICS_PAGE_SIZE,
+                               PHYSICS_LAYOUT, PHYSICS_PAGE_SIZE,
+                               STATIC_LAYOUT, FieldProjection, PhysicsView,
+                               accSharedMemory, copy_consistent_pages,
+                               copy_page, read_graphics_map, read_physic_map,
+                               xor_pages)
+
+PACKET_ID = PHYSICS_LAYOUT.fields["packetID"]
+
+
+class TearingPage(bytearray):
+    """
+    Page written by the game while it's copied: each of the first tears
+    copies is followed by a new packet id.
+    """
+
+    tears = 0
+
+    def __getitem__(self, key):
+
+        data = bytes(super().__getitem__(key))
+        if self.tears:
+            self.tears -= 1
+            write_field(self, PHYSICS_LAYOUT, "packetID",
+                        PACKET_ID.unpack_from(self) + 1)
+
+        return data
+
+
+@pytest.mark.parametrize("method", ["read_shared_memory",
+                                    "read_shared_memory_lazy"])
+@pytest.mark.parametrize("consistent", [False, True])
+def test_read_new_frames_only(asm, method, consistent):
+
+    asm.consistent = consistent
+    read = getattr(asm, method)
+    assert read() is None
+
+    for packet_id in range(1, 20):
+        write_step(asm.physicSM, packet_id)
+        write_field(asm.physicSM, PHYSICS_LAYOUT, "rpm", 100 * packet_id)
+
+        frame = read()
+        assert frame.Physics.packed_id == packet_id
+        assert frame.Physics.rpm == 100 * packet_id
+        assert frame.in_sync is (True if consistent else None)
+        assert read() is None
+
+
+def test_stale_packet_skipped(asm):
+
+    write_step(asm.physicSM, 1)
+    assert asm.read_shared_memory() is not None
+
+    # New packet id but the physics didn't move
+    write_step(asm.physicSM, 2, (1e-3,) * 4)
+    assert asm.read_shared_memory() is None
+
+    write_step(asm.physicSM, 3)
+    assert asm.read_shared_memory().Physics.packed_id == 3
+
+
+def test_read_lazy(asm):
+
+    write_step(asm.physicSM, 1)
+    write_field(asm.physicSM, PHYSICS_LAYOUT, "speedKmh", 120.0)
+
+    frame = asm.read_shared_memory_lazy()
+    assert isinstance(frame.Physics, PhysicsView)
+    assert frame.Physics.speed_kmh == 120.0
+    assert frame.Physics.to_dataclass() == read_physic_map(asm.physicSM)
+    assert frame.Graphics.to_dataclass() == read_graphics_map(asm.graphicSM)
+
+    # The views read a copy of the pages
+    write_field(asm.physicSM, PHYSICS_LAYOUT, "rpm", 8000)
+    assert frame.Physics.rpm == 0
+
+
+def test_static_page_cached(asm):
+
+    write_field(asm.staticSM, STATIC_LAYOUT, "numCars", 20)
+    statics = asm.read_static()
+    assert statics.num_cars == 20
+    assert asm.read_static() is statics
+
+    write_step(asm.physicSM, 1)
+    frame = asm.read_shared_memory()
+    assert frame.Static is statics
+
+    write_field(asm.staticSM, STATIC_LAYOUT, "numCars", 30)
+    assert asm.read_static().num_cars == 30
+
+    refreshed = asm.refresh_static()
+    assert refreshed is not statics
+    assert refreshed == asm.read_static()
+
+
+def test_lazy_static_view_cached(asm):
+
+    write_step(asm.physicSM, 1)
+    statics = asm.read_shared_memory_lazy().Static
+
+    write_step(asm.physicSM, 2)
+    assert asm.read_shared_memory_lazy().Static is statics
+
+
+@pytest.mark.parametrize("tears, torn", [(0, False), (3, False), (4, True)])
+def test_copy_page_retries_torn_copies(tears, torn):
+
+    page = TearingPage(PHYSICS_PAGE_SIZE)
+    write_field(page, PHYSICS_LAYOUT, "packetID", 1)
+    page.tears = tears
+
+    data, ok = copy_page(page, PACKET_ID, max_retries=3)
+    assert ok is not torn
+    if not torn:
+        assert data == bytes(page)
+        assert PACKET_ID.unpack_from(data) == 1 + tears
+
+
+class GraphicsPage(bytearray):
+    """
+    Graphics page copied while the game writes new physics steps.
+    """
+
+    steps = 0
+    physics: bytearray
+
+    def __getitem__(self, key):
+
+        if self.steps:
+            self.steps -= 1
+            write_step(self.physics, PACKET_ID.unpack_from(self.physics) + 1)
+
+        return bytes(super().__getitem__(key))
+
+
+@pytest.mark.parametrize("steps, in_sync", [(0, True), (1, True),
+                                            (4, False)])
+def test_consistent_pages(steps, in_sync):
+
+    physics = bytearray(PHYSICS_PAGE_SIZE)
+    graphics = GraphicsPage(GRAPHICS_PAGE_SIZE)
+    graphics.physics = physics
+    graphics.steps = steps
+
+    physics_copy, _, result = copy_consistent_pages(physics, graphics,
+                                                    max_retries=3)
+    assert result is in_sync
+    assert PACKET_ID.unpack_from(physics_copy) == min(steps, 3)
+
+
+@pytest.mark.parametrize("consistent", [False, True])
+def test_read_in_place(pages, consistent):
+
+    asm = accSharedMemory(consistent, in_place=True, **pages)
+    write_step(asm.physicSM, 1)
+    write_field(asm.physicSM, PHYSICS_LAYOUT, "tyreCoreTemperature",
+                (80.0, 81.0, 82.0, 83.0))
+
+    frame = asm.read_shared_memory()
+    temperatures = frame.Physics.tyre_core_temp
+    kept = copy.deepcopy(frame)
+    assert temperatures.rear_right == 83.0
+
+    write_step(asm.physicSM, 2)
+    write_field(asm.physicSM, PHYSICS_LAYOUT, "tyreCoreTemperature",
+                (90.0, 91.0, 92.0, 93.0))
+
+    assert asm.read_shared_memory() is frame
+    assert frame.Physics == read_physic_map(asm.physicSM)
+    assert frame.Physics.tyre_core_temp is temperatures
+    assert temperatures.rear_right == 93.0
+    assert kept.Physics.tyre_core_temp.rear_right == 83.0
+
+
+@pytest.mark.parametrize("consistent", [False, True])
+def test_read_projection(pages, consistent):
+
+    asm = accSharedMemory(consistent, **pages)
+    projection = FieldProjection(["Physics.rpm", "Physics.packed_id"])
+    assert asm.read_projection(projection) is None
+
+    write_step(asm.physicSM, 1)
+    write_field(asm.physicSM, PHYSICS_LAYOUT, "rpm", 7000)
+    assert asm.read_projection(projection) == (7000, 1)
+    assert asm.read_projection(projection) is None
+
+
+def test_drops(pages):
+
+    asm = accSharedMemory(**pages, mark_skipped=True)
+    physics = pages["physic_map"]
+    graphics = pages["graphic_map"]
+    write_field(graphics, GRAPHICS_LAYOUT, "packetID", 1)
+
+    write_step(physics, 1)
+    assert asm.read_shared_memory().skipped == 0
+
+    write_step(physics, 4)
+    assert asm.read_shared_memory().skipped == 2
+
+    # Stale packet: new id but the same physics step, the steps missed
+    # before it are counted with the next frame
+    write_step(physics, 7, (4e-3,) * 4)
+    assert asm.read_shared_memory() is None
+    write_step(physics, 8)
+    assert asm.read_shared_memory().skipped == 2
+
+    assert asm.drops.physics_frames == 3
+    assert asm.drops.physics_dropped == 4
+    assert asm.drops.physics_drop_rate == pytest.approx(4 / 7)
+
+    # Laps of another session don't share the counters
+    write_field(graphics, GRAPHICS_LAYOUT, "sessionIndex", 1)
+    write_field(graphics, GRAPHICS_LAYOUT, "packetID", 3)
+    write_step(physics, 10)
+    asm.read_shared_memory()
+
+    assert asm.drops.graphics_dropped == 1
+    assert asm.lap_drops[(0, 0)].physics_dropped == 4
+    assert asm.lap_drops[(1, 0)].physics_dropped == 1
+    assert asm.lap_drops[(1, 0)].graphics_dropped == 1
+    assert asm.lap_drops[(1, 0)].graphics_drop_rate == pytest.approx(0.5)
+
+    asm.reset_drops()
+    assert asm.drops.physics_frames == 0
+    assert asm.lap_drops == {}
+    asm.close()
+
+
+def test_xor_pages():
+
+    page = bytes(range(256)) * 4
+    previous = bytes(reversed(page))
+    delta = xor_pages(page, previous)
+
+    assert len(delta) == len(page)
+    assert xor_pages(delta, previous) == page
+    assert xor_pages(page, page) == bytes(len(page))
@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+
+import pytest
+
+from helpers import write_field, write_step
+from pyacc_session import (ReplaySharedMemory, SessionArchiveReader,
+                           SessionArchiveWriter, SessionReader,
+                           SessionRecorder, compress_session, open_session)
+from pyaccsharedmemory import (PHYSICS_LAYOUT, STATIC_LAYOUT,
+                               SharedMemoryTimeout)
+
+
+@pytest.fixture
+def recorded(tmp_path, asm):
+    """
+    Session file of 300 frames with a change of the static page.
+    """
+
+    path = str(tmp_path / "session.bin")
+    frames = []
+
+    with SessionRecorder(path) as recorder:
+        for step in range(1, 301):
+            if step == 150:
+                write_field(asm.staticSM, STATIC_LAYOUT, "numCars", 30)
+
+            write_step(asm.physicSM, step)
+            write_field(asm.physicSM, PHYSICS_LAYOUT, "rpm", 20 * step)
+            raw = asm.read_raw_pages()
+            recorder.write(raw, 1000 * step)
+            frames.append((1000 * step, raw))
+
+    return path, frames
+
+
+def check_frames(reader, frames):
+
+    read = list(reader)
+    assert len(read) == len(frames)
+
+    for frame, (timestamp, pages) in zip(read, frames):
+        assert frame.timestamp == timestamp
+        assert frame.physics == pages.physics
+        assert frame.graphics == pages.graphics
+        assert frame.static == pages.static
+
+
+def test_session_round_trip(recorded):
+
+    path, frames = recorded
+    assert len({bytes(pages.static) for _, pages in frames}) == 2
+
+    with open_session(path) as reader:
+        assert isinstance(reader, SessionReader)
+        check_frames(reader, frames)
+
+
+def test_archive_round_trip(tmp_path, recorded):
+
+    path, frames = recorded
+    archive = str(tmp_path / "session.accz")
+    compress_session(path, archive, block_frames=64)
+
+    with open_session(archive) as reader:
+        assert isinstance(reader, SessionArchiveReader)
+        check_frames(reader, frames)
+
+    # Most of the pages don't change between two frames
+    assert os.path.getsize(archive) < os.path.getsize(path) / 10
+
+
+def test_archive_writer(tmp_path, recorded):
+
+    _, frames = recorded
+    archive = str(tmp_path / "session.accz")
+
+    with SessionArchiveWriter(archive, block_frames=7) as writer:
+        for timestamp, pages in frames:
+            writer.write(pages, timestamp)
+
+    with SessionArchiveReader(archive) as reader:
+        check_frames(reader, frames)
+
+
+def test_truncated_session(recorded):
+
+    path, frames = recorded
+    with open(path, "r+b") as file:
+        file.truncate(file.seek(0, 2) - 100)
+
+    # A crash during recording only loses the last frame
+    with SessionReader(path) as reader:
+        check_frames(reader, frames[:-1])
+
+
+def test_not_a_session(tmp_path):
+
+    path = tmp_path / "session.bin"
+    path.write_bytes(b"\x00" * 100)
+
+    with pytest.raises(ValueError):
+        SessionReader(str(path))
+
+
+def test_record(tmp_path, asm):
+
+    def write_steps():
+        for step in range(1, 21):
+            write_step(asm.physicSM, step)
+            time.sleep(0.01)
+
+    writer = threading.Thread(target=write_steps)
+    path = str(tmp_path / "session.bin")
+
+    with SessionRecorder(path) as recorder:
+        writer.start()
+        # Stops when the writer is done and no frame comes anymore
+        recorder.record(asm, rate=1000, timeout=0.2)
+        writer.join()
+
+    with SessionReader(path) as reader:
+        packet_ids = [PHYSICS_LAYOUT.fields["packetID"].unpack_from(
+            frame.physics) for frame in reader]
+
+    assert packet_ids == list(range(1, 21))
+
+
+@pytest.mark.parametrize("timeout", [None, 5.0])
+def test_record_duration_without_frames(tmp_path, asm, timeout):
+
+    start = time.monotonic()
+    with SessionRecorder(str(tmp_path / "session.bin")) as recorder:
+        recorder.record(asm, duration=0.1, rate=1000, timeout=timeout)
+
+    assert 0.1 <= time.monotonic() - start < 1.0
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_replay(tmp_path, recorded, compressed):
+
+    path, frames = recorded
+    if compressed:
+        compress_session(path, str(tmp_path / "session.accz"))
+        path = str(tmp_path / "session.accz")
+
+    replay = ReplaySharedMemory(path, speed=None)
+    try:
+        for _, pages in frames:
+            assert replay.read_raw_pages() == pages
+
+        assert replay.finished
+        assert replay.read_shared_memory() is None
+
+        with pytest.raises(SharedMemoryTimeout):
+            replay.get_shared_memory_data()
+
+    finally:
+        replay.close()
+
+
+def test_replay_speed(tmp_path, asm):
+
+    path = str(tmp_path / "session.bin")
+    with SessionRecorder(path) as recorder:
+        for step in range(1, 21):
+            write_step(asm.physicSM, step)
+            # 10 ms between frames
+            recorder.write(asm.read_raw_pages(), 10_000_000 * step)
+
+    replay = ReplaySharedMemory(path, speed=10.0)
+    start = time.perf_counter()
+    packet_ids = []
+
+    try:
+        while not replay.finished:
+            frame = replay.read_shared_memory()
+            if frame is not None:
+                packet_ids.append(frame.Physics.packed_id)
+
+    finally:
+        replay.close()
+
+    assert time.perf_counter() - start >= 0.019
+    assert packet_ids[0] == 1
+    assert packet_ids[-1] == 20
+    assert packet_ids == sorted(packet_ids)
@@ -0,0 +1,73 @@
+import math
+import random
+import statistics
+
+import pytest
+
+from pyacc_stats import ChannelStats, RollingStats
+from pyaccsharedmemory import Wheels
+
+
+def test_rolling_stats_match_recompute():
+
+    rng = random.Random(1)
+    # Small capacity to go through the growth of the ring buffer
+    stats = RollingStats(window=1.0, width=2, capacity=2)
+    history = []
+
+    for step in range(500):
+        timestamp = step * 0.01 + rng.random() * 0.005
+        values = (1e6 + rng.gauss(0, 1), rng.uniform(-5, 5))
+        stats.update(timestamp, values)
+        history.append((timestamp, values))
+
+        window = [values for time, values in history
+                  if time >= timestamp - 1.0]
+        result = stats.stats()
+        assert result.count == len(window)
+
+        for i in range(2):
+            column = [values[i] for values in window]
+            assert result.mean[i] == pytest.approx(statistics.fmean(column))
+            assert result.std[i] == pytest.approx(
+                statistics.pstdev(column), rel=1e-6, abs=1e-6)
+            assert result.min[i] == min(column)
+            assert result.max[i] == max(column)
+            assert result.change[i] == column[-1] - column[0]
+
+
+def test_rolling_stats_expire():
+
+    stats = RollingStats(window=1.0)
+    stats.update(0.0, (1.0,))
+    stats.expire(2.0)
+
+    result = stats.stats()
+    assert result.count == 0
+    assert math.isnan(result.mean[0])
+
+
+def test_channel_stats(asm, generator):
+
+    stats = ChannelStats(["Physics.speed_kmh", "Physics.tyre_core_temp"])
+
+    for step in range(20):
+        generator.step()
+        stats.update(asm.read_shared_memory(), step * 0.01)
+
+    speed = stats.stats("Physics.speed_kmh")
+    temperatures = stats.stats("Physics.tyre_core_temp")
+
+    assert speed.count == 20
+    assert isinstance(speed.mean, float)
+    assert isinstance(temperatures.mean, Wheels)
+    assert temperatures.min.front_left <= temperatures.max.front_left
+
+
+def test_channel_stats_rejects_invalid_channels():
+
+    with pytest.raises(ValueError):
+        ChannelStats(["Physics.speed_kmh", "Physics.speed_kmh"])
+
+    with pytest.raises(ValueError):
+        ChannelStats(["Physics.unknown"])
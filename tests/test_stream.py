@@ -0,0 +1,163 @@
+import zlib
+
+import pytest
+
+from pyacc_stream import (_FRAMES_SIZE, _HEADER, DELTA, FORMAT_VERSION,
+                          KEYFRAME, MAGIC, STATIC, TelemetryReceiver,
+                          TelemetryStreamer)
+from pyaccsharedmemory import STATIC_PAGE_SIZE
+
+
+class LossySocket:
+    """
+    Drop the datagrams whose number is in lost, deliver the others.
+    """
+
+    def __init__(self, sock, lost):
+
+        self.sock = sock
+        self.lost = lost
+        self.sent = 0
+
+    def sendto(self, datagram, address):
+
+        self.sent += 1
+        if self.sent not in self.lost:
+            self.sock.sendto(datagram, address)
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def receiver():
+
+    receiver = TelemetryReceiver("127.0.0.1", 0)
+    yield receiver
+    receiver.close()
+
+
+def stream(asm, generator, receiver, frames, lost=(), **kwargs):
+    """
+    Send frames through a lossy loopback socket.
+
+    Return:
+    result: the pages sent and the pages received, None for the
+    datagrams without a frame
+    """
+
+    streamer = TelemetryStreamer(asm, receiver.address, **kwargs)
+    streamer.sock = LossySocket(streamer.sock, set(lost))
+    sent = []
+    received = []
+
+    try:
+        for _ in range(frames):
+            generator.step()
+            pages = asm.read_raw_pages()
+            sent.append(pages)
+            datagrams = streamer.sock.sent
+            streamer.send(pages)
+
+            for number in range(datagrams + 1, streamer.sock.sent + 1):
+                if number not in streamer.sock.lost:
+                    received.append(receiver.receive_pages(1.0))
+
+    finally:
+        streamer.close()
+
+    return sent, received
+
+
+def same_frame(sent, received):
+
+    return (received.physics == sent.physics
+            and received.graphics == sent.graphics
+            and received.static == sent.static)
+
+
+def test_stream(asm, generator, receiver):
+
+    sent, received = stream(asm, generator, receiver, 50,
+                            keyframe_interval=10)
+    frames = [pages for pages in received if pages is not None]
+
+    assert len(frames) == 50
+    assert all(same_frame(*pair) for pair in zip(sent, frames))
+    assert receiver.stats.lost == 0
+    assert receiver.stats.undecodable == 0
+
+
+def test_stream_loss(asm, generator, receiver):
+
+    # Datagrams: 1 static page, 2 keyframe 1, 3 to 11 deltas, 12 keyframe
+    # 11, 13... Losing the first keyframe leaves its deltas undecodable,
+    # losing a delta only loses that frame. Frames sent before the first
+    # one received can't be counted as lost.
+    sent, received = stream(asm, generator, receiver, 30, lost={2, 5},
+                            keyframe_interval=10, static_interval=10)
+
+    frames = [pages for pages in received if pages is not None]
+    expected = sent[10:]
+
+    assert len(frames) == len(expected)
+    assert all(same_frame(*pair) for pair in zip(expected, frames))
+    assert receiver.stats.lost == 1
+    assert receiver.stats.undecodable == 8
+    assert receiver.stats.received == 20
+    assert 0 < receiver.stats.loss_rate < 1
+
+
+def test_stream_restart(asm, generator, receiver):
+
+    stream(asm, generator, receiver, 20, keyframe_interval=10)
+
+    # The first keyframe of the new stream is lost, its deltas can't be
+    # rebuilt but the next keyframe is, it isn't older than the first
+    # stream
+    sent, received = stream(asm, generator, receiver, 30, lost={2},
+                            keyframe_interval=10, static_interval=10)
+    frames = [pages for pages in received if pages is not None]
+
+    assert len(frames) == 20
+    assert all(same_frame(*pair) for pair in zip(sent[10:], frames))
+    assert receiver.stats.restarts == 1
+    assert receiver.stats.out_of_order == 0
+    assert receiver.stats.lost == 0
+
+
+def datagram(kind, payload, sequence=1, reference=1):
+
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, kind, 7, sequence,
+                        reference, 0, 1, 1) + payload
+
+
+@pytest.mark.parametrize("data", [
+    b"ACCU",
+    datagram(KEYFRAME, b"")[:-1],
+    _HEADER.pack(b"NOPE", FORMAT_VERSION, KEYFRAME, 7, 1, 1, 0, 1, 1),
+    datagram(b"X", zlib.compress(b"")),
+    datagram(KEYFRAME, b"not zlib"),
+    datagram(STATIC, zlib.compress(b"\x00" * 16)),
+    # A zlib bomb is cut at the expected size
+    datagram(DELTA, zlib.compress(b"\x00" * (1 << 24))),
+    datagram(KEYFRAME, zlib.compress(b"\x00" * (1 << 16))[:-4]),
+])
+def test_reject_corrupted_datagrams(receiver, data):
+
+    assert receiver._decode(data) is None
+    assert receiver.stats.rejected == 1
+    assert receiver.stats.received == 0
+
+
+def test_stream_out_of_order(receiver):
+
+    keyframe = zlib.compress(bytes(_FRAMES_SIZE))
+    static = zlib.compress(bytes(STATIC_PAGE_SIZE))
+
+    assert receiver._decode(datagram(STATIC, static)) is None
+    assert receiver._decode(datagram(KEYFRAME, keyframe, 5, 5)) is not None
+    assert receiver._decode(datagram(KEYFRAME, keyframe, 1, 1)) is None
+
+    assert receiver.stats.out_of_order == 1
+    assert receiver.stats.restarts == 0